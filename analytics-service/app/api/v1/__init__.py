@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 
 from app.api.v1.endpoints import (
-    dashboards, tasks, users, departments, companies, time
+    dashboards, tasks, users, departments, companies, time, reports, export
 )
 
 router = APIRouter()
@@ -20,4 +20,6 @@ router.include_router(users.router, prefix="/users", tags=["User Analytics"])
 router.include_router(departments.router, prefix="/departments", tags=["Department Analytics"])
 router.include_router(companies.router, prefix="/companies", tags=["Company Analytics"])
 router.include_router(time.router, prefix="/time", tags=["Time Analytics"])
-router.include_router(dashboards.router, prefix="/dashboards", tags=["Dashboards"]) 
\ No newline at end of file
+router.include_router(dashboards.router, prefix="/dashboards", tags=["Dashboards"]) 
+router.include_router(reports.router, prefix="/reports", tags=["Reports"])
+router.include_router(export.router, prefix="/export", tags=["Export"])
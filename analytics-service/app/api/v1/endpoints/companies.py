@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
 
 from app.db.session import get_db
+from app.core.cache import result_cache
 from app.core.security import get_current_user, AuthenticatedUser
-# Import relevant schemas when ready
+from app.schemas.departments import DepartmentComparisonResponse
+from app.services import department_service
 
 router = APIRouter()
 
@@ -19,13 +20,22 @@ async def get_company_summary(
     # TODO: Implement logic in analytics_service
     return {"message": f"Company {company_id} summary not implemented yet"}
 
-@router.get("/{company_id}/departments-stats", response_model=dict)
+@router.get("/{company_id}/departments-stats", response_model=DepartmentComparisonResponse)
 async def get_company_departments_stats(
     company_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: AuthenticatedUser = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    days: int = Query(30, ge=1, le=366, description="Period length in days, today included"),
 ):
-    """(Placeholder) Gets statistics across departments for a specific company."""
+    """Gets throughput, backlog and average cycle time of every department of a company."""
     # TODO: Implement permission check
-    # TODO: Implement logic in analytics_service
-    return {"message": f"Company {company_id} departments stats not implemented yet"} 
\ No newline at end of file
+    start, end = department_service.period_bounds(days)
+
+    async def load():
+        departments = await department_service.get_department_stats(db, company_id, start, end)
+        return DepartmentComparisonResponse(
+            company_id=company_id, period_start=start, period_end=end, departments=departments
+        ).model_dump(mode="json")
+
+    # Same result as /departments/comparison?company_id=..., so the cache entry is shared
+    return await result_cache.get_or_load("departments.comparison", company_id, {"start": start, "end": end}, load)
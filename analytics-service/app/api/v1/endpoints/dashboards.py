@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import Optional
+from datetime import datetime, timezone
 
 from app.db.session import get_db
-from app.schemas.dashboard import Dashboard, DashboardCreate, DashboardUpdate
-from app.services import dashboard_service
+from app.core.pagination import InvalidCursorError
+from app.schemas.pagination import Page
+from app.schemas.dashboard import Dashboard, DashboardCreate, DashboardUpdate, DashboardRender
+from app.services import dashboard_service, dashboard_render
 from app.core.security import get_current_user, AuthenticatedUser
 
 router = APIRouter()
@@ -39,19 +42,52 @@ async def read_dashboard(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this dashboard")
     return db_dashboard
 
-@router.get("/custom", response_model=List[Dashboard])
+@router.get("/custom/{dashboard_id}/render", response_model=DashboardRender)
+async def render_dashboard(
+    *,
+    dashboard_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Returns the data of all widgets of a dashboard in one response.
+       Identical metric requests are computed once and distinct ones run concurrently.
+    """
+    db_dashboard = await dashboard_service.get_dashboard(db=db, dashboard_id=dashboard_id)
+    if db_dashboard is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dashboard not found")
+    if db_dashboard.owner_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this dashboard")
+    # Release the request's connection before the widget queries take their own
+    configuration = db_dashboard.configuration
+    await db.close()
+
+    try:
+        distinct_queries, widgets = await dashboard_render.render_widgets(configuration)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return DashboardRender(
+        dashboard_id=dashboard_id,
+        rendered_at=datetime.now(timezone.utc),
+        distinct_queries=distinct_queries,
+        widgets=widgets,
+    )
+
+@router.get("/custom", response_model=Page[Dashboard])
 async def read_dashboards(
     *,
     db: AsyncSession = Depends(get_db),
     current_user: AuthenticatedUser = Depends(get_current_user),
-    skip: int = 0,
-    limit: int = 100
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=500)
 ):
-    """Gets a list of dashboards owned by the authenticated user."""
-    dashboards = await dashboard_service.get_dashboards_by_owner(
-        db=db, owner_id=current_user.id, skip=skip, limit=limit
-    )
-    return dashboards
+    """Gets a page of dashboards owned by the authenticated user, most recently updated first."""
+    try:
+        dashboards, next_cursor = await dashboard_service.get_dashboards_by_owner(
+            db=db, owner_id=current_user.id, cursor=cursor, limit=limit
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return Page[Dashboard](items=dashboards, next_cursor=next_cursor)
 
 @router.put("/custom/{dashboard_id}", response_model=Dashboard)
 async def update_existing_dashboard(
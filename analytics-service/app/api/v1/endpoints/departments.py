@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import Optional
 
 from app.db.session import get_db
+from app.core.cache import result_cache
 from app.core.security import get_current_user, AuthenticatedUser
-# Import relevant schemas when ready
+from app.schemas.departments import DepartmentComparisonResponse
+from app.services import department_service
 
 router = APIRouter()
 
@@ -19,13 +21,23 @@ async def get_department_performance(
     # TODO: Implement logic in analytics_service
     return {"message": f"Department {department_id} performance not implemented yet"}
 
-@router.get("/comparison", response_model=List[dict])
+@router.get("/comparison", response_model=DepartmentComparisonResponse)
 async def get_departments_comparison(
     db: AsyncSession = Depends(get_db),
     current_user: AuthenticatedUser = Depends(get_current_user),
-    company_id: Optional[int] = None # Filter by company
+    company_id: Optional[int] = Query(None, description="Filter by Company ID (all companies if omitted)"),
+    days: int = Query(30, ge=1, le=366, description="Period length in days, today included"),
 ):
-    """(Placeholder) Gets comparison data across departments."""
+    """Compares throughput, backlog and average cycle time across departments.
+    Ranks and shares are relative to the department's company.
+    """
     # TODO: Implement permission check (e.g., company manager/admin)
-    # TODO: Implement logic in analytics_service
-    return [{"message": "Departments comparison not implemented yet"}] 
\ No newline at end of file
+    start, end = department_service.period_bounds(days)
+
+    async def load():
+        departments = await department_service.get_department_stats(db, company_id, start, end)
+        return DepartmentComparisonResponse(
+            company_id=company_id, period_start=start, period_end=end, departments=departments
+        ).model_dump(mode="json")
+
+    return await result_cache.get_or_load("departments.comparison", company_id, {"start": start, "end": end}, load)
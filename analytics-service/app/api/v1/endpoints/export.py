@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
+from datetime import datetime
+
+from app.core.config import settings
+from app.core.security import get_current_user, AuthenticatedUser
+from app.services import export_service
+
+router = APIRouter()
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+@router.get("/analytics-data")
+async def export_analytics_data(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    output_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format", description="ndjson or csv"),
+    company_id: Optional[int] = Query(None, description="Filter by Company ID"),
+    start: Optional[datetime] = Query(None, description="Include rows with timestamp >= start"),
+    end: Optional[datetime] = Query(None, description="Include rows with timestamp < end"),
+    metric_key: Optional[str] = Query(None, description="Filter by metric key, e.g. task_lifecycle"),
+    gzip: bool = Query(False, description="Compress the stream with gzip"),
+):
+    """Streams raw AnalyticsData rows for offline analysis.
+    Memory use stays constant regardless of the number of exported rows.
+    """
+    # TODO: Restrict exports to users allowed to read the company's analytics
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+
+    body = export_service.stream_analytics_data(
+        output_format=output_format,
+        chunk_rows=settings.EXPORT_CHUNK_ROWS,
+        company_id=company_id,
+        start=start,
+        end=end,
+        metric_key=metric_key,
+    )
+    filename = f"analytics_data.{output_format}"
+    media_type = MEDIA_TYPES[output_format]
+    if gzip:
+        body = export_service.gzip_stream(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,6 +1,16 @@
-from fastapi import APIRouter
-from app.schemas.health import HealthResponse, VersionResponse
+from fastapi import APIRouter, HTTPException, status
+import logging
+
+from app.schemas.health import (
+    HealthResponse, VersionResponse, CacheStatsResponse, ConsumerMetricsResponse, DbPoolMetricsResponse
+)
+from app.core.cache import result_cache
+from app.core import consumer_metrics
 from app.core.config import settings
+from app.db import pool_metrics
+from app.db.session import engine, replica_engine
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -13,4 +23,33 @@ async def health_check():
 async def get_version():
     """Get the service version."""
     # You might want to read the version from a file or environment variable
-    return VersionResponse(version=settings.PROJECT_VERSION) 
\ No newline at end of file
+    return VersionResponse(version=settings.PROJECT_VERSION) 
+
+@router.get("/cache", response_model=CacheStatsResponse)
+async def get_cache_stats():
+    """Get hit/miss counters of the query result cache (for sizing it)."""
+    return CacheStatsResponse(**result_cache.get_stats())
+
+@router.get("/consumers", response_model=ConsumerMetricsResponse)
+async def get_consumer_metrics():
+    """Get per-queue processing rate and lag published by the event consumer."""
+    try:
+        snapshots = await consumer_metrics.read_snapshots()
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Consumer metrics are unavailable")
+    return ConsumerMetricsResponse(queues=snapshots)
+
+@router.get("/db", response_model=DbPoolMetricsResponse)
+async def get_db_pool_metrics():
+    """Get connection pool saturation and checkout wait times of this process and of the workers."""
+    pools = [pool_metrics.snapshot(engine.pool, settings.DB_POOL_ROLE)]
+    if replica_engine is not None:
+        pools.append(pool_metrics.snapshot(replica_engine.pool, f"{settings.DB_POOL_ROLE}-replica"))
+    try:
+        published = await pool_metrics.read_snapshots()
+    except Exception as e:
+        logger.warning(f"Could not read published pool metrics: {e}")
+        published = []
+    local_roles = {pool["role"] for pool in pools}
+    pools.extend(item for item in published if item.get("role") not in local_roles)
+    return DbPoolMetricsResponse(pools=pools)
@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.db.session import get_db
+from app.core.pagination import InvalidCursorError
+from app.schemas.pagination import Page
+from app.schemas.report import Report, ReportCreate
+from app.services import report_service
+from app.core.security import get_current_user, AuthenticatedUser
+
+router = APIRouter()
+
+@router.post("", response_model=Report, status_code=status.HTTP_202_ACCEPTED)
+async def request_report(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    report_in: ReportCreate
+):
+    """Requests a report. It is generated in the background by the report worker."""
+    # TODO: Check that the user may request reports for report_in.company_id
+    if report_in.requested_by_user_id != current_user.id:
+        report_in.requested_by_user_id = current_user.id
+    output_format = (report_in.parameters or {}).get("format", "csv")
+    if output_format not in report_service.REPORT_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported report format: {output_format}")
+
+    return await report_service.create_report(db=db, report_in=report_in)
+
+@router.get("", response_model=Page[Report])
+async def read_reports(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=500)
+):
+    """Gets a page of the reports requested by the authenticated user, newest first."""
+    try:
+        reports, next_cursor = await report_service.get_reports_by_requester(
+            db=db, user_id=current_user.id, cursor=cursor, limit=limit
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return Page[Report](items=reports, next_cursor=next_cursor)
+
+async def _get_own_report(db: AsyncSession, report_id: int, current_user: AuthenticatedUser):
+    db_report = await report_service.get_report(db=db, report_id=report_id)
+    if db_report is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
+    if db_report.requested_by_user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this report")
+    return db_report
+
+@router.get("/{report_id}", response_model=Report)
+async def read_report(
+    *,
+    report_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Gets a report request and its generation status."""
+    return await _get_own_report(db, report_id, current_user)
+
+@router.get("/{report_id}/download")
+async def download_report(
+    *,
+    report_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Downloads the generated report file."""
+    db_report = await _get_own_report(db, report_id, current_user)
+    if db_report.status != "completed" or not db_report.result_url:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Report is {db_report.status}")
+    return FileResponse(db_report.result_url, filename=f"report_{db_report.id}.{db_report.result_url.rsplit('.', 1)[-1]}")
@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.db.session import get_db
-from app.schemas.tasks import TasksByStatusResponse
-from app.services import analytics_service
+from app.db.session import get_read_db, cache_ttl_for
+from app.schemas.tasks import TasksByStatusResponse, TaskCompletionTimeStats
+from app.services import analytics_service, completion_time_service
+from app.core.cache import result_cache
 from app.core.security import get_current_user, AuthenticatedUser
 
 router = APIRouter()
@@ -12,7 +13,7 @@ router = APIRouter()
 @router.get("/by-status", response_model=TasksByStatusResponse)
 async def get_tasks_by_status(
     *, 
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AuthenticatedUser = Depends(get_current_user),
     company_id: Optional[int] = Query(None, description="Filter by Company ID (requires permissions if different from user's company)")
     # TODO: Implement proper permission checks based on roles/company
@@ -32,7 +33,13 @@ async def get_tasks_by_status(
         # if not user_has_permission_for_company(current_user, target_company_id):
         #     raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed for this company")
 
-    status_counts = await analytics_service.get_task_counts_by_status(db=db, company_id=target_company_id)
+    status_counts = await result_cache.get_or_load(
+        "tasks.by_status",
+        target_company_id,
+        {},
+        lambda: analytics_service.get_task_counts_by_status(db=db, company_id=target_company_id),
+        ttl_seconds=cache_ttl_for(db),
+    )
     return TasksByStatusResponse(status_counts=status_counts)
 
 # --- Placeholder Endpoints for other Task Analytics --- 
@@ -40,7 +47,7 @@ async def get_tasks_by_status(
 @router.get("/summary", response_model=dict) # Replace dict with TaskSummaryResponse later
 async def get_tasks_summary(
     *, 
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AuthenticatedUser = Depends(get_current_user),
     company_id: Optional[int] = Query(None, description="Filter by Company ID")
 ):
@@ -53,7 +60,7 @@ async def get_tasks_summary(
 @router.get("/by-priority", response_model=dict) 
 async def get_tasks_by_priority(
     *, 
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AuthenticatedUser = Depends(get_current_user),
     company_id: Optional[int] = Query(None, description="Filter by Company ID")
 ):
@@ -61,13 +68,26 @@ async def get_tasks_by_priority(
     # TODO: Implement logic
     return {"message": "Priority endpoint not implemented yet"}
 
-@router.get("/completion-time", response_model=dict) # Replace with TaskCompletionTimeStats
+@router.get("/completion-time", response_model=TaskCompletionTimeStats)
 async def get_task_completion_time_stats(
     *, 
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AuthenticatedUser = Depends(get_current_user),
-    company_id: Optional[int] = Query(None, description="Filter by Company ID")
+    company_id: Optional[int] = Query(None, description="Filter by Company ID"),
+    department_id: Optional[int] = Query(None, description="Filter by Department ID"),
+    priority: Optional[str] = Query(None, description="Filter by task priority"),
 ):
-    """(Placeholder) Gets statistics on task completion time."""
-    # TODO: Implement logic
-    return {"message": "Completion time endpoint not implemented yet"} 
\ No newline at end of file
+    """Gets statistics on task completion time (hours from creation to done).
+    Answered from the stored percentile sketches, without scanning history.
+    """
+    # TODO: Implement permission checks
+    stats = await result_cache.get_or_load(
+        "tasks.completion_time",
+        company_id,
+        {"department_id": department_id, "priority": priority},
+        lambda: completion_time_service.get_completion_time_stats(
+            db, company_id=company_id, department_id=department_id, priority=priority
+        ),
+        ttl_seconds=cache_ttl_for(db),
+    )
+    return TaskCompletionTimeStats(**stats)
@@ -1,36 +1,124 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
-from datetime import date
+from typing import Optional, Tuple
+from datetime import date, datetime, time, timedelta, timezone
 
-from app.db.session import get_db
+from app.db.session import get_read_db, cache_ttl_for
+from app.core.cache import result_cache
 from app.core.security import get_current_user, AuthenticatedUser
-# Import relevant schemas when ready
+from app.schemas.time import Granularity, TimeWorkloadResponse, TimeTrendsResponse
+from app.services import rollup_service
 
 router = APIRouter()
 
-@router.get("/workload", response_model=dict)
+DEFAULT_PERIOD_DAYS = 30
+
+def _period_bounds(start_date: Optional[date], end_date: Optional[date]) -> Tuple[datetime, datetime]:
+    """Converts an inclusive date range to a half-open UTC datetime range."""
+    end_date = end_date or datetime.now(timezone.utc).date()
+    start_date = start_date or end_date - timedelta(days=DEFAULT_PERIOD_DAYS - 1)
+    if start_date > end_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start_date must not be after end_date")
+    start = datetime.combine(start_date, time.min, tzinfo=timezone.utc)
+    end = datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    return start, end
+
+def _require_company(company_id: Optional[int]) -> int:
+    # TODO: Fall back to the user's company once it is available in the token
+    if company_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="company_id is required")
+    return company_id
+
+@router.get("/workload", response_model=TimeWorkloadResponse)
 async def get_time_workload(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AuthenticatedUser = Depends(get_current_user),
-    # Add filters for period, company, department, user
     start_date: Optional[date] = Query(None, description="Start date for period"),
     end_date: Optional[date] = Query(None, description="End date for period"),
-    company_id: Optional[int] = Query(None, description="Filter by Company ID")
+    company_id: Optional[int] = Query(None, description="Filter by Company ID"),
+    department_id: Optional[int] = Query(None, description="Filter by Department ID"),
+    user_id: Optional[int] = Query(None, description="Filter by assignee User ID"),
+    granularity: Granularity = Query("day", description="Bucket size: hour, day or week"),
 ):
-    """(Placeholder) Gets data about workload over time."""
+    """Gets created vs completed tasks per time bucket and the resulting backlog change.
+    Reads only the pre-aggregated rollup buckets.
+    """
     # TODO: Implement permission checks
-    # TODO: Implement logic in analytics_service
-    return {"message": "Time workload endpoint not implemented yet"}
+    target_company_id = _require_company(company_id)
+    start, end = _period_bounds(start_date, end_date)
+
+    async def load():
+        series = await rollup_service.get_activity_series(
+            db,
+            company_id=target_company_id,
+            granularity=granularity,
+            start=start,
+            end=end,
+            department_id=department_id,
+            user_id=user_id,
+        )
+        points = []
+        cumulative = 0
+        for point in series:
+            net_change = point["created"] - point["completed"]
+            cumulative += net_change
+            points.append({
+                "bucket_start": point["bucket_start"],
+                "created": point["created"],
+                "completed": point["completed"],
+                "net_change": net_change,
+                "cumulative_change": cumulative,
+            })
+        return TimeWorkloadResponse(
+            granularity=granularity,
+            company_id=target_company_id,
+            department_id=department_id,
+            user_id=user_id,
+            points=points,
+        ).model_dump(mode="json")
+
+    params = {"start": start, "end": end, "granularity": granularity, "department_id": department_id, "user_id": user_id}
+    return await result_cache.get_or_load(
+        "time.workload", target_company_id, params, load, ttl_seconds=cache_ttl_for(db)
+    )
 
-@router.get("/trends", response_model=dict)
+@router.get("/trends", response_model=TimeTrendsResponse)
 async def get_time_trends(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AuthenticatedUser = Depends(get_current_user),
-    # Add filters
-    company_id: Optional[int] = Query(None, description="Filter by Company ID")
+    start_date: Optional[date] = Query(None, description="Start date for period"),
+    end_date: Optional[date] = Query(None, description="End date for period"),
+    company_id: Optional[int] = Query(None, description="Filter by Company ID"),
+    department_id: Optional[int] = Query(None, description="Filter by Department ID"),
+    user_id: Optional[int] = Query(None, description="Filter by assignee User ID"),
+    granularity: Granularity = Query("week", description="Bucket size: hour, day or week"),
 ):
-    """(Placeholder) Gets trend data for metrics over time."""
+    """Gets created, completed and status-transition counts per time bucket.
+    Reads only the pre-aggregated rollup buckets.
+    """
     # TODO: Implement permission checks
-    # TODO: Implement logic in analytics_service
-    return {"message": "Time trends endpoint not implemented yet"} 
\ No newline at end of file
+    target_company_id = _require_company(company_id)
+    start, end = _period_bounds(start_date, end_date)
+
+    async def load():
+        series = await rollup_service.get_activity_series(
+            db,
+            company_id=target_company_id,
+            granularity=granularity,
+            start=start,
+            end=end,
+            department_id=department_id,
+            user_id=user_id,
+        )
+        return TimeTrendsResponse(
+            granularity=granularity,
+            company_id=target_company_id,
+            department_id=department_id,
+            user_id=user_id,
+            points=series,
+        ).model_dump(mode="json")
+
+    params = {"start": start, "end": end, "granularity": granularity, "department_id": department_id, "user_id": user_id}
+    return await result_cache.get_or_load(
+        "time.trends", target_company_id, params, load, ttl_seconds=cache_ttl_for(db)
+    )
@@ -1,17 +1,19 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import Optional
 
-from app.db.session import get_db
+from app.db.session import get_read_db
+from app.core.config import settings
 from app.core.security import get_current_user, AuthenticatedUser
-# Import relevant schemas when ready
+from app.schemas.users import LeaderboardMetric, LeaderboardPeriod, TopPerformer, TopPerformersResponse
+from app.services import leaderboard_service
 
 router = APIRouter()
 
 @router.get("/{user_id}/performance", response_model=dict)
 async def get_user_performance(
     user_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """(Placeholder) Gets performance metrics for a specific user."""
@@ -22,7 +24,7 @@ async def get_user_performance(
 @router.get("/{user_id}/tasks-stats", response_model=dict)
 async def get_user_tasks_stats(
     user_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """(Placeholder) Gets task-related statistics for a specific user."""
@@ -30,14 +32,34 @@ async def get_user_tasks_stats(
     # TODO: Implement logic in analytics_service
     return {"message": f"User {user_id} tasks stats not implemented yet"}
 
-@router.get("/top-performers", response_model=List[dict])
+@router.get("/top-performers", response_model=TopPerformersResponse)
 async def get_top_performers(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AuthenticatedUser = Depends(get_current_user),
-    # Add query parameters for filtering (company, department, period)
-    company_id: Optional[int] = None
+    company_id: Optional[int] = Query(None, description="Filter by Company ID"),
+    department_id: Optional[int] = Query(None, description="Filter by Department ID"),
+    period: LeaderboardPeriod = Query("month", description="Current week, current month or all time"),
+    metric: LeaderboardMetric = Query("completed", description="completed tasks or evaluation points"),
+    limit: int = Query(10, ge=1, le=settings.LEADERBOARD_MAX_LIMIT),
 ):
-    """(Placeholder) Gets a list of top performing users based on metrics."""
+    """Gets the top users of a company or department for the current period.
+    Read from the incrementally maintained leaderboards, no aggregation query.
+    """
     # TODO: Implement permission check
-    # TODO: Implement logic in analytics_service
-    return [{"message": "Top performers endpoint not implemented yet"}] 
\ No newline at end of file
+    # TODO: Fall back to the user's company once it is available in the token
+    if company_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="company_id is required")
+    start, entries = await leaderboard_service.get_top_performers(
+        db, company_id=company_id, department_id=department_id, metric=metric, period=period, limit=limit
+    )
+    return TopPerformersResponse(
+        metric=metric,
+        period=period,
+        period_start=start,
+        company_id=company_id,
+        department_id=department_id,
+        performers=[
+            TopPerformer(rank=rank, user_id=user_id, score=score)
+            for rank, (user_id, score) in enumerate(entries, start=1)
+        ],
+    )
@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "analytics:cache"
+INVALIDATION_CHANNEL = "analytics:cache:invalidate"
+# Company bucket for results computed across all companies
+ALL_COMPANIES = "all"
+
+
+def _company_bucket(company_id: Optional[int]) -> str:
+    return ALL_COMPANIES if company_id is None else str(company_id)
+
+
+def _params_hash(params: Dict[str, Any]) -> str:
+    canonical = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+    """Two-tier cache for analytics query results.
+
+    Tier 1 is an in-process LRU, tier 2 an optional Redis store shared by all
+    API workers. Entries are keyed by endpoint, company and query parameters
+    and grouped per company, so the event consumer can invalidate exactly
+    the company whose data changed (plus the cross-company results).
+    Invalidations are broadcast over Redis pub/sub to drop the in-process
+    entries of every API worker; without Redis, local entries only expire
+    by TTL.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, redis_enabled: bool):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis_enabled = redis_enabled
+        # key -> (expires_at, company bucket, value)
+        self._local: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()
+        self._company_keys: Dict[str, Set[str]] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self.stats = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+            "errors": 0,
+        }
+
+    # --- Local tier ---
+
+    def _local_get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._local.get(key)
+        if entry is None:
+            return False, None
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            self._local_pop(key)
+            return False, None
+        self._local.move_to_end(key)
+        return True, value
+
+    def _local_set(self, key: str, company: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        self._local[key] = (time.monotonic() + (ttl_seconds or self.ttl_seconds), company, value)
+        self._local.move_to_end(key)
+        self._company_keys.setdefault(company, set()).add(key)
+        while len(self._local) > self.max_entries:
+            oldest_key = next(iter(self._local))
+            self._local_pop(oldest_key)
+
+    def _local_pop(self, key: str) -> None:
+        entry = self._local.pop(key, None)
+        if entry is not None:
+            keys = self._company_keys.get(entry[1])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._company_keys[entry[1]]
+
+    def _local_invalidate(self, companies: Iterable[str]) -> None:
+        for company in companies:
+            for key in self._company_keys.pop(company, set()):
+                self._local.pop(key, None)
+
+    # --- Public API ---
+
+    async def get_or_load(
+        self,
+        endpoint: str,
+        company_id: Optional[int],
+        params: Dict[str, Any],
+        loader: Callable[[], Awaitable[Any]],
+        ttl_seconds: Optional[int] = None,
+    ) -> Any:
+        """Returns the cached result or computes, stores and returns it.
+
+        `loader` must return a JSON-serialisable value. `ttl_seconds` shortens
+        the lifetime of the stored entry (e.g. for results read from a
+        replica, which may miss changes the invalidation already announced).
+        """
+        if not settings.CACHE_ENABLED:
+            return await loader()
+
+        company = _company_bucket(company_id)
+        key = f"{REDIS_KEY_PREFIX}:{company}:{endpoint}:{_params_hash(params)}"
+
+        found, value = self._local_get(key)
+        if found:
+            self.stats["local_hits"] += 1
+            return value
+
+        if self.redis_enabled:
+            try:
+                redis_client = await get_redis()
+                raw = await redis_client.get(key)
+                if raw is not None:
+                    value = json.loads(raw)
+                    self.stats["redis_hits"] += 1
+                    self._local_set(key, company, value)
+                    return value
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Redis cache read failed for {key}: {e}")
+
+        self.stats["misses"] += 1
+        value = await loader()
+        ttl_seconds = min(ttl_seconds, self.ttl_seconds) if ttl_seconds else self.ttl_seconds
+        self._local_set(key, company, value, ttl_seconds)
+
+        if self.redis_enabled:
+            try:
+                redis_client = await get_redis()
+                index_key = f"{REDIS_KEY_PREFIX}:keys:{company}"
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    pipe.set(key, json.dumps(value, default=str), ex=ttl_seconds)
+                    pipe.sadd(index_key, key)
+                    pipe.expire(index_key, self.ttl_seconds)
+                    await pipe.execute()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Redis cache write failed for {key}: {e}")
+        return value
+
+    async def invalidate_companies(self, company_ids: Iterable[Optional[int]]) -> None:
+        """Drops all entries of the given companies and the cross-company entries."""
+        companies = {_company_bucket(company_id) for company_id in company_ids}
+        if not companies:
+            return
+        companies.add(ALL_COMPANIES)
+        self.stats["invalidations"] += 1
+        self._local_invalidate(companies)
+
+        if not self.redis_enabled:
+            return
+        try:
+            redis_client = await get_redis()
+            index_keys = [f"{REDIS_KEY_PREFIX}:keys:{company}" for company in companies]
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for index_key in index_keys:
+                    pipe.smembers(index_key)
+                members = await pipe.execute()
+            keys = set().union(*members)
+            await redis_client.delete(*keys, *index_keys)
+            await redis_client.publish(INVALIDATION_CHANNEL, json.dumps(sorted(companies)))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Redis cache invalidation failed for companies {sorted(companies)}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["local_hits"] + self.stats["redis_hits"] + self.stats["misses"]
+        hits = self.stats["local_hits"] + self.stats["redis_hits"]
+        return {
+            **self.stats,
+            "local_entries": len(self._local),
+            "local_max_entries": self.max_entries,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+        }
+
+    # --- Cross-process invalidation ---
+
+    async def _listen_for_invalidations(self) -> None:
+        redis_client = await get_redis()
+        pubsub = redis_client.pubsub()
+        await pubsub.subscribe(INVALIDATION_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    self._local_invalidate(json.loads(message["data"]))
+                except (TypeError, ValueError):
+                    logger.warning(f"Ignoring malformed cache invalidation: {message['data']}")
+        finally:
+            await pubsub.unsubscribe(INVALIDATION_CHANNEL)
+            await pubsub.close()
+
+    async def start_invalidation_listener(self) -> None:
+        """Subscribes to invalidations published by other processes (e.g. the consumer)."""
+        if self.redis_enabled and self._listener is None:
+            self._listener = asyncio.create_task(self._listen_for_invalidations())
+            logger.info("Cache invalidation listener started.")
+
+    async def stop_invalidation_listener(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+
+result_cache = ResultCache(
+    max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+    # Without Redis the consumer's invalidations don't reach this process
+    ttl_seconds=(
+        settings.CACHE_TTL_SECONDS if settings.CACHE_REDIS_ENABLED
+        else min(settings.CACHE_TTL_SECONDS, settings.CACHE_LOCAL_ONLY_TTL_SECONDS)
+    ),
+    redis_enabled=settings.CACHE_REDIS_ENABLED,
+)
@@ -16,6 +16,52 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: PostgresDsn
 
+    # Connection pool, per process: set these separately for the API and the
+    # consumer and label each with DB_POOL_ROLE (shown in /health/db).
+    # Instead of a liveness round trip on every checkout (DB_POOL_PRE_PING),
+    # connections are replaced after DB_POOL_RECYCLE seconds, before server
+    # or proxy idle timeouts can close them.
+    DB_POOL_ROLE: str = "api"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    # asyncpg prepared statements cached per connection (0 behind PgBouncer transaction pooling)
+    DB_STATEMENT_CACHE_SIZE: int = 500
+
+    # Optional read replica for the /tasks, /time and /users reads (same pool
+    # settings as the primary). Reads go back to the primary while the
+    # replica lags more than REPLICA_MAX_LAG_SECONDS or can't be checked.
+    REPLICA_DATABASE_URL: PostgresDsn | None = None
+    REPLICA_MAX_LAG_SECONDS: float = 30
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 5
+
+    # analytics_data partitioning: monthly partitions are created this many
+    # months ahead; partitions older than the retention period are dropped,
+    # or detached and moved to the archive schema when one is configured
+    ANALYTICS_PARTITION_PREMAKE_MONTHS: int = 3
+    ANALYTICS_RETENTION_MONTHS: int = 24
+    ANALYTICS_ARCHIVE_SCHEMA: str | None = None
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS: int = 6 * 60 * 60
+
+    # Report worker: reports are aggregated in a process pool and written to REPORTS_DIR
+    REPORTS_DIR: str = "./reports"
+    REPORT_WORKER_PROCESSES: int = 2
+    REPORT_CHUNK_ROWS: int = 50000
+    # A report still "processing" this long after it was claimed is considered
+    # abandoned by a crashed worker and is returned to "pending"
+    REPORT_CLAIM_TIMEOUT_SECONDS: int = 3600
+    REPORT_POLL_INTERVAL_SECONDS: int = 5
+
+    # Backfill from the task-service database (python -m app.workers.backfill_task_service)
+    TASK_SERVICE_DATABASE_URL: PostgresDsn | None = None
+    BACKFILL_SHARDS: int = 4
+    BACKFILL_BATCH_SIZE: int = 5000
+
+    # Rows fetched per server-side cursor round trip by the streaming export
+    EXPORT_CHUNK_ROWS: int = 10000
+
     # Redis
     REDIS_HOST: str
     REDIS_PORT: int = 6379
@@ -24,9 +70,61 @@ class Settings(BaseSettings):
     def REDIS_URL(self) -> RedisDsn:
         return RedisDsn(f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}")
 
+    # Query result cache: in-process LRU plus an optional shared Redis tier.
+    # The Redis tier is also what carries consumer invalidations to the API:
+    # without it entries only expire by TTL, so CACHE_TTL_SECONDS is capped
+    # at CACHE_LOCAL_ONLY_TTL_SECONDS.
+    CACHE_ENABLED: bool = True
+    CACHE_LOCAL_MAX_ENTRIES: int = 1024
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_LOCAL_ONLY_TTL_SECONDS: int = 10
+    CACHE_REDIS_ENABLED: bool = False
+
+    # Top-performer leaderboards live in Redis sorted sets; without Redis
+    # they are aggregated from the database and kept in process memory.
+    # Week and month boards expire after LEADERBOARD_RETENTION_DAYS.
+    LEADERBOARD_REDIS_ENABLED: bool = True
+    LEADERBOARD_RETENTION_DAYS: int = 400
+    LEADERBOARD_MAX_LIMIT: int = 100
+
+    # Dashboard rendering: distinct widget metrics run concurrently, each on
+    # its own pooled connection, at most DASHBOARD_RENDER_CONCURRENCY at a time
+    # (keep it below the pool size so one dashboard can't take every connection)
+    DASHBOARD_MAX_WIDGETS: int = 50
+    DASHBOARD_RENDER_CONCURRENCY: int = 4
+
     # RabbitMQ
     AMQP_URL: AmqpDsn
 
+    # Event consumer batching: collect up to EVENT_BATCH_MAX_SIZE messages or
+    # wait at most EVENT_BATCH_MAX_WAIT_MS, then write them in one transaction
+    EVENT_BATCH_ENABLED: bool = False
+    EVENT_BATCH_MAX_SIZE: int = 100
+    EVENT_BATCH_MAX_WAIT_MS: int = 200
+
+    # Event consumers: every queue gets its own channel and prefetch window and
+    # at most CONSUMER_MAX_CONCURRENCY handlers running at once, so a slow
+    # queue can't starve the others. Metrics are logged and published to
+    # Redis every CONSUMER_METRICS_INTERVAL_SECONDS.
+    TASK_EVENTS_PREFETCH: int = 10
+    USER_EVENTS_PREFETCH: int = 10
+    COMPANY_EVENTS_PREFETCH: int = 10
+    CALENDAR_EVENTS_PREFETCH: int = 10
+    CONSUMER_MAX_CONCURRENCY: int = 5
+    CONSUMER_METRICS_INTERVAL_SECONDS: int = 30
+
+    # Failed events are retried through delayed-retry queues with exponential
+    # backoff (base, 2*base, ...) and moved to the queue's DLQ after
+    # EVENT_MAX_ATTEMPTS attempts
+    EVENT_MAX_ATTEMPTS: int = 5
+    EVENT_RETRY_BASE_DELAY_MS: int = 1000
+
+    # In-memory filter of recently stored event ids (two Bloom filter
+    # generations of this capacity). A false positive skips a new event, so
+    # keep the error rate very low; the unique index catches the rest.
+    EVENT_DEDUP_FILTER_CAPACITY: int = 100000
+    EVENT_DEDUP_FILTER_ERROR_RATE: float = 1e-6
+
     # JWT Settings (should be same as other services)
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
@@ -0,0 +1,92 @@
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "analytics:consumers"
+QUEUES_KEY = f"{REDIS_KEY_PREFIX}:queues"
+
+
+class QueueMetrics:
+    """Processing counters of one consumed queue.
+
+    Counters are cumulative; `snapshot` turns them into a processing rate
+    over the time since the previous snapshot. Lag is reported twice: as the
+    queue depth (messages waiting in the broker) and as the age of the last
+    received message, when the producer set the AMQP timestamp.
+    """
+
+    def __init__(self, queue_name: str):
+        self.queue_name = queue_name
+        self.processed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.last_message_age_seconds: Optional[float] = None
+        self._last_snapshot_at = time.monotonic()
+        self._last_snapshot_processed = 0
+
+    def received(self, message_timestamp: Optional[datetime]) -> None:
+        if message_timestamp is not None:
+            if message_timestamp.tzinfo is None:
+                message_timestamp = message_timestamp.replace(tzinfo=timezone.utc)
+            self.last_message_age_seconds = round(
+                (datetime.now(timezone.utc) - message_timestamp).total_seconds(), 3
+            )
+
+    def started(self, count: int = 1) -> None:
+        self.in_flight += count
+
+    def finished(self, ok: bool, count: int = 1) -> None:
+        self.in_flight -= count
+        if ok:
+            self.processed += count
+        else:
+            self.failed += count
+
+    def snapshot(self, queue_depth: Optional[int]) -> Dict[str, Any]:
+        now = time.monotonic()
+        elapsed = now - self._last_snapshot_at
+        rate = (self.processed - self._last_snapshot_processed) / elapsed if elapsed > 0 else 0.0
+        self._last_snapshot_at = now
+        self._last_snapshot_processed = self.processed
+        return {
+            "queue": self.queue_name,
+            "processed": self.processed,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "rate_per_second": round(rate, 3),
+            "queue_depth": queue_depth,
+            "last_message_age_seconds": self.last_message_age_seconds,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+
+async def publish_snapshots(snapshots: List[Dict[str, Any]], ttl_seconds: int) -> None:
+    """Stores the latest snapshot of each queue in Redis for the API's health endpoint.
+
+    Entries expire after `ttl_seconds`, so a stopped consumer disappears
+    from the report instead of showing stale numbers.
+    """
+    redis_client = await get_redis()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for snapshot in snapshots:
+            key = f"{REDIS_KEY_PREFIX}:{snapshot['queue']}"
+            pipe.hset(key, mapping={name: "" if value is None else str(value) for name, value in snapshot.items()})
+            pipe.expire(key, ttl_seconds)
+            pipe.sadd(QUEUES_KEY, snapshot["queue"])
+        await pipe.execute()
+
+
+async def read_snapshots() -> List[Dict[str, Any]]:
+    """Returns the latest published snapshot of every consumed queue."""
+    redis_client = await get_redis()
+    queue_names = sorted(await redis_client.smembers(QUEUES_KEY))
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for queue_name in queue_names:
+            pipe.hgetall(f"{REDIS_KEY_PREFIX}:{queue_name}")
+        hashes = await pipe.execute()
+    return [{name: value or None for name, value in data.items()} for data in hashes if data]
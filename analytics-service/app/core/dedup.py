@@ -0,0 +1,75 @@
+import hashlib
+import json
+import math
+import uuid
+from typing import Any, Dict
+
+# Namespace for event ids derived from the event content
+EVENT_ID_NAMESPACE = uuid.UUID("6f1c5a52-3f0e-4b8e-9a57-2b1d0c7e4a11")
+
+
+def derive_event_id(event_type: str, payload: Dict[str, Any]) -> uuid.UUID:
+    """Deterministic id for events sent without one.
+
+    A redelivered or replayed message has the same content and therefore
+    gets the same id.
+    """
+    canonical = json.dumps(
+        {"event_type": event_type, "payload": {k: v for k, v in payload.items() if k != "event_id"}},
+        sort_keys=True,
+        default=str,
+    )
+    return uuid.uuid5(EVENT_ID_NAMESPACE, canonical)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (k hash positions per key)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # Enhanced double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little")
+        return ((h1 + i * h2 + (i ** 3 - i) // 6) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RecentEventFilter:
+    """Remembers roughly the last `capacity`..2*`capacity` event ids.
+
+    Two Bloom filter generations: new ids go into the current one, lookups
+    check both, and when the current one is full the older generation is
+    dropped. Memory stays bounded and old ids are forgotten, which is all a
+    redelivery check needs; the unique index in the database remains the
+    source of truth.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = BloomFilter(capacity, error_rate)
+
+    def add(self, event_id: uuid.UUID) -> None:
+        if self._current.count >= self.capacity:
+            self._previous = self._current
+            self._current = BloomFilter(self.capacity, self.error_rate)
+        self._current.add(str(event_id))
+
+    def __contains__(self, event_id: uuid.UUID) -> bool:
+        key = str(event_id)
+        return key in self._current or key in self._previous
@@ -0,0 +1,30 @@
+from bisect import bisect_left, insort
+from typing import Dict, List, Tuple
+
+
+class LocalLeaderboard:
+    """In-memory sorted leaderboard, the fallback for Redis sorted sets.
+
+    Entries are kept in a list sorted by descending score, so finding a
+    member's position is a binary search and reading the top K is a slice.
+    """
+
+    def __init__(self):
+        self._scores: Dict[int, float] = {}
+        # (-score, member), ascending == best first
+        self._entries: List[Tuple[float, int]] = []
+
+    def increment(self, member: int, amount: float) -> float:
+        old = self._scores.get(member)
+        if old is not None:
+            del self._entries[bisect_left(self._entries, (-old, member))]
+        score = (old or 0) + amount
+        self._scores[member] = score
+        insort(self._entries, (-score, member))
+        return score
+
+    def top(self, k: int) -> List[Tuple[int, float]]:
+        return [(member, -negative_score) for negative_score, member in self._entries[:k]]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -63,14 +63,34 @@ async def declare_queue(queue_name: str, durable: bool = True) -> aio_pika.Queue
     queue = await channel.declare_queue(queue_name, durable=durable)
     return queue
 
-async def consume_messages(queue_name: str, callback: Callable[[aio_pika.IncomingMessage], None]) -> None:
-    """Starts consuming messages from a specified queue."""
-    if not channel:
+async def open_channel(prefetch_count: int) -> aio_pika.abc.AbstractChannel:
+    """Opens an additional channel on the shared connection with its own prefetch window."""
+    if not connection or connection.is_closed:
         await connect_to_rabbitmq()
-        if not channel:
-             raise ConnectionError("Failed to establish RabbitMQ channel for consuming messages.")
+        if not connection:
+             raise ConnectionError("Failed to establish RabbitMQ connection for opening a channel.")
+
+    queue_channel = await connection.channel()
+    await queue_channel.set_qos(prefetch_count=prefetch_count)
+    return queue_channel
 
-    queue = await declare_queue(queue_name)
+async def consume_messages(
+    queue_name: str,
+    callback: Callable[[aio_pika.IncomingMessage], None],
+    prefetch_count: Optional[int] = None,
+) -> aio_pika.abc.AbstractQueue:
+    """Starts consuming messages from a specified queue.
+
+    With `prefetch_count` the queue is consumed on a dedicated channel, so its
+    unacked window doesn't compete with the other queues of this process.
+    """
+    if prefetch_count is not None:
+        queue_channel = await open_channel(prefetch_count)
+        logger.info(f"Declaring queue: {queue_name} (prefetch_count={prefetch_count})")
+        queue = await queue_channel.declare_queue(queue_name, durable=True)
+    else:
+        queue = await declare_queue(queue_name)
     logger.info(f"Starting consumer for queue: {queue_name}")
     await queue.consume(callback)
-    logger.info(f"Consumer started for queue: {queue_name}") 
\ No newline at end of file
+    logger.info(f"Consumer started for queue: {queue_name}")
+    return queue
@@ -0,0 +1,65 @@
+"""Opaque-cursor keyset pagination.
+
+Lists are ordered newest first by (sort column, id). A cursor carries the
+sort key of the last row of a page, and the next page continues strictly
+after it with a row-value comparison. This uses a composite index on
+(filter column, sort column, id), so every page costs the same no matter
+how deep the client has walked, unlike OFFSET, which reads and discards
+all the skipped rows.
+
+Rows whose sort column changes while a client is paging (e.g. an edited
+dashboard) move to the front of the list; a walk in progress will not see
+them again, but never sees a row twice.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    raw = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    sort_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    cursor: Optional[str],
+    limit: int,
+) -> Tuple[Sequence[Any], Optional[str]]:
+    """Returns one page of `query` (which must select ORM entities) and the cursor of the next page.
+
+    The next cursor is None on the last page; one extra row is fetched to
+    tell without a COUNT.
+    """
+    if cursor is not None:
+        query = query.where(tuple_(sort_column, id_column) < tuple_(*decode_cursor(cursor)))
+    query = query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1)
+    result = await db.execute(query)
+    rows: List[Any] = list(result.scalars().all())
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
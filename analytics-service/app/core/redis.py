@@ -0,0 +1,31 @@
+import logging
+from typing import Optional
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+client: Optional[redis.Redis] = None
+
+async def get_redis() -> redis.Redis:
+    """Returns the shared Redis client, connecting on first use."""
+    global client
+    if client is None:
+        logger.info(f"Connecting to Redis at {settings.REDIS_HOST}:{settings.REDIS_PORT}...")
+        client = redis.from_url(str(settings.REDIS_URL), decode_responses=True)
+        await client.ping()
+        logger.info("Successfully connected to Redis.")
+    return client
+
+async def close_redis() -> None:
+    """Closes the shared Redis client."""
+    global client
+    if client is not None:
+        try:
+            await client.close()
+            logger.info("Redis connection closed.")
+        except Exception as e:
+            logger.error(f"Error closing Redis connection: {e}", exc_info=True)
+        client = None
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+import aio_pika
+
+from app.core import messaging
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ATTEMPT_HEADER = "x-attempt"
+ORIGINAL_QUEUE_HEADER = "x-original-queue"
+LAST_ERROR_HEADER = "x-last-error"
+
+
+class PermanentEventError(Exception):
+    """The event can never be processed (bad JSON, invalid structure or payload).
+
+    Such messages skip the retries and go straight to the dead-letter queue.
+    """
+
+
+def retry_delay_ms(attempt: int) -> int:
+    """Backoff before the given retry attempt (1-based): base, 2*base, 4*base, ..."""
+    return settings.EVENT_RETRY_BASE_DELAY_MS * 2 ** (attempt - 1)
+
+
+def retry_queue_name(queue_name: str, attempt: int) -> str:
+    # The delay is part of the name: a queue's TTL can't change once declared
+    return f"{queue_name}.retry.{retry_delay_ms(attempt)}ms"
+
+
+def dead_letter_queue_name(queue_name: str) -> str:
+    return f"{queue_name}.dlq"
+
+
+async def declare_retry_topology(queue_name: str) -> None:
+    """Declares the delayed-retry queues and the DLQ of a consumed queue.
+
+    Retry queues have no consumers: a message waits there for the queue's
+    TTL and is then dead-lettered through the default exchange back into
+    the main queue.
+    """
+    if not messaging.channel:
+        await messaging.connect_to_rabbitmq()
+    for attempt in range(1, settings.EVENT_MAX_ATTEMPTS):
+        await messaging.channel.declare_queue(
+            retry_queue_name(queue_name, attempt),
+            durable=True,
+            arguments={
+                "x-message-ttl": retry_delay_ms(attempt),
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": queue_name,
+            },
+        )
+    await messaging.channel.declare_queue(dead_letter_queue_name(queue_name), durable=True)
+    logger.info(
+        f"Retry topology declared for {queue_name} "
+        f"({settings.EVENT_MAX_ATTEMPTS - 1} retries, base delay {settings.EVENT_RETRY_BASE_DELAY_MS} ms)"
+    )
+
+
+def attempts_of(message: aio_pika.abc.AbstractMessage) -> int:
+    """Number of failed processing attempts recorded on the message."""
+    try:
+        return int((message.headers or {}).get(ATTEMPT_HEADER, 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+async def _republish(message: aio_pika.abc.AbstractIncomingMessage, routing_key: str, headers: Dict[str, Any]) -> None:
+    await messaging.channel.default_exchange.publish(
+        aio_pika.Message(
+            body=message.body,
+            headers=headers,
+            content_type=message.content_type,
+            message_id=message.message_id,
+            timestamp=message.timestamp,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+        ),
+        routing_key=routing_key,
+    )
+
+
+async def dead_letter(message: aio_pika.abc.AbstractIncomingMessage, queue_name: str, reason: str) -> None:
+    """Moves the message to the queue's DLQ and acks the original."""
+    await _move(message, dead_letter_queue_name(queue_name), queue_name, attempts_of(message), reason)
+    logger.error(f"Message from {queue_name} dead-lettered: {reason}")
+
+
+async def retry_later(message: aio_pika.abc.AbstractIncomingMessage, queue_name: str, error: Exception) -> None:
+    """Schedules a delayed retry, or dead-letters the message after EVENT_MAX_ATTEMPTS."""
+    attempt = attempts_of(message) + 1
+    if attempt >= settings.EVENT_MAX_ATTEMPTS:
+        await _move(message, dead_letter_queue_name(queue_name), queue_name, attempt, str(error))
+        logger.error(f"Message from {queue_name} dead-lettered after {attempt} attempts: {error}")
+        return
+    await _move(message, retry_queue_name(queue_name, attempt), queue_name, attempt, str(error))
+    logger.warning(
+        f"Message from {queue_name} failed (attempt {attempt}), retrying in {retry_delay_ms(attempt)} ms: {error}"
+    )
+
+
+async def _move(
+    message: aio_pika.abc.AbstractIncomingMessage,
+    routing_key: str,
+    queue_name: str,
+    attempt: int,
+    reason: str,
+) -> None:
+    headers = dict(message.headers or {})
+    headers.update({
+        ATTEMPT_HEADER: attempt,
+        ORIGINAL_QUEUE_HEADER: queue_name,
+        LAST_ERROR_HEADER: reason[:500],
+    })
+    try:
+        # The channel uses publisher confirms: the copy is stored before the original is acked
+        await _republish(message, routing_key, headers)
+    except Exception as e:
+        logger.error(f"Could not move message to {routing_key}, requeueing it: {e}", exc_info=True)
+        await message.nack(requeue=True)
+        return
+    await message.ack()
+
+
+async def replay_dead_letters(queue_name: str, limit: int, batch_size: int) -> int:
+    """Moves up to `limit` messages from the queue's DLQ back into the queue.
+
+    Messages are fetched and republished in batches; each batch is acked
+    only after all of its copies were confirmed by the broker. The attempt
+    counter is reset, so replayed messages get the full retry budget again.
+    """
+    if not messaging.channel:
+        await messaging.connect_to_rabbitmq()
+    dlq = await messaging.channel.declare_queue(dead_letter_queue_name(queue_name), durable=True)
+
+    replayed = 0
+    while replayed < limit:
+        batch: List[aio_pika.abc.AbstractIncomingMessage] = []
+        while len(batch) < min(batch_size, limit - replayed):
+            message = await dlq.get(no_ack=False, fail=False)
+            if message is None:
+                break
+            batch.append(message)
+        if not batch:
+            break
+
+        # Confirms of the whole batch are awaited together
+        await asyncio.gather(*(
+            _republish(message, queue_name, {
+                name: value for name, value in (message.headers or {}).items()
+                if name not in (ATTEMPT_HEADER, LAST_ERROR_HEADER)
+            })
+            for message in batch
+        ))
+        await batch[-1].ack(multiple=True)
+        replayed += len(batch)
+        logger.info(f"Replayed {replayed} messages from {dead_letter_queue_name(queue_name)}")
+    return replayed
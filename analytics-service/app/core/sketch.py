@@ -0,0 +1,106 @@
+import math
+from typing import Any, Dict, Optional
+
+
+class DDSketch:
+    """Streaming quantile sketch with relative-error guarantees (DDSketch).
+
+    Positive values are counted in logarithmic bins: bin `i` covers
+    (gamma^(i-1), gamma^i] with gamma = (1 + a) / (1 - a), so any returned
+    quantile is within relative error `a` of the exact one. Sketches with
+    the same accuracy merge exactly by adding bin counts, which is what lets
+    per-department sketches be combined into company-wide percentiles.
+    When more than `max_bins` bins are in use, the lowest ones are collapsed,
+    which only affects accuracy for the smallest values.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float, weight: int = 1) -> None:
+        """Adds a non-negative value (negative values are clamped to zero)."""
+        value = max(value, 0.0)
+        if value == 0:
+            self.zero_count += weight
+        else:
+            index = self._index(value)
+            self.bins[index] = self.bins.get(index, 0) + weight
+            self._collapse()
+        self.count += weight
+        self.sum += value * weight
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "DDSketch") -> None:
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def _collapse(self) -> None:
+        if len(self.bins) <= self.max_bins:
+            return
+        indexes = sorted(self.bins)
+        overflow = indexes[:len(indexes) - self.max_bins + 1]
+        target = overflow[-1]
+        self.bins[target] = sum(self.bins.pop(index) for index in overflow[:-1]) + self.bins[target]
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Returns the value at quantile `q` (0..1), or None for an empty sketch."""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                # Bin midpoint in the relative sense; clamp to the observed range
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": {str(index): count for index, count in self.bins.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], max_bins: int = 2048) -> "DDSketch":
+        sketch = cls(data["relative_accuracy"], max_bins=max_bins)
+        sketch.bins = {int(index): count for index, count in data["bins"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        return sketch
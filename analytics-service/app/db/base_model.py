@@ -8,4 +8,7 @@ Base = declarative_base()
 from app.db.models.analytics_data import AnalyticsData
 from app.db.models.metrics import Metric
 from app.db.models.dashboard import Dashboard
-from app.db.models.report import Report 
\ No newline at end of file
+from app.db.models.report import Report
+from app.db.models.task_current_state import TaskCurrentState
+from app.db.models.task_activity_rollup import TaskActivityRollup
+from app.db.models.completion_time_sketch import CompletionTimeSketch
@@ -1,4 +1,5 @@
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -6,20 +7,34 @@ from app.db.base_model import Base
 
 
 class AnalyticsData(Base):
+    """Raw analytics events.
+
+    The table is range-partitioned by month on `timestamp` (see
+    app/db/partitions.py), so the partition key is part of the primary key.
+    Dimension indexes are paired with `timestamp` so time-bounded lookups
+    stay on the index inside the partitions that survive pruning.
+    """
     __tablename__ = "analytics_data"
 
-    id = sa.Column(sa.Integer, primary_key=True, index=True)
-    metric_key = sa.Column(sa.String, index=True, nullable=False)
-    metric_value = sa.Column(sa.JSON, nullable=False) # Flexible value store
-    timestamp = sa.Column(sa.DateTime(timezone=True), server_default=func.now(), index=True)
-    
+    id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
+    # Producer-assigned (or content-derived) id; redelivered events conflict on it
+    event_id = sa.Column(UUID(as_uuid=True), nullable=True)
+    metric_key = sa.Column(sa.String, nullable=False)
+    metric_value = sa.Column(sa.JSON, nullable=False) # Flexible value store for extra attributes
+
+    # Hot 'task_lifecycle' attributes as typed, indexed columns (NULL for other metrics)
+    status = sa.Column(sa.String(32), index=True, nullable=True)
+    previous_status = sa.Column(sa.String(32), index=True, nullable=True)
+    priority = sa.Column(sa.String(32), index=True, nullable=True)
+    timestamp = sa.Column(sa.DateTime(timezone=True), server_default=func.now(), primary_key=True, index=True)
+
     # Dimensions (Foreign Keys to other services/entities)
     # These might store IDs referencing entities in other services.
     # Consider how to handle potential inconsistencies if IDs change.
-    company_id = sa.Column(sa.Integer, index=True, nullable=True)
-    department_id = sa.Column(sa.Integer, index=True, nullable=True)
-    user_id = sa.Column(sa.Integer, index=True, nullable=True)
-    task_id = sa.Column(sa.Integer, index=True, nullable=True) 
+    company_id = sa.Column(sa.Integer, nullable=True)
+    department_id = sa.Column(sa.Integer, nullable=True)
+    user_id = sa.Column(sa.Integer, nullable=True)
+    task_id = sa.Column(sa.Integer, nullable=True)
     # Add other relevant dimensions as needed, e.g., project_id
 
     # Relationships (Optional, if needed within this service)
@@ -28,4 +43,14 @@ class AnalyticsData(Base):
 
     # Metadata
     created_at = sa.Column(sa.DateTime(timezone=True), server_default=func.now())
-    updated_at = sa.Column(sa.DateTime(timezone=True), server_default=func.now(), onupdate=func.now()) 
\ No newline at end of file
+    updated_at = sa.Column(sa.DateTime(timezone=True), server_default=func.now(), onupdate=func.now()) 
+
+    __table_args__ = (
+        sa.Index("uq_analytics_data_event_id_timestamp", "event_id", "timestamp", unique=True),
+        sa.Index("ix_analytics_data_metric_key_timestamp", "metric_key", "timestamp"),
+        sa.Index("ix_analytics_data_company_id_timestamp", "company_id", "timestamp"),
+        sa.Index("ix_analytics_data_department_id_timestamp", "department_id", "timestamp"),
+        sa.Index("ix_analytics_data_user_id_timestamp", "user_id", "timestamp"),
+        sa.Index("ix_analytics_data_task_id_timestamp", "task_id", "timestamp"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
@@ -0,0 +1,28 @@
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from app.db.base_model import Base
+
+
+class CompletionTimeSketch(Base):
+    """Serialized DDSketch of task completion times (hours from creation to done).
+
+    One row per company, department and priority. Department 0 and the
+    empty priority stand for "unknown", because the columns are part of the
+    unique key. Coarser breakdowns are answered by merging rows.
+    """
+    __tablename__ = "completion_time_sketches"
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    company_id = sa.Column(sa.Integer, nullable=False)
+    department_id = sa.Column(sa.Integer, nullable=False, server_default="0")
+    priority = sa.Column(sa.String(32), nullable=False, server_default="")
+
+    sketch = sa.Column(JSONB, nullable=False)
+    count = sa.Column(sa.BigInteger, nullable=False, server_default="0")
+    updated_at = sa.Column(sa.DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        sa.UniqueConstraint("company_id", "department_id", "priority", name="uq_completion_time_sketches_key"),
+    )
@@ -21,4 +21,9 @@ class Dashboard(Base):
     # company_id = sa.Column(sa.Integer, index=True, nullable=True)
 
     created_at = sa.Column(sa.DateTime(timezone=True), server_default=func.now())
-    updated_at = sa.Column(sa.DateTime(timezone=True), server_default=func.now(), onupdate=func.now()) 
\ No newline at end of file
+    updated_at = sa.Column(sa.DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Keyset pagination of an owner's dashboards by (updated_at, id)
+        sa.Index("ix_dashboards_owner_updated_at_id", "owner_id", "updated_at", "id"),
+    )
@@ -24,4 +24,11 @@ class Report(Base):
     company_id = sa.Column(sa.Integer, index=True, nullable=True)
 
     requested_at = sa.Column(sa.DateTime(timezone=True), server_default=func.now())
-    completed_at = sa.Column(sa.DateTime(timezone=True), nullable=True) 
\ No newline at end of file
+    # When a worker took the report; a "processing" report claimed too long ago goes back to "pending"
+    claimed_at = sa.Column(sa.DateTime(timezone=True), nullable=True)
+    completed_at = sa.Column(sa.DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Keyset pagination of a user's reports by (requested_at, id)
+        sa.Index("ix_reports_requester_requested_at_id", "requested_by_user_id", "requested_at", "id"),
+    )
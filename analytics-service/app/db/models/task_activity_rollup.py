@@ -0,0 +1,36 @@
+import sqlalchemy as sa
+from sqlalchemy.sql import func
+
+from app.db.base_model import Base
+
+
+class TaskActivityRollup(Base):
+    """Pre-aggregated task activity counters per time bucket.
+
+    One row per (company, scope, scope_id, granularity, bucket). `scope` is
+    'company', 'department' or 'user' and `scope_id` is the id of that
+    entity (for the company scope it equals company_id). Rows are updated
+    incrementally by the event consumer.
+    """
+    __tablename__ = "task_activity_rollups"
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    company_id = sa.Column(sa.Integer, nullable=False)
+    scope = sa.Column(sa.String(16), nullable=False)  # company, department, user
+    scope_id = sa.Column(sa.Integer, nullable=False)
+    granularity = sa.Column(sa.String(8), nullable=False)  # hour, day, week
+    bucket_start = sa.Column(sa.DateTime(timezone=True), nullable=False)
+
+    created_count = sa.Column(sa.Integer, nullable=False, default=0, server_default="0")
+    completed_count = sa.Column(sa.Integer, nullable=False, default=0, server_default="0")
+    transition_count = sa.Column(sa.Integer, nullable=False, default=0, server_default="0")
+
+    updated_at = sa.Column(sa.DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Upsert target and the only index range reads need
+        sa.UniqueConstraint(
+            "company_id", "scope", "scope_id", "granularity", "bucket_start",
+            name="uq_task_activity_rollups_bucket",
+        ),
+    )
@@ -0,0 +1,40 @@
+import sqlalchemy as sa
+from sqlalchemy.sql import func
+
+from app.db.base_model import Base
+
+
+class TaskCurrentState(Base):
+    """Snapshot of the latest known lifecycle state of every task.
+
+    Maintained by the event handlers in the same transaction as the
+    corresponding `task_lifecycle` row in AnalyticsData, so status counts
+    can be answered with a plain GROUP BY instead of a max-timestamp scan.
+    """
+    __tablename__ = "task_current_state"
+
+    task_id = sa.Column(sa.Integer, primary_key=True)
+    company_id = sa.Column(sa.Integer, nullable=True)
+    department_id = sa.Column(sa.Integer, nullable=True)
+    user_id = sa.Column(sa.Integer, nullable=True)  # Current assignee
+
+    status = sa.Column(sa.String, nullable=False)
+    priority = sa.Column(sa.String, nullable=True)
+
+    # Timestamps from the event source
+    task_created_at = sa.Column(sa.DateTime(timezone=True), nullable=True)
+    status_changed_at = sa.Column(sa.DateTime(timezone=True), nullable=False)
+
+    updated_at = sa.Column(sa.DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Covers GROUP BY status with and without the company filter
+        sa.Index("ix_task_current_state_company_status", "company_id", "status"),
+        sa.Index("ix_task_current_state_status", "status"),
+        # Department comparison: backlog and cycle time per department without heap reads
+        sa.Index(
+            "ix_task_current_state_company_department_status",
+            "company_id", "department_id", "status",
+            postgresql_include=["task_created_at", "status_changed_at"],
+        ),
+    )
@@ -0,0 +1,65 @@
+"""Helpers for the monthly range partitions of analytics_data.
+
+Partitions are named `analytics_data_yYYYYmMM` and cover one calendar month
+in UTC. A DEFAULT partition catches rows outside of the created ranges so an
+insert never fails because the maintenance job fell behind.
+"""
+import re
+from datetime import date, datetime, timezone
+from typing import Optional, Union
+
+PARENT_TABLE = "analytics_data"
+DEFAULT_PARTITION = "analytics_data_default"
+
+_PARTITION_NAME_RE = re.compile(r"^analytics_data_y(\d{4})m(\d{2})$")
+
+LIST_PARTITIONS_SQL = """
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.relname = 'analytics_data'
+"""
+
+
+def month_start(value: Union[date, datetime]) -> date:
+    """Returns the first day of the (UTC) month containing `value`."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        value = value.date()
+    return value.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def parse_partition_name(name: str) -> Optional[date]:
+    """Returns the month of a monthly partition, None for any other table."""
+    match = _PARTITION_NAME_RE.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def partition_bounds(month: date) -> str:
+    start = f"{month.isoformat()} 00:00:00+00"
+    end = f"{add_months(month, 1).isoformat()} 00:00:00+00"
+    return f"FROM ('{start}') TO ('{end}')"
+
+
+def create_partition_sql(month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} "
+        f"PARTITION OF {PARENT_TABLE} FOR VALUES {partition_bounds(month)}"
+    )
+
+
+def create_default_partition_sql() -> str:
+    return f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"
@@ -0,0 +1,118 @@
+"""Connection pool checkout metrics.
+
+`TimedQueuePool` measures how long each checkout waits for a connection;
+together with the pool's own counters this tells whether a process needs a
+bigger pool (waits grow while every connection is checked out) or whether
+the database is the bottleneck (waits stay flat, queries get slower).
+Each process labels its numbers with DB_POOL_ROLE, and long-running workers
+publish them to Redis so the API's /health/db shows all roles side by side.
+"""
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "analytics:db_pool"
+ROLES_KEY = f"{REDIS_KEY_PREFIX}:roles"
+# Checkout waits kept for the percentiles
+WAIT_SAMPLES = 1024
+
+
+class CheckoutStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total_seconds = 0.0
+        self.wait_max_seconds = 0.0
+        self.recent_waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    def record(self, waited: float, timed_out: bool) -> None:
+        if timed_out:
+            self.timeouts += 1
+        else:
+            self.checkouts += 1
+        self.wait_total_seconds += waited
+        self.wait_max_seconds = max(self.wait_max_seconds, waited)
+        self.recent_waits.append(waited)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records the time spent waiting for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = CheckoutStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.checkout_stats = self.checkout_stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.checkout_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.checkout_stats.record(time.perf_counter() - started, timed_out=False)
+        return connection
+
+
+def snapshot(pool: TimedQueuePool, role: str) -> Dict[str, Any]:
+    """Current pool usage and checkout wait statistics of this process."""
+    stats = pool.checkout_stats
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    checked_out = pool.checkedout()
+    waits = sorted(stats.recent_waits)
+
+    def wait_ms(q: float) -> float:
+        return round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000, 3) if waits else 0.0
+
+    total = stats.checkouts + stats.timeouts
+    return {
+        "role": role,
+        "pool_size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": checked_out,
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / capacity, 4) if capacity > 0 else None,
+        "checkouts": stats.checkouts,
+        "timeouts": stats.timeouts,
+        "wait_mean_ms": round(stats.wait_total_seconds / total * 1000, 3) if total else 0.0,
+        "wait_p95_ms": wait_ms(0.95),
+        "wait_p99_ms": wait_ms(0.99),
+        "wait_max_ms": round(stats.wait_max_seconds * 1000, 3),
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+async def publish_snapshot(pool_snapshot: Dict[str, Any], ttl_seconds: int) -> None:
+    """Stores this process's pool snapshot in Redis; it expires if the process stops reporting."""
+    redis_client = await get_redis()
+    key = f"{REDIS_KEY_PREFIX}:{pool_snapshot['role']}"
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hset(key, mapping={name: "" if value is None else str(value) for name, value in pool_snapshot.items()})
+        pipe.expire(key, ttl_seconds)
+        pipe.sadd(ROLES_KEY, pool_snapshot["role"])
+        await pipe.execute()
+
+
+async def read_snapshots() -> List[Dict[str, Any]]:
+    """Returns the latest published pool snapshot of every role."""
+    redis_client = await get_redis()
+    roles = sorted(await redis_client.smembers(ROLES_KEY))
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for role in roles:
+            pipe.hgetall(f"{REDIS_KEY_PREFIX}:{role}")
+        hashes = await pipe.execute()
+    return [{name: value or None for name, value in data.items()} for data in hashes if data]
@@ -0,0 +1,62 @@
+"""Staleness guard for the read replica.
+
+Reads are only sent to the replica while its replication lag is below
+REPLICA_MAX_LAG_SECONDS. The lag is measured on the replica itself and
+cached for REPLICA_LAG_CHECK_INTERVAL_SECONDS, so a request costs at most
+one extra round trip per interval, not per query. Any failure to measure
+counts as "too stale" and sends reads to the primary.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# 0 when the replica has replayed everything it received: on an idle primary
+# the last replay timestamp grows old although the replica is not behind
+LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class ReplicaLagGuard:
+    def __init__(self, engine: AsyncEngine, max_lag_seconds: float, check_interval_seconds: float):
+        self.engine = engine
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.lag_seconds: Optional[float] = None
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def _measure(self) -> Optional[float]:
+        try:
+            async with self.engine.connect() as conn:
+                return float(await conn.scalar(LAG_SQL))
+        except Exception as e:
+            logger.warning(f"Could not measure replica lag, reading from the primary: {e}")
+            return None
+
+    async def is_fresh(self) -> bool:
+        """Whether reads may go to the replica right now."""
+        if time.monotonic() - self._checked_at >= self.check_interval_seconds:
+            async with self._lock:
+                # Another request may have refreshed it while we waited
+                if time.monotonic() - self._checked_at >= self.check_interval_seconds:
+                    lag = await self._measure()
+                    if lag is not None and lag > self.max_lag_seconds and (
+                        self.lag_seconds is None or self.lag_seconds <= self.max_lag_seconds
+                    ):
+                        logger.warning(f"Replica lags {lag:.1f}s, reading from the primary")
+                    self.lag_seconds = lag
+                    self._checked_at = time.monotonic()
+        return self.lag_seconds is not None and self.lag_seconds <= self.max_lag_seconds
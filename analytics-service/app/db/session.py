@@ -1,15 +1,82 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from pydantic import PostgresDsn
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.pool_metrics import TimedQueuePool
+from app.db.replica import ReplicaLagGuard
+
+
+def _create_engine(url: PostgresDsn):
+    connect_args = {}
+    # asyncpg caches prepared statements per connection; 0 disables the
+    # cache, which is required behind PgBouncer in transaction mode
+    if url.scheme.endswith("+asyncpg"):
+        connect_args["prepared_statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+    return create_async_engine(
+        str(url),
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
 
-engine = create_async_engine(str(settings.DATABASE_URL), pool_pre_ping=True)
+
+# Primary: all writes (consumers, dashboards, reports) and fallback reads
+engine = _create_engine(settings.DATABASE_URL)
 AsyncSessionLocal = sessionmaker(
     bind=engine,
     class_=AsyncSession,
     expire_on_commit=False,
 )
 
+# Optional read replica for the heavy analytics reads
+replica_engine = _create_engine(settings.REPLICA_DATABASE_URL) if settings.REPLICA_DATABASE_URL else None
+ReplicaSessionLocal = sessionmaker(
+    bind=replica_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+) if replica_engine is not None else None
+replica_guard = ReplicaLagGuard(
+    replica_engine,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval_seconds=settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+) if replica_engine is not None else None
+
 async def get_db() -> AsyncSession:
     """Dependency to get DB session."""
     async with AsyncSessionLocal() as session:
-        yield session 
\ No newline at end of file
+        yield session
+
+@asynccontextmanager
+async def read_session() -> AsyncIterator[AsyncSession]:
+    """Session for read-only queries: the replica while it is fresh enough, otherwise the primary."""
+    if replica_guard is not None and await replica_guard.is_fresh():
+        async with ReplicaSessionLocal() as session:
+            session.info["replica"] = True
+            yield session
+    else:
+        async with AsyncSessionLocal() as session:
+            yield session
+
+def cache_ttl_for(session: AsyncSession) -> Optional[int]:
+    """TTL for cached results read through `session`.
+
+    The consumer invalidates the cache right after the primary commits; a
+    replica that has not replayed the change yet would put the old result
+    back, so replica results live no longer than the accepted lag.
+    None keeps the default TTL.
+    """
+    if session.info.get("replica"):
+        return max(1, int(settings.REPLICA_MAX_LAG_SECONDS))
+    return None
+
+async def get_read_db() -> AsyncSession:
+    """Dependency to get a DB session for read-only analytics queries."""
+    async with read_session() as session:
+        yield session
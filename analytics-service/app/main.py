@@ -6,6 +6,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.api_router import api_router
 from app.core.config import settings
 from app.core.messaging import connect_to_rabbitmq, close_rabbitmq_connection
+from app.core.cache import result_cache
+from app.core.redis import close_redis
 from app.db.session import engine
 
 # Импорты для sqladmin
@@ -98,6 +100,8 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 async def startup_event():
     logger.info("Starting up Analytics Service...")
     await connect_to_rabbitmq()
+    # Drop cached results when the consumer reports new data
+    await result_cache.start_invalidation_listener()
     # Add other startup logic here (e.g., connect to DB, Redis)
     # await connect_to_db()
     # await connect_to_redis()
@@ -107,6 +111,8 @@ async def startup_event():
 async def shutdown_event():
     logger.info("Shutting down Analytics Service...")
     await close_rabbitmq_connection()
+    await result_cache.stop_invalidation_listener()
+    await close_redis()
     # Add other shutdown logic here (e.g., disconnect from DB, Redis)
     # await disconnect_from_db()
     # await disconnect_from_redis()
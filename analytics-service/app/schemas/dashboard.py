@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 # Base schema for Dashboard
@@ -28,4 +28,23 @@ class Dashboard(DashboardBase):
     updated_at: datetime
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+# A widget inside Dashboard.configuration["widgets"]
+class WidgetConfig(BaseModel):
+    id: str
+    metric: str # Name in the dashboard metric registry, e.g. "tasks.by_status"
+    params: Dict[str, Any] = {}
+
+# Data of one widget in a rendered dashboard; `error` is set instead of `data` on failure
+class WidgetData(BaseModel):
+    id: str
+    metric: str
+    data: Optional[Any] = None
+    error: Optional[str] = None
+
+class DashboardRender(BaseModel):
+    dashboard_id: int
+    rendered_at: datetime
+    distinct_queries: int # Metric requests actually executed after deduplication
+    widgets: List[WidgetData]
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+# --- Schemas for Department Analytics API Responses ---
+
+class DepartmentStats(BaseModel):
+    company_id: int
+    department_id: int
+    created_tasks: int # Created within the period
+    completed_tasks: int # Completed within the period
+    throughput_per_day: float # completed_tasks / days in the period
+    backlog: int # Tasks currently not done or cancelled
+    average_cycle_time_hours: Optional[float] = None # Creation to done, for tasks completed within the period
+    throughput_rank: int # 1 = most completed tasks within the company
+    throughput_share: Optional[float] = None # Share of the company's completed tasks
+    backlog_share: Optional[float] = None # Share of the company's backlog
+
+class DepartmentComparisonResponse(BaseModel):
+    company_id: Optional[int] = None # None when all companies are compared
+    period_start: datetime
+    period_end: datetime
+    departments: List[DepartmentStats]
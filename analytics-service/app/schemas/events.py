@@ -1,10 +1,12 @@
-from pydantic import BaseModel, Field
-from typing import Optional, Any
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, Any, Dict
 from datetime import datetime
+from uuid import UUID
 
 # Base schema for any event payload
 class EventPayloadBase(BaseModel):
-    pass
+    # Unique per event; derived from the event content when the producer doesn't send one
+    event_id: Optional[UUID] = None
 
 # --- Task Service Events --- 
 
@@ -27,6 +29,15 @@ class TaskStatusChangedPayload(TaskBasePayload):
     # Optional: user_id who changed the status
     changed_by_user_id: Optional[int] = None 
 
+class TaskCompletedPayload(TaskBasePayload):
+    completed_at: Optional[datetime] = None # Timestamp from the event source
+
+class TaskEvaluatedPayload(TaskBasePayload):
+    evaluation_id: int
+    evaluator_user_id: Optional[int] = None
+    scores: Dict[str, Optional[float]] # e.g. {"timeliness": 4, "quality": 5, "completeness": 5}
+    evaluated_at: Optional[datetime] = None
+
 class TaskPriorityChangedPayload(TaskBasePayload):
     old_priority: str
     new_priority: str
@@ -37,6 +48,21 @@ class TaskAssigneeChangedPayload(TaskBasePayload):
     new_assignee_user_id: Optional[int]
     changed_at: datetime
 
+# --- User, Company and Calendar Service Events ---
+
+class EntityEventPayload(EventPayloadBase):
+    """Payload of user, company and calendar events.
+
+    Only the common dimensions are typed; everything else is kept as-is
+    and stored in AnalyticsData.metric_value.
+    """
+    model_config = ConfigDict(extra="allow")
+
+    company_id: Optional[int] = None
+    department_id: Optional[int] = None
+    user_id: Optional[int] = None
+    occurred_at: Optional[datetime] = None # Timestamp from the event source, if sent
+
 # --- User Service Events --- (Example structure)
 # class UserCreatedPayload(EventPayloadBase):
 #     user_id: int
@@ -50,4 +76,5 @@ class TaskAssigneeChangedPayload(TaskBasePayload):
 # Generic Event Structure (as received from RabbitMQ)
 class Event(BaseModel):
     event_type: str # e.g., "task_created", "user_registered"
+    event_id: Optional[UUID] = None # May be sent here instead of in the payload
     payload: Dict[str, Any] # We'll validate this payload against specific schemas 
\ No newline at end of file
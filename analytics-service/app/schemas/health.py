@@ -1,7 +1,51 @@
 from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
 
 class HealthResponse(BaseModel):
     status: str = "OK"
 
 class VersionResponse(BaseModel):
-    version: str 
\ No newline at end of file
+    version: str 
+
+class CacheStatsResponse(BaseModel):
+    local_hits: int
+    redis_hits: int
+    misses: int
+    invalidations: int
+    errors: int
+    local_entries: int
+    local_max_entries: int
+    hit_ratio: Optional[float] = None
+
+class ConsumerQueueMetrics(BaseModel):
+    queue: str
+    processed: int
+    failed: int
+    in_flight: int
+    rate_per_second: float
+    queue_depth: Optional[int] = None
+    last_message_age_seconds: Optional[float] = None
+    updated_at: datetime
+
+class ConsumerMetricsResponse(BaseModel):
+    queues: List[ConsumerQueueMetrics]
+
+class DbPoolMetrics(BaseModel):
+    role: str # DB_POOL_ROLE of the reporting process
+    pool_size: int
+    max_overflow: int
+    checked_out: int
+    idle: int
+    overflow: int
+    saturation: Optional[float] = None # checked_out / (pool_size + max_overflow)
+    checkouts: int
+    timeouts: int
+    wait_mean_ms: float
+    wait_p95_ms: float # Over the last checkouts
+    wait_p99_ms: float
+    wait_max_ms: float
+    updated_at: datetime
+
+class DbPoolMetricsResponse(BaseModel):
+    pools: List[DbPoolMetrics]
@@ -1,18 +1,20 @@
 from pydantic import BaseModel, Json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Literal
 from datetime import datetime
 
 # Base schema for Report
 class ReportBase(BaseModel):
     name: str
     type: str
+    # Supported parameters: start/end (ISO datetimes), format ("csv" or "parquet")
     parameters: Optional[Dict[str, Any]] = None
     requested_by_user_id: int
     company_id: Optional[int] = None
 
 # Schema for creating a Report request
 class ReportCreate(ReportBase):
-    pass
+    # Only these types can be generated; stored rows may carry older types
+    type: Literal["task_summary", "user_performance"]
 
 # Schema for updating a Report (e.g., status, result URL)
 class ReportUpdate(BaseModel):
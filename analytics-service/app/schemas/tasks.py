@@ -13,8 +13,12 @@ class TaskSummaryResponse(BaseModel):
     overdue_tasks: int # Need logic to determine this
 
 class TaskCompletionTimeStats(BaseModel):
+    completed_tasks: int = 0
     average_completion_time_hours: Optional[float] = None
     median_completion_time_hours: Optional[float] = None
-    # Could add stats by priority, type etc.
+    # Percentiles from the completion time sketches (within 1% relative error)
+    p50_completion_time_hours: Optional[float] = None
+    p90_completion_time_hours: Optional[float] = None
+    p99_completion_time_hours: Optional[float] = None
 
 # Potentially add more response schemas for other task endpoints 
\ No newline at end of file
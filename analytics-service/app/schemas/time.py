@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+from datetime import datetime
+
+# --- Schemas for Time Analytics API Responses ---
+
+Granularity = Literal["hour", "day", "week"]
+
+class ActivityPoint(BaseModel):
+    bucket_start: datetime
+    created: int
+    completed: int
+    transitions: int
+
+class WorkloadPoint(BaseModel):
+    bucket_start: datetime
+    created: int
+    completed: int
+    net_change: int # created - completed within the bucket
+    cumulative_change: int # running backlog change since the start of the period
+
+class TimeWorkloadResponse(BaseModel):
+    granularity: Granularity
+    company_id: int
+    department_id: Optional[int] = None
+    user_id: Optional[int] = None
+    points: List[WorkloadPoint]
+
+class TimeTrendsResponse(BaseModel):
+    granularity: Granularity
+    company_id: int
+    department_id: Optional[int] = None
+    user_id: Optional[int] = None
+    points: List[ActivityPoint]
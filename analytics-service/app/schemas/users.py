@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+from datetime import datetime
+
+LeaderboardMetric = Literal["completed", "evaluation"]
+LeaderboardPeriod = Literal["week", "month", "all"]
+
+class TopPerformer(BaseModel):
+    rank: int
+    user_id: int
+    score: float
+
+class TopPerformersResponse(BaseModel):
+    metric: LeaderboardMetric
+    period: LeaderboardPeriod
+    period_start: Optional[datetime] = None # None for the all-time board
+    company_id: int
+    department_id: Optional[int] = None
+    performers: List[TopPerformer]
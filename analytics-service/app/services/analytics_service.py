@@ -1,59 +1,304 @@
 import logging
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, distinct
-from sqlalchemy.sql.expression import literal_column
-from sqlalchemy.dialects.postgresql import JSONB
-from typing import Dict, Optional
+from sqlalchemy import select, func, distinct, delete, case
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from typing import Any, Dict, List, Optional, Union
 from datetime import datetime
 
 from app.db.models.analytics_data import AnalyticsData
-from app.schemas.events import TaskCreatedPayload, TaskStatusChangedPayload
+from app.db.models.task_current_state import TaskCurrentState
+from app.schemas.events import EntityEventPayload, TaskCreatedPayload, TaskStatusChangedPayload
+from app.services import completion_time_service, rollup_service
 
 logger = logging.getLogger(__name__)
 
+# --- Task state snapshot ---
+
+def _task_state_upsert(values: Union[Dict[str, Any], List[Dict[str, Any]]]):
+    """Builds an upsert into task_current_state.
+
+    Events may arrive out of order, so the status/dimension columns are only
+    overwritten by an event that is not older than the stored one, while
+    priority and creation time are filled in whenever they are known.
+    """
+    stmt = pg_insert(TaskCurrentState).values(values)
+    excluded = stmt.excluded
+    is_newer = excluded.status_changed_at >= TaskCurrentState.status_changed_at
+
+    def newer_or_current(column_name: str):
+        return case(
+            (is_newer, getattr(excluded, column_name)),
+            else_=getattr(TaskCurrentState, column_name),
+        )
+
+    return stmt.on_conflict_do_update(
+        index_elements=[TaskCurrentState.task_id],
+        set_={
+            "status": newer_or_current("status"),
+            "status_changed_at": newer_or_current("status_changed_at"),
+            "company_id": newer_or_current("company_id"),
+            "department_id": newer_or_current("department_id"),
+            "user_id": newer_or_current("user_id"),
+            "priority": func.coalesce(excluded.priority, TaskCurrentState.priority),
+            "task_created_at": func.coalesce(TaskCurrentState.task_created_at, excluded.task_created_at),
+            "updated_at": func.now(),
+        },
+    )
+
+async def rebuild_task_current_state(db: AsyncSession) -> int:
+    """Rebuilds task_current_state from the existing 'task_lifecycle' rows.
+
+    Runs as a single transaction: the snapshot is emptied and refilled from
+    the latest lifecycle event of every task. Returns the number of tasks.
+    """
+    status_expr = AnalyticsData.status
+    priority_expr = AnalyticsData.priority
+
+    # Latest lifecycle event per task (DISTINCT ON)
+    latest = (
+        select(
+            AnalyticsData.task_id,
+            AnalyticsData.company_id,
+            AnalyticsData.department_id,
+            AnalyticsData.user_id,
+            status_expr.label("status"),
+            AnalyticsData.timestamp.label("status_changed_at"),
+        )
+        .where(AnalyticsData.metric_key == "task_lifecycle")
+        .where(AnalyticsData.task_id.isnot(None))
+        .where(status_expr.isnot(None))
+        .distinct(AnalyticsData.task_id)
+        .order_by(AnalyticsData.task_id, AnalyticsData.timestamp.desc(), AnalyticsData.id.desc())
+        .subquery("latest")
+    )
+    # Creation details live only in the 'created' event
+    created = (
+        select(
+            AnalyticsData.task_id,
+            func.max(priority_expr).label("priority"),
+            func.min(AnalyticsData.timestamp).label("task_created_at"),
+        )
+        .where(AnalyticsData.metric_key == "task_lifecycle")
+        .where(status_expr == "created")
+        .group_by(AnalyticsData.task_id)
+        .subquery("created")
+    )
+    source = (
+        select(
+            latest.c.task_id,
+            latest.c.company_id,
+            latest.c.department_id,
+            latest.c.user_id,
+            latest.c.status,
+            created.c.priority,
+            created.c.task_created_at,
+            latest.c.status_changed_at,
+        )
+        .select_from(latest.outerjoin(created, created.c.task_id == latest.c.task_id))
+    )
+
+    try:
+        await db.execute(delete(TaskCurrentState))
+        result = await db.execute(
+            pg_insert(TaskCurrentState).from_select(
+                [
+                    "task_id", "company_id", "department_id", "user_id",
+                    "status", "priority", "task_created_at", "status_changed_at",
+                ],
+                source,
+            )
+        )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    logger.info(f"Rebuilt task_current_state for {result.rowcount} tasks")
+    return result.rowcount
+
+# --- Event handlers ---
+
+TaskLifecyclePayload = Union[TaskCreatedPayload, TaskStatusChangedPayload]
+
+def _lifecycle_row(payload: TaskLifecyclePayload) -> Dict[str, Any]:
+    """Maps a task event payload to an AnalyticsData row."""
+    if isinstance(payload, TaskCreatedPayload):
+        status, previous_status, priority = "created", None, payload.priority
+        metric_value = {"title": payload.title}
+        timestamp = payload.created_at
+    else:
+        status, previous_status, priority = payload.new_status, payload.old_status, None
+        metric_value = {}
+        timestamp = payload.changed_at
+    return {
+        "event_id": payload.event_id,
+        "metric_key": "task_lifecycle",
+        "metric_value": metric_value,  # Extra attributes only
+        "status": status,
+        "previous_status": previous_status,
+        "priority": priority,
+        "timestamp": timestamp,  # Use timestamp from the event
+        "task_id": payload.task_id,
+        "company_id": payload.company_id,
+        "department_id": payload.department_id,
+        "user_id": payload.assignee_user_id,  # Current assignee
+    }
+
+def _task_state(payload: TaskLifecyclePayload) -> Dict[str, Any]:
+    """Maps a task event payload to a task_current_state row."""
+    is_creation = isinstance(payload, TaskCreatedPayload)
+    changed_at = payload.created_at if is_creation else payload.changed_at
+    return {
+        "task_id": payload.task_id,
+        "status": "created" if is_creation else payload.new_status,
+        "status_changed_at": changed_at,
+        "company_id": payload.company_id,
+        "department_id": payload.department_id,
+        "user_id": payload.assignee_user_id,
+        "priority": payload.priority if is_creation else None,
+        "task_created_at": changed_at if is_creation else None,
+    }
+
+def _collapse_task_states(states: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merges several snapshot rows of the same task into one.
+
+    A single INSERT .. ON CONFLICT DO UPDATE cannot touch the same row twice,
+    so the batch is reduced in memory with the same rules as the upsert.
+    """
+    merged: Dict[int, Dict[str, Any]] = {}
+    for state in sorted(states, key=lambda s: s["status_changed_at"]):
+        current = merged.get(state["task_id"])
+        if current is None:
+            merged[state["task_id"]] = dict(state)
+            continue
+        priority = state["priority"] or current["priority"]
+        task_created_at = current["task_created_at"] or state["task_created_at"]
+        current.update(state)
+        current["priority"] = priority
+        current["task_created_at"] = task_created_at
+    return list(merged.values())
+
+async def _store_task_events(db: AsyncSession, payloads: List[TaskLifecyclePayload]) -> List[TaskLifecyclePayload]:
+    """Inserts the lifecycle rows and applies the derived updates, without committing.
+
+    The rows are inserted with ON CONFLICT DO NOTHING on the event id, and
+    the snapshot, rollups and completion time sketches are updated only
+    for the rows that were actually inserted, so redelivered events are not
+    counted twice, even when both copies arrive in the same batch.
+    Returns the payloads that were new.
+    """
+    # A redelivered event can arrive twice within one batch; RETURNING yields
+    # its id only once, so the copies are dropped before the insert
+    unique_payloads: List[TaskLifecyclePayload] = []
+    seen_ids = set()
+    for p in payloads:
+        if p.event_id is not None:
+            if p.event_id in seen_ids:
+                continue
+            seen_ids.add(p.event_id)
+        unique_payloads.append(p)
+    payloads = unique_payloads
+    result = await db.execute(
+        pg_insert(AnalyticsData)
+        .values([_lifecycle_row(p) for p in payloads])
+        .on_conflict_do_nothing(index_elements=[AnalyticsData.event_id, AnalyticsData.timestamp])
+        .returning(AnalyticsData.event_id)
+    )
+    inserted_ids = set(result.scalars().all())
+    new_payloads = [p for p in payloads if p.event_id is None or p.event_id in inserted_ids]
+    if new_payloads:
+        await db.execute(_task_state_upsert(_collapse_task_states([_task_state(p) for p in new_payloads])))
+        await rollup_service.apply_rollup_deltas(db, rollup_service.collect_rollup_deltas(new_payloads))
+        # Reads creation times from the snapshot updated above
+        await completion_time_service.apply_completion_times(db, new_payloads)
+    return new_payloads
+
+async def ingest_task_events(db: AsyncSession, payloads: List[TaskLifecyclePayload]) -> int:
+    """Stores a batch of task lifecycle events in one transaction.
+
+    Writes all AnalyticsData rows with a single multi-row INSERT and updates
+    the task_current_state snapshot and the activity rollups with one
+    upsert each. Duplicate events are skipped. Raises on failure
+    so the caller can decide what to do with the source messages.
+    Returns the number of new events.
+    """
+    if not payloads:
+        return 0
+    try:
+        new_payloads = await _store_task_events(db, payloads)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    logger.info(
+        f"Saved batch of {len(new_payloads)} task lifecycle events "
+        f"({len(payloads) - len(new_payloads)} duplicates skipped)"
+    )
+    return len(new_payloads)
+
 async def handle_task_creation(db: AsyncSession, payload: TaskCreatedPayload) -> None:
-    """Handles the 'task_created' event."""
+    """Handles the 'task_created' event. Raises on failure so the consumer can retry it."""
     logger.info(f"Processing task_created event for task_id: {payload.task_id}")
     try:
         # Create an entry in AnalyticsData to mark task creation
-        analytics_entry = AnalyticsData(
-            metric_key="task_lifecycle",
-            metric_value={"status": "created", "title": payload.title, "priority": payload.priority},
-            timestamp=payload.created_at, # Use timestamp from the event
-            task_id=payload.task_id,
-            company_id=payload.company_id,
-            department_id=payload.department_id,
-            user_id=payload.assignee_user_id # Initially assigned user
-        )
-        db.add(analytics_entry)
+        stored = await _store_task_events(db, [payload])
         await db.commit()
-        logger.info(f"Saved 'created' status for task_id: {payload.task_id}")
     except Exception as e:
         await db.rollback()
         logger.error(f"Error handling task_created event for task {payload.task_id}: {e}", exc_info=True)
+        raise
+    if stored:
+        logger.info(f"Saved 'created' status for task_id: {payload.task_id}")
+    else:
+        logger.info(f"Skipped duplicate task_created event {payload.event_id} for task_id: {payload.task_id}")
 
 async def handle_task_status_change(db: AsyncSession, payload: TaskStatusChangedPayload) -> None:
-    """Handles the 'task_status_changed' event."""
+    """Handles the 'task_status_changed' event. Raises on failure so the consumer can retry it."""
     logger.info(f"Processing task_status_changed event for task_id: {payload.task_id}")
     try:
         # Create an entry in AnalyticsData to record the status change
-        analytics_entry = AnalyticsData(
-            metric_key="task_lifecycle",
-            metric_value={"status": payload.new_status, "previous_status": payload.old_status},
-            timestamp=payload.changed_at, # Use timestamp from the event
-            task_id=payload.task_id,
-            company_id=payload.company_id,
-            department_id=payload.department_id,
-            user_id=payload.assignee_user_id # Current assignee
-            # Consider adding changed_by_user_id if available/needed
-        )
-        db.add(analytics_entry)
+        stored = await _store_task_events(db, [payload])
         await db.commit()
-        logger.info(f"Saved '{payload.new_status}' status for task_id: {payload.task_id}")
-
     except Exception as e:
         await db.rollback()
         logger.error(f"Error handling task_status_changed event for task {payload.task_id}: {e}", exc_info=True)
+        raise
+    if stored:
+        logger.info(f"Saved '{payload.new_status}' status for task_id: {payload.task_id}")
+    else:
+        logger.info(f"Skipped duplicate task_status_changed event {payload.event_id} for task_id: {payload.task_id}")
+
+async def record_entity_event(db: AsyncSession, event_type: str, payload: EntityEventPayload) -> None:
+    """Stores a user, company or calendar event as a generic AnalyticsData row.
+
+    The event type becomes the metric key. Duplicates are only detected for
+    events that carry `occurred_at`: without it the row gets the insertion
+    time, which differs between deliveries. Raises on failure so the
+    consumer can reject the message.
+    """
+    extras = payload.model_dump(
+        mode="json", exclude={"event_id", "company_id", "department_id", "user_id", "occurred_at"}
+    )
+    row = {
+        "event_id": payload.event_id,
+        "metric_key": event_type,
+        "metric_value": extras,
+        "company_id": payload.company_id,
+        "department_id": payload.department_id,
+        "user_id": payload.user_id,
+    }
+    if payload.occurred_at is not None:
+        row["timestamp"] = payload.occurred_at
+    try:
+        await db.execute(
+            pg_insert(AnalyticsData)
+            .values(row)
+            .on_conflict_do_nothing(index_elements=[AnalyticsData.event_id, AnalyticsData.timestamp])
+        )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    logger.debug(f"Saved {event_type} event for company_id: {payload.company_id}")
 
 # Add handlers for other events (priority changed, assignee changed, etc.) as needed
 # async def handle_task_priority_change(...)
@@ -63,53 +308,22 @@ async def handle_task_status_change(db: AsyncSession, payload: TaskStatusChanged
 
 async def get_task_counts_by_status(db: AsyncSession, company_id: Optional[int] = None) -> Dict[str, int]:
     """Calculates the count of tasks for each current status.
-    
-    This query finds the latest 'task_lifecycle' event for each task_id 
-    and counts tasks based on the status in that latest event.
-    NOTE: This can be inefficient on large datasets. Consider a snapshot table.
+
+    Reads the task_current_state snapshot, which is kept up to date by the
+    event handlers, so this is a single indexed GROUP BY.
     """
     logger.info(f"Calculating task counts by status for company_id: {company_id}")
 
-    # Subquery to find the latest timestamp for each task_id with metric_key='task_lifecycle'
-    latest_event_subq = (
-        select(
-            AnalyticsData.task_id,
-            func.max(AnalyticsData.timestamp).label("max_timestamp")
-        )
-        .where(AnalyticsData.metric_key == "task_lifecycle")
-        .group_by(AnalyticsData.task_id)
-        .alias("latest_event")
-    )
-
-    # Main query to join AnalyticsData with the subquery to get the latest event details
-    query = (
-        select(
-            # Use ->> to extract JSON text field. Adjust based on your JSON structure
-            # Ensure metric_value has a 'status' key
-            AnalyticsData.metric_value.op('->>')(literal_column("'status'")).label("current_status"),
-            func.count(distinct(AnalyticsData.task_id)).label("status_count")
-        )
-        .join(
-            latest_event_subq,
-            (AnalyticsData.task_id == latest_event_subq.c.task_id) &
-            (AnalyticsData.timestamp == latest_event_subq.c.max_timestamp)
-        )
-        .where(AnalyticsData.metric_key == "task_lifecycle")
+    query = select(
+        TaskCurrentState.status,
+        func.count().label("status_count")
     )
-
-    # Apply company filter if provided
     if company_id is not None:
-        query = query.where(AnalyticsData.company_id == company_id)
-
-    # Group by the extracted status
-    query = query.group_by(literal_column("current_status"))
+        query = query.where(TaskCurrentState.company_id == company_id)
+    query = query.group_by(TaskCurrentState.status)
 
-    try:
-        result = await db.execute(query)
-        status_counts = {row.current_status: row.status_count for row in result.all()}
-        logger.info(f"Task counts by status calculated: {status_counts}")
-        # Filter out null statuses if they appear (e.g., from events before status was added)
-        return {k: v for k, v in status_counts.items() if k is not None}
-    except Exception as e:
-        logger.error(f"Error calculating task counts by status: {e}", exc_info=True)
-        return {} 
\ No newline at end of file
+    # Errors propagate: an empty result would be cached as a real answer
+    result = await db.execute(query)
+    status_counts = {row.status: row.status_count for row in result.all()}
+    logger.info(f"Task counts by status calculated: {status_counts}")
+    return status_counts
@@ -0,0 +1,78 @@
+"""Synthesizes task lifecycle rows from task-service's tables.
+
+Kept free of I/O so the backfill worker can call it on plain records
+fetched from the task-service database.
+"""
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from app.core.dedup import EVENT_ID_NAMESPACE
+
+# Column order of the records passed to COPY
+COPY_COLUMNS = (
+    "event_id", "metric_key", "metric_value", "status", "previous_status", "priority",
+    "timestamp", "company_id", "department_id", "user_id", "task_id",
+)
+
+
+def normalize_enum(value: Optional[str]) -> Optional[str]:
+    """Maps task-service enum values to the lowercase values used in events.
+
+    task-service stores enum names ("IN_PROGRESS") in its columns and
+    str(TaskStatus.DONE) ("TaskStatus.DONE") in task_history.
+    """
+    if value is None:
+        return None
+    return value.rsplit(".", 1)[-1].lower()
+
+
+def backfill_event_id(table: str, row_id: int, kind: str = "") -> uuid.UUID:
+    """Stable id per source row, so re-running the backfill inserts nothing twice."""
+    return uuid.uuid5(EVENT_ID_NAMESPACE, f"task-service:{table}:{row_id}:{kind}")
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
+def lifecycle_records(
+    tasks: Sequence[Mapping[str, Any]],
+    status_history: Sequence[Mapping[str, Any]],
+    since: Optional[datetime] = None,
+) -> List[Tuple]:
+    """Builds COPY records for a batch of tasks and their status history.
+
+    Every task yields a 'created' row and every status change a transition
+    row, like the task_created / task_status_changed events do. The task's
+    current department and assignee are used for all of its rows, since the
+    history doesn't record them per change. Rows before `since` are skipped.
+    """
+    by_id: Dict[int, Mapping[str, Any]] = {task["id"]: task for task in tasks}
+    records: List[Tuple] = []
+
+    def add(event_id, status, previous_status, priority, timestamp, metric_value, task):
+        timestamp = _utc(timestamp)
+        if since is not None and timestamp < since:
+            return
+        records.append((
+            event_id, "task_lifecycle", json.dumps(metric_value), status, previous_status, priority,
+            timestamp, task["company_id"], task["department_id"], task["assignee_user_id"], task["id"],
+        ))
+
+    for task in tasks:
+        add(
+            backfill_event_id("tasks", task["id"], "created"), "created", None,
+            normalize_enum(task["priority"]), task["created_at"], {"title": task["title"]}, task,
+        )
+    for change in status_history:
+        task = by_id.get(change["task_id"])
+        if task is None:
+            continue
+        add(
+            backfill_event_id("task_history", change["id"]),
+            normalize_enum(change["new_value"]), normalize_enum(change["old_value"]), None,
+            change["changed_at"], {}, task,
+        )
+    return records
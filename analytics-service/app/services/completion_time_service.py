@@ -0,0 +1,204 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import select, delete, func, and_, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.sketch import DDSketch
+from app.db.models.analytics_data import AnalyticsData
+from app.db.models.completion_time_sketch import CompletionTimeSketch
+from app.db.models.task_current_state import TaskCurrentState
+from app.schemas.events import TaskCreatedPayload, TaskStatusChangedPayload
+from app.services.rollup_service import COMPLETED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Relative error of the reported percentiles
+SKETCH_ACCURACY = 0.01
+# Key values for unknown department / priority (the key columns are NOT NULL)
+NO_DEPARTMENT = 0
+NO_PRIORITY = ""
+
+# (company_id, department_id, priority)
+SketchKey = Tuple[int, int, str]
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
+def _sketch_key(company_id: int, department_id: Optional[int], priority: Optional[str]) -> SketchKey:
+    return company_id, department_id or NO_DEPARTMENT, priority or NO_PRIORITY
+
+
+async def _add_to_sketches(db: AsyncSession, additions: Dict[SketchKey, List[float]]) -> None:
+    """Adds completion times to the stored sketches. Does not commit.
+
+    Missing rows are created first, then all affected rows are locked in key
+    order, so concurrent consumers merge into the sketches one after another
+    instead of overwriting each other.
+    """
+    keys = sorted(additions)
+    empty = DDSketch(SKETCH_ACCURACY).to_dict()
+    await db.execute(
+        pg_insert(CompletionTimeSketch)
+        .values([
+            {"company_id": c, "department_id": d, "priority": p, "sketch": empty, "count": 0}
+            for c, d, p in keys
+        ])
+        .on_conflict_do_nothing(constraint="uq_completion_time_sketches_key")
+    )
+    key_columns = (CompletionTimeSketch.company_id, CompletionTimeSketch.department_id, CompletionTimeSketch.priority)
+    result = await db.execute(
+        select(CompletionTimeSketch)
+        .where(tuple_(*key_columns).in_(keys))
+        .order_by(*key_columns)
+        .with_for_update()
+    )
+    for row in result.scalars().all():
+        sketch = DDSketch.from_dict(row.sketch)
+        for hours in additions[(row.company_id, row.department_id, row.priority)]:
+            sketch.add(hours)
+        row.sketch = sketch.to_dict()
+        row.count = sketch.count
+
+
+async def apply_completion_times(
+    db: AsyncSession,
+    payloads: Iterable[Union[TaskCreatedPayload, TaskStatusChangedPayload]],
+) -> int:
+    """Feeds the created -> done durations of the given events into the sketches.
+
+    Creation time and priority come from task_current_state, so this must
+    run after the snapshot upsert of the same batch. Completions of tasks
+    whose creation wasn't seen are skipped. Does not commit. Returns the
+    number of durations added.
+    """
+    completions = [
+        p for p in payloads
+        if isinstance(p, TaskStatusChangedPayload)
+        and p.company_id is not None
+        and p.new_status in COMPLETED_STATUSES
+        and p.old_status not in COMPLETED_STATUSES
+    ]
+    if not completions:
+        return 0
+
+    result = await db.execute(
+        select(
+            TaskCurrentState.task_id,
+            TaskCurrentState.department_id,
+            TaskCurrentState.priority,
+            TaskCurrentState.task_created_at,
+        ).where(TaskCurrentState.task_id.in_({p.task_id for p in completions}))
+    )
+    states = {row.task_id: row for row in result.all()}
+
+    additions: Dict[SketchKey, List[float]] = defaultdict(list)
+    for payload in completions:
+        state = states.get(payload.task_id)
+        if state is None or state.task_created_at is None:
+            logger.debug(f"No creation time for task {payload.task_id}, completion time not recorded")
+            continue
+        hours = (_utc(payload.changed_at) - _utc(state.task_created_at)).total_seconds() / 3600
+        department_id = payload.department_id if payload.department_id is not None else state.department_id
+        additions[_sketch_key(payload.company_id, department_id, state.priority)].append(hours)
+
+    if additions:
+        await _add_to_sketches(db, additions)
+    return sum(len(values) for values in additions.values())
+
+
+async def get_completion_time_stats(
+    db: AsyncSession,
+    company_id: Optional[int] = None,
+    department_id: Optional[int] = None,
+    priority: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Returns count, average and p50/p90/p99 completion time in hours.
+
+    Merges the matching stored sketches; no event history is read.
+    """
+    query = select(CompletionTimeSketch.sketch)
+    if company_id is not None:
+        query = query.where(CompletionTimeSketch.company_id == company_id)
+    if department_id is not None:
+        query = query.where(CompletionTimeSketch.department_id == department_id)
+    if priority is not None:
+        query = query.where(CompletionTimeSketch.priority == priority)
+    result = await db.execute(query)
+
+    merged = DDSketch(SKETCH_ACCURACY)
+    for data in result.scalars().all():
+        merged.merge(DDSketch.from_dict(data))
+
+    def hours(value: Optional[float]) -> Optional[float]:
+        return round(value, 2) if value is not None else None
+
+    p50 = merged.quantile(0.5)
+    return {
+        "completed_tasks": merged.count,
+        "average_completion_time_hours": hours(merged.sum / merged.count) if merged.count else None,
+        "median_completion_time_hours": hours(p50),
+        "p50_completion_time_hours": hours(p50),
+        "p90_completion_time_hours": hours(merged.quantile(0.9)),
+        "p99_completion_time_hours": hours(merged.quantile(0.99)),
+    }
+
+
+async def rebuild_completion_sketches(db: AsyncSession, chunk_rows: int = 10000) -> int:
+    """Recomputes all sketches from the lifecycle history in one transaction.
+
+    Creation times come from task_current_state, so rebuild the snapshot
+    first. Returns the number of durations added.
+    """
+    hours = func.extract("epoch", AnalyticsData.timestamp - TaskCurrentState.task_created_at) / 3600
+    query = (
+        select(
+            AnalyticsData.company_id,
+            func.coalesce(AnalyticsData.department_id, TaskCurrentState.department_id).label("department_id"),
+            TaskCurrentState.priority,
+            hours.label("hours"),
+        )
+        .join(TaskCurrentState, TaskCurrentState.task_id == AnalyticsData.task_id)
+        .where(
+            AnalyticsData.metric_key == "task_lifecycle",
+            AnalyticsData.company_id.isnot(None),
+            TaskCurrentState.task_created_at.isnot(None),
+            and_(
+                AnalyticsData.status.in_(COMPLETED_STATUSES),
+                func.coalesce(AnalyticsData.previous_status, "").notin_(COMPLETED_STATUSES),
+            ),
+        )
+    )
+
+    sketches: Dict[SketchKey, DDSketch] = {}
+    total = 0
+    try:
+        await db.execute(delete(CompletionTimeSketch))
+        result = await db.stream(query.execution_options(yield_per=chunk_rows))
+        async for row in result:
+            key = _sketch_key(row.company_id, row.department_id, row.priority)
+            if key not in sketches:
+                sketches[key] = DDSketch(SKETCH_ACCURACY)
+            sketches[key].add(float(row.hours))
+            total += 1
+        if sketches:
+            await db.execute(
+                pg_insert(CompletionTimeSketch).values([
+                    {
+                        "company_id": c, "department_id": d, "priority": p,
+                        "sketch": sketch.to_dict(), "count": sketch.count,
+                    }
+                    for (c, d, p), sketch in sketches.items()
+                ])
+            )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    logger.info(f"Rebuilt {len(sketches)} completion time sketches from {total} completions")
+    return total
@@ -0,0 +1,207 @@
+"""Renders all widgets of a custom dashboard in one request.
+
+Widgets are read from `Dashboard.configuration["widgets"]` as
+{"id": ..., "metric": ..., "params": {...}}. Each metric is looked up in
+METRICS, its params are validated, identical (metric, params) requests are
+collapsed and the remaining distinct queries run concurrently, each on its
+own session and therefore its own pooled connection.
+"""
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from pydantic_core import to_jsonable_python
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import result_cache
+from app.core.config import settings
+from app.db.session import read_session, cache_ttl_for
+from app.schemas.dashboard import WidgetConfig
+from app.schemas.time import Granularity
+from app.schemas.users import LeaderboardMetric, LeaderboardPeriod
+from app.services import (
+    analytics_service, completion_time_service, department_service, leaderboard_service, rollup_service
+)
+
+logger = logging.getLogger(__name__)
+
+
+# --- Metric parameters (unknown keys are rejected so typos don't silently widen a query) ---
+
+class MetricParams(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+class CompanyParams(MetricParams):
+    company_id: Optional[int] = None
+
+class CompletionTimeParams(CompanyParams):
+    department_id: Optional[int] = None
+    priority: Optional[str] = None
+
+class ActivityParams(MetricParams):
+    company_id: int
+    department_id: Optional[int] = None
+    user_id: Optional[int] = None
+    granularity: Granularity = "day"
+    days: int = Field(30, ge=1, le=366)
+
+class DepartmentsParams(CompanyParams):
+    days: int = Field(30, ge=1, le=366)
+
+class TopPerformersParams(MetricParams):
+    company_id: int
+    department_id: Optional[int] = None
+    metric: LeaderboardMetric = "completed"
+    period: LeaderboardPeriod = "month"
+    limit: int = Field(10, ge=1, le=settings.LEADERBOARD_MAX_LIMIT)
+
+
+# --- Metric loaders ---
+
+async def _tasks_by_status(db: AsyncSession, params: CompanyParams) -> Any:
+    return {"status_counts": await analytics_service.get_task_counts_by_status(db, params.company_id)}
+
+async def _completion_time(db: AsyncSession, params: CompletionTimeParams) -> Any:
+    return await completion_time_service.get_completion_time_stats(
+        db, company_id=params.company_id, department_id=params.department_id, priority=params.priority
+    )
+
+async def _activity(db: AsyncSession, params: ActivityParams) -> Any:
+    start, end = department_service.period_bounds(params.days)
+    return await rollup_service.get_activity_series(
+        db,
+        company_id=params.company_id,
+        granularity=params.granularity,
+        start=start,
+        end=end,
+        department_id=params.department_id,
+        user_id=params.user_id,
+    )
+
+async def _departments(db: AsyncSession, params: DepartmentsParams) -> Any:
+    start, end = department_service.period_bounds(params.days)
+    return await department_service.get_department_stats(db, params.company_id, start, end)
+
+async def _top_performers(db: AsyncSession, params: TopPerformersParams) -> Any:
+    period_start, entries = await leaderboard_service.get_top_performers(
+        db,
+        company_id=params.company_id,
+        department_id=params.department_id,
+        metric=params.metric,
+        period=params.period,
+        limit=params.limit,
+    )
+    return {
+        "period_start": period_start,
+        "performers": [
+            {"rank": rank, "user_id": user_id, "score": score}
+            for rank, (user_id, score) in enumerate(entries, start=1)
+        ],
+    }
+
+
+@dataclass(frozen=True)
+class Metric:
+    params: Type[MetricParams]
+    load: Callable[[AsyncSession, Any], Awaitable[Any]]
+
+
+# Metrics a widget can show; names follow the result cache endpoint names
+METRICS: Dict[str, Metric] = {
+    "tasks.by_status": Metric(CompanyParams, _tasks_by_status),
+    "tasks.completion_time": Metric(CompletionTimeParams, _completion_time),
+    "time.activity": Metric(ActivityParams, _activity),
+    "departments.comparison": Metric(DepartmentsParams, _departments),
+    "users.top_performers": Metric(TopPerformersParams, _top_performers),
+}
+
+# (metric name, canonical params JSON)
+QueryKey = Tuple[str, str]
+
+
+def parse_widgets(configuration: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Returns the raw widget list of a dashboard configuration."""
+    widgets = (configuration or {}).get("widgets", [])
+    if not isinstance(widgets, list):
+        raise ValueError("configuration.widgets must be a list")
+    if len(widgets) > settings.DASHBOARD_MAX_WIDGETS:
+        raise ValueError(f"A dashboard can have at most {settings.DASHBOARD_MAX_WIDGETS} widgets")
+    return widgets
+
+
+def plan_queries(
+    widgets: List[Dict[str, Any]],
+) -> Tuple[List[Tuple[WidgetConfig, Optional[QueryKey], Optional[str]]], Dict[QueryKey, MetricParams]]:
+    """Validates widgets and collapses identical metric requests.
+
+    Returns every widget with its query key (or an error) and the distinct
+    queries to run.
+    """
+    planned = []
+    queries: Dict[QueryKey, MetricParams] = {}
+    for index, raw in enumerate(widgets):
+        try:
+            widget = WidgetConfig.model_validate(raw)
+        except ValidationError:
+            planned.append((WidgetConfig(id=str(index), metric=""), None, "invalid widget configuration"))
+            continue
+        metric = METRICS.get(widget.metric)
+        if metric is None:
+            planned.append((widget, None, f"unknown metric: {widget.metric}"))
+            continue
+        try:
+            params = metric.params.model_validate(widget.params)
+        except ValidationError as e:
+            planned.append((widget, None, f"invalid params: {e.error_count()} error(s)"))
+            continue
+        key = (widget.metric, json.dumps(params.model_dump(mode="json"), sort_keys=True))
+        queries.setdefault(key, params)
+        planned.append((widget, key, None))
+    return planned, queries
+
+
+async def _run_query(key: QueryKey, params: MetricParams, semaphore: asyncio.Semaphore) -> Any:
+    name, _ = key
+    metric = METRICS[name]
+
+    company_id = getattr(params, "company_id", None)
+    # A session per query: concurrent queries can't share one connection; reads may use the replica.
+    # The session only checks out a connection on the first query, i.e. on a cache miss
+    async with read_session() as db:
+        async def load():
+            async with semaphore:
+                return to_jsonable_python(await metric.load(db, params))
+
+        return await result_cache.get_or_load(
+            f"widgets.{name}", company_id, params.model_dump(mode="json"), load, ttl_seconds=cache_ttl_for(db)
+        )
+
+
+async def render_widgets(configuration: Optional[Dict[str, Any]]) -> Tuple[int, List[Dict[str, Any]]]:
+    """Computes the data of every widget. Returns the number of distinct queries and the widgets.
+
+    A failing metric only fails its own widgets.
+    """
+    planned, queries = plan_queries(parse_widgets(configuration))
+    semaphore = asyncio.Semaphore(settings.DASHBOARD_RENDER_CONCURRENCY)
+    keys = list(queries)
+    outcomes = await asyncio.gather(
+        *(_run_query(key, queries[key], semaphore) for key in keys), return_exceptions=True
+    )
+    results = dict(zip(keys, outcomes))
+
+    widgets = []
+    for widget, key, error in planned:
+        item = {"id": widget.id, "metric": widget.metric, "data": None, "error": error}
+        if key is not None:
+            outcome = results[key]
+            if isinstance(outcome, Exception):
+                logger.error(f"Widget metric {key[0]} failed: {outcome}", exc_info=outcome)
+                item["error"] = "failed to load metric"
+            else:
+                item["data"] = outcome
+        widgets.append(item)
+    return len(keys), widgets
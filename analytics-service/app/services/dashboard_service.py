@@ -1,7 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+from app.core.pagination import paginate
 from app.db.models.dashboard import Dashboard
 from app.schemas.dashboard import DashboardCreate, DashboardUpdate
 
@@ -19,15 +20,18 @@ async def get_dashboard(db: AsyncSession, dashboard_id: int) -> Optional[Dashboa
     result = await db.execute(select(Dashboard).filter(Dashboard.id == dashboard_id))
     return result.scalars().first()
 
-async def get_dashboards_by_owner(db: AsyncSession, owner_id: int, skip: int = 0, limit: int = 100) -> List[Dashboard]:
-    """Gets a list of dashboards for a specific owner."""
-    result = await db.execute(
-        select(Dashboard)
-        .filter(Dashboard.owner_id == owner_id)
-        .offset(skip)
-        .limit(limit)
+async def get_dashboards_by_owner(
+    db: AsyncSession, owner_id: int, cursor: Optional[str] = None, limit: int = 100
+) -> Tuple[List[Dashboard], Optional[str]]:
+    """Gets a page of an owner's dashboards, most recently updated first, and the next page cursor."""
+    return await paginate(
+        db,
+        select(Dashboard).filter(Dashboard.owner_id == owner_id),
+        Dashboard.updated_at,
+        Dashboard.id,
+        cursor,
+        limit,
     )
-    return result.scalars().all()
 
 async def update_dashboard(db: AsyncSession, db_dashboard: Dashboard, dashboard_in: DashboardUpdate) -> Dashboard:
     """Updates an existing dashboard."""
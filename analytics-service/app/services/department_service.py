@@ -0,0 +1,124 @@
+import logging
+from datetime import datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, func, and_, Float
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.task_activity_rollup import TaskActivityRollup
+from app.db.models.task_current_state import TaskCurrentState
+from app.services.rollup_service import COMPLETED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Statuses that take a task out of the backlog
+CLOSED_STATUSES = COMPLETED_STATUSES + ("cancelled",)
+
+
+def period_bounds(days: int, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """Returns the last `days` whole UTC days, today included, as a half-open range."""
+    today = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).date()
+    end = datetime.combine(today + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    return end - timedelta(days=days), end
+
+
+def build_department_stats_query(company_id: Optional[int], start: datetime, end: datetime):
+    """Builds the single statement behind the department comparison.
+
+    Backlog and cycle time come from the task_current_state snapshot
+    (index-only scan of ix_task_current_state_company_department_status),
+    created/completed counts from the daily department rollups (range scan
+    of uq_task_activity_rollups_bucket). The two aggregates are joined per
+    department and the company-wide ranks and shares are computed with
+    window functions, so all departments cost one round trip.
+    """
+    state = TaskCurrentState
+    is_completed_in_period = and_(
+        state.status.in_(COMPLETED_STATUSES),
+        state.status_changed_at >= start,
+        state.status_changed_at < end,
+        state.task_created_at.isnot(None),
+    )
+    snapshot_query = (
+        select(
+            state.company_id,
+            state.department_id,
+            func.count().filter(state.status.notin_(CLOSED_STATUSES)).label("backlog"),
+            func.avg(
+                func.extract("epoch", state.status_changed_at - state.task_created_at) / 3600
+            ).filter(is_completed_in_period).label("avg_cycle_hours"),
+        )
+        .where(state.company_id.isnot(None), state.department_id.isnot(None))
+        .group_by(state.company_id, state.department_id)
+    )
+
+    rollup = TaskActivityRollup
+    flow_query = (
+        select(
+            rollup.company_id,
+            rollup.scope_id.label("department_id"),
+            func.sum(rollup.created_count).label("created"),
+            func.sum(rollup.completed_count).label("completed"),
+        )
+        .where(
+            rollup.scope == "department",
+            rollup.granularity == "day",
+            rollup.bucket_start >= start,
+            rollup.bucket_start < end,
+        )
+        .group_by(rollup.company_id, rollup.scope_id)
+    )
+    if company_id is not None:
+        snapshot_query = snapshot_query.where(state.company_id == company_id)
+        flow_query = flow_query.where(rollup.company_id == company_id)
+    snapshot = snapshot_query.cte("snapshot")
+    flow = flow_query.cte("flow")
+
+    joined = snapshot.join(
+        flow,
+        and_(snapshot.c.company_id == flow.c.company_id, snapshot.c.department_id == flow.c.department_id),
+        full=True,
+    )
+    company = func.coalesce(snapshot.c.company_id, flow.c.company_id)
+    created = func.coalesce(flow.c.created, 0)
+    completed = func.coalesce(flow.c.completed, 0)
+    backlog = func.coalesce(snapshot.c.backlog, 0)
+    per_company = {"partition_by": company}
+    return (
+        select(
+            company.label("company_id"),
+            func.coalesce(snapshot.c.department_id, flow.c.department_id).label("department_id"),
+            created.label("created"),
+            completed.label("completed"),
+            backlog.label("backlog"),
+            snapshot.c.avg_cycle_hours,
+            func.rank().over(partition_by=company, order_by=completed.desc()).label("throughput_rank"),
+            (completed.cast(Float) / func.nullif(func.sum(completed).over(**per_company), 0)).label("throughput_share"),
+            (backlog.cast(Float) / func.nullif(func.sum(backlog).over(**per_company), 0)).label("backlog_share"),
+        )
+        .select_from(joined)
+        .order_by(company, "throughput_rank", "department_id")
+    )
+
+
+async def get_department_stats(
+    db: AsyncSession, company_id: Optional[int], start: datetime, end: datetime
+) -> List[Dict[str, Any]]:
+    """Throughput, backlog and average cycle time of every department in one query."""
+    days = max((end - start).total_seconds() / 86400, 1)
+    result = await db.execute(build_department_stats_query(company_id, start, end))
+    return [
+        {
+            "company_id": row.company_id,
+            "department_id": row.department_id,
+            "created_tasks": int(row.created),
+            "completed_tasks": int(row.completed),
+            "throughput_per_day": round(row.completed / days, 3),
+            "backlog": int(row.backlog),
+            "average_cycle_time_hours": round(float(row.avg_cycle_hours), 2) if row.avg_cycle_hours is not None else None,
+            "throughput_rank": row.throughput_rank,
+            "throughput_share": round(row.throughput_share, 4) if row.throughput_share is not None else None,
+            "backlog_share": round(row.backlog_share, 4) if row.backlog_share is not None else None,
+        }
+        for row in result.all()
+    ]
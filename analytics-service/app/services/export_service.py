@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Optional, Sequence
+
+from sqlalchemy import select
+
+from app.db.models.analytics_data import AnalyticsData
+from app.db.session import AsyncSessionLocal
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+EXPORT_COLUMNS = (
+    "id", "metric_key", "metric_value", "status", "previous_status", "priority",
+    "timestamp", "company_id", "department_id", "user_id", "task_id", "event_id",
+)
+
+
+def _encode_ndjson(rows: Sequence) -> bytes:
+    lines = [json.dumps(dict(row._mapping), default=str) for row in rows]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _encode_csv(rows: Sequence, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        values = list(row)
+        values[2] = json.dumps(values[2])  # metric_value
+        writer.writerow(values)
+    return buffer.getvalue().encode()
+
+
+async def stream_analytics_data(
+    *,
+    output_format: str,
+    chunk_rows: int,
+    company_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    metric_key: Optional[str] = None,
+) -> AsyncIterator[bytes]:
+    """Yields AnalyticsData rows encoded as NDJSON or CSV, one chunk per fetch.
+
+    Rows are read through a server-side cursor (`yield_per`), so memory use
+    is bounded by `chunk_rows` regardless of the result size. The generator
+    owns its session: it outlives the request handler while the response
+    is being streamed.
+    """
+    query = select(*(getattr(AnalyticsData, column) for column in EXPORT_COLUMNS))
+    if company_id is not None:
+        query = query.where(AnalyticsData.company_id == company_id)
+    if metric_key is not None:
+        query = query.where(AnalyticsData.metric_key == metric_key)
+    # Time bounds let PostgreSQL prune the monthly partitions
+    if start is not None:
+        query = query.where(AnalyticsData.timestamp >= start)
+    if end is not None:
+        query = query.where(AnalyticsData.timestamp < end)
+    query = query.order_by(AnalyticsData.timestamp, AnalyticsData.id)
+
+    first_chunk = True
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=chunk_rows))
+        async for partition in result.partitions():
+            if output_format == "csv":
+                yield _encode_csv(partition, header=first_chunk)
+            else:
+                yield _encode_ndjson(partition)
+            first_chunk = False
+    if first_chunk and output_format == "csv":
+        yield _encode_csv([], header=True)
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compresses a byte stream into gzip format on the fly."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)  # gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
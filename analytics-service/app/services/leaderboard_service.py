@@ -0,0 +1,269 @@
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.leaderboard import LocalLeaderboard
+from app.core.redis import get_redis
+from app.db.models.analytics_data import AnalyticsData
+from app.db.models.task_current_state import TaskCurrentState
+from app.schemas.events import TaskCompletedPayload, TaskEvaluatedPayload
+from app.services.rollup_service import bucket_start
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("completed", "evaluation")
+PERIODS = ("week", "month", "all")
+# AnalyticsData.metric_key of the events behind each leaderboard metric
+METRIC_KEYS = {"completed": "task_completed", "evaluation": "task_evaluated"}
+REDIS_KEY_PREFIX = "analytics:leaderboard"
+
+LeaderboardPayload = Union[TaskCompletedPayload, TaskEvaluatedPayload]
+
+# Boards loaded from the database when Redis is unavailable: key -> (expires_at, board)
+_local_boards: Dict[str, Tuple[float, LocalLeaderboard]] = {}
+
+
+def period_start(ts: datetime, period: str) -> Optional[datetime]:
+    """Start of the UTC period containing `ts`; None for the all-time board."""
+    if period == "all":
+        return None
+    if period == "week":
+        return bucket_start(ts, "week")
+    if period == "month":
+        return bucket_start(ts, "day").replace(day=1)
+    raise ValueError(f"Unknown period: {period}")
+
+
+def _period_end(start: datetime, period: str) -> datetime:
+    if period == "week":
+        return start + timedelta(weeks=1)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def board_key(metric: str, company_id: int, department_id: Optional[int], period: str, start: Optional[datetime]) -> str:
+    scope = "company" if department_id is None else f"department:{department_id}"
+    bucket = "all" if start is None else start.strftime("%Y-%m-%d")
+    return f"{REDIS_KEY_PREFIX}:{metric}:{company_id}:{scope}:{period}:{bucket}"
+
+
+def _evaluation_score(payload: TaskEvaluatedPayload) -> Optional[float]:
+    scores = [score for score in payload.scores.values() if score is not None]
+    return sum(scores) / len(scores) if scores else None
+
+
+async def _increment_boards(
+    metric: str, company_id: int, department_id: Optional[int], user_id: int, amount: float, ts: datetime
+) -> None:
+    redis_client = await get_redis()
+    async with redis_client.pipeline(transaction=True) as pipe:
+        for period in PERIODS:
+            start = period_start(ts, period)
+            for scope_department_id in {None, department_id}:
+                key = board_key(metric, company_id, scope_department_id, period, start)
+                pipe.zincrby(key, amount, str(user_id))
+                if start is not None:
+                    pipe.expire(key, timedelta(days=settings.LEADERBOARD_RETENTION_DAYS))
+        await pipe.execute()
+
+
+async def record_leaderboard_event(
+    db: AsyncSession, event_type: str, payload: LeaderboardPayload, received_at: Optional[datetime] = None
+) -> bool:
+    """Stores a task_completed / task_evaluated event and adds it to the leaderboards.
+
+    The AnalyticsData row is inserted with ON CONFLICT DO NOTHING on
+    (event_id, timestamp). When the payload carries no completed_at /
+    evaluated_at, the timestamp falls back to `received_at` (the AMQP
+    timestamp, which stays the same on redelivery) and an existing row with
+    the same event id is looked up first, so a redelivery is never counted
+    again. The boards are incremented only after the commit; an increment
+    lost to a Redis error is restored by `rebuild_leaderboards`.
+    Returns False for a duplicate. Raises on database failure.
+    """
+    if isinstance(payload, TaskCompletedPayload):
+        metric, amount, ts = "completed", 1.0, payload.completed_at
+        metric_value = {}
+    else:
+        metric, amount, ts = "evaluation", _evaluation_score(payload), payload.evaluated_at
+        metric_value = {
+            "evaluation_id": payload.evaluation_id,
+            "evaluator_user_id": payload.evaluator_user_id,
+            "scores": payload.scores,
+            "score": amount,
+        }
+    derived_ts = ts is None
+    if derived_ts:
+        ts = received_at or datetime.now(timezone.utc)
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+
+    try:
+        department_id = payload.department_id
+        if department_id is None:
+            department_id = await db.scalar(
+                select(TaskCurrentState.department_id).where(TaskCurrentState.task_id == payload.task_id)
+            )
+        inserted = False
+        already_stored = derived_ts and payload.event_id is not None and await db.scalar(
+            select(AnalyticsData.id).where(AnalyticsData.event_id == payload.event_id).limit(1)
+        ) is not None
+        if not already_stored:
+            result = await db.execute(
+                pg_insert(AnalyticsData)
+                .values(
+                    event_id=payload.event_id,
+                    metric_key=METRIC_KEYS[metric],
+                    metric_value=metric_value,
+                    timestamp=ts,
+                    task_id=payload.task_id,
+                    company_id=payload.company_id,
+                    department_id=department_id,
+                    user_id=payload.assignee_user_id,
+                )
+                .on_conflict_do_nothing(index_elements=[AnalyticsData.event_id, AnalyticsData.timestamp])
+                .returning(AnalyticsData.id)
+            )
+            inserted = result.first() is not None
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    if not inserted:
+        logger.info(f"Skipped duplicate {event_type} event {payload.event_id} for task_id: {payload.task_id}")
+        return False
+    if (
+        settings.LEADERBOARD_REDIS_ENABLED and amount
+        and payload.company_id is not None and payload.assignee_user_id is not None
+    ):
+        try:
+            await _increment_boards(metric, payload.company_id, department_id, payload.assignee_user_id, amount, ts)
+        except Exception as e:
+            # The event is committed: retrying would count it twice
+            logger.error(
+                f"Failed to update leaderboards for {event_type} event {payload.event_id}, "
+                f"run rebuild_leaderboards to restore them: {e}"
+            )
+    return True
+
+
+def _score_expression(metric: str):
+    if metric == "completed":
+        return func.count()
+    return func.sum(AnalyticsData.metric_value["score"].as_float())
+
+
+async def _load_board(
+    db: AsyncSession, metric: str, company_id: int, department_id: Optional[int], period: str, start: Optional[datetime]
+) -> LocalLeaderboard:
+    """Aggregates one board from AnalyticsData (fallback path)."""
+    query = (
+        select(AnalyticsData.user_id, _score_expression(metric).label("score"))
+        .where(
+            AnalyticsData.metric_key == METRIC_KEYS[metric],
+            AnalyticsData.company_id == company_id,
+            AnalyticsData.user_id.isnot(None),
+        )
+        .group_by(AnalyticsData.user_id)
+    )
+    if department_id is not None:
+        query = query.where(AnalyticsData.department_id == department_id)
+    if start is not None:
+        query = query.where(AnalyticsData.timestamp >= start, AnalyticsData.timestamp < _period_end(start, period))
+    result = await db.execute(query)
+
+    board = LocalLeaderboard()
+    for row in result.all():
+        if row.score:
+            board.increment(row.user_id, float(row.score))
+    return board
+
+
+async def get_top_performers(
+    db: AsyncSession,
+    *,
+    company_id: int,
+    metric: str,
+    period: str,
+    limit: int,
+    department_id: Optional[int] = None,
+) -> Tuple[Optional[datetime], List[Tuple[int, float]]]:
+    """Returns the period start and the top `limit` (user_id, score) pairs.
+
+    Reads the Redis sorted set (O(log N + K)). If Redis is disabled or
+    unavailable, the board is aggregated from the database once and kept
+    in process memory for CACHE_TTL_SECONDS.
+    """
+    start = period_start(datetime.now(timezone.utc), period)
+    key = board_key(metric, company_id, department_id, period, start)
+
+    if settings.LEADERBOARD_REDIS_ENABLED:
+        try:
+            redis_client = await get_redis()
+            entries = await redis_client.zrevrange(key, 0, limit - 1, withscores=True)
+            return start, [(int(member), score) for member, score in entries]
+        except Exception as e:
+            logger.warning(f"Reading leaderboard {key} from Redis failed, using local fallback: {e}")
+
+    cached = _local_boards.get(key)
+    if cached is None or cached[0] < time.monotonic():
+        board = await _load_board(db, metric, company_id, department_id, period, start)
+        _local_boards[key] = (time.monotonic() + settings.CACHE_TTL_SECONDS, board)
+    else:
+        board = cached[1]
+    return start, board.top(limit)
+
+
+async def rebuild_leaderboards(db: AsyncSession) -> int:
+    """Rewrites the current week, month and all-time boards in Redis from AnalyticsData.
+
+    Returns the number of boards written.
+    """
+    now = datetime.now(timezone.utc)
+    redis_client = await get_redis()
+    written = 0
+    for metric in METRICS:
+        for period in PERIODS:
+            start = period_start(now, period)
+            query = (
+                select(
+                    AnalyticsData.company_id,
+                    AnalyticsData.department_id,
+                    AnalyticsData.user_id,
+                    _score_expression(metric).label("score"),
+                )
+                .where(
+                    AnalyticsData.metric_key == METRIC_KEYS[metric],
+                    AnalyticsData.company_id.isnot(None),
+                    AnalyticsData.user_id.isnot(None),
+                )
+                .group_by(AnalyticsData.company_id, AnalyticsData.department_id, AnalyticsData.user_id)
+            )
+            if start is not None:
+                query = query.where(AnalyticsData.timestamp >= start)
+            result = await db.execute(query)
+
+            boards: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+            for row in result.all():
+                if not row.score:
+                    continue
+                for scope_department_id in {None, row.department_id}:
+                    key = board_key(metric, row.company_id, scope_department_id, period, start)
+                    boards[key][str(row.user_id)] += float(row.score)
+
+            async with redis_client.pipeline(transaction=True) as pipe:
+                for key, scores in boards.items():
+                    pipe.delete(key)
+                    pipe.zadd(key, scores)
+                    if start is not None:
+                        pipe.expire(key, timedelta(days=settings.LEADERBOARD_RETENTION_DAYS))
+                await pipe.execute()
+            written += len(boards)
+    logger.info(f"Rebuilt {written} leaderboards")
+    return written
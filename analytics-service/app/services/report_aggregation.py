@@ -0,0 +1,96 @@
+"""CPU-bound report aggregation, executed in worker processes.
+
+Kept free of database and settings imports so child processes of the report
+worker's process pool start quickly and only receive plain tuples.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# (task_id, department_id, user_id, status, previous_status, timestamp)
+LifecycleRow = Tuple[int, Optional[int], Optional[int], Optional[str], Optional[str], Any]
+
+COMPLETED_STATUSES = ("done",)
+CLOSED_STATUSES = ("done", "cancelled")
+
+# Additive counters per group; partial results of chunks are summed
+COUNTERS = ("created", "completed", "transitions", "cycle_time_hours_sum", "cycle_time_count", "open_tasks")
+
+REPORT_GROUP_BY = {
+    "task_summary": ("department_id", 1),
+    "user_performance": ("user_id", 2),
+}
+
+
+def aggregate_chunk(report_type: str, rows: Sequence[LifecycleRow]) -> Dict[Optional[int], Dict[str, float]]:
+    """Aggregates lifecycle rows of complete tasks into per-group counters.
+
+    Rows must be ordered by task_id, timestamp and a chunk must contain all
+    rows of each of its tasks, so cycle times can be computed locally.
+    """
+    _, group_index = REPORT_GROUP_BY[report_type]
+    groups: Dict[Optional[int], Dict[str, float]] = {}
+
+    def group(row: LifecycleRow) -> Dict[str, float]:
+        key = row[group_index]
+        if key not in groups:
+            groups[key] = dict.fromkeys(COUNTERS, 0)
+        return groups[key]
+
+    current_task = None
+    created_at = None
+    last_row: Optional[LifecycleRow] = None
+    for row in rows:
+        task_id, _, _, status, previous_status, timestamp = row
+        if task_id != current_task:
+            if last_row is not None and last_row[3] not in CLOSED_STATUSES:
+                group(last_row)["open_tasks"] += 1
+            current_task, created_at = task_id, None
+
+        counters = group(row)
+        if status == "created":
+            counters["created"] += 1
+            created_at = timestamp
+        else:
+            counters["transitions"] += 1
+            if status in COMPLETED_STATUSES and previous_status not in COMPLETED_STATUSES:
+                counters["completed"] += 1
+                if created_at is not None:
+                    counters["cycle_time_hours_sum"] += (timestamp - created_at).total_seconds() / 3600
+                    counters["cycle_time_count"] += 1
+        last_row = row
+
+    if last_row is not None and last_row[3] not in CLOSED_STATUSES:
+        group(last_row)["open_tasks"] += 1
+    return groups
+
+
+def merge_partials(
+    total: Dict[Optional[int], Dict[str, float]],
+    partial: Dict[Optional[int], Dict[str, float]],
+) -> None:
+    """Adds the counters of `partial` into `total` in place."""
+    for key, counters in partial.items():
+        target = total.setdefault(key, dict.fromkeys(COUNTERS, 0))
+        for name, value in counters.items():
+            target[name] += value
+
+
+def finalize(report_type: str, totals: Dict[Optional[int], Dict[str, float]]) -> Tuple[List[str], List[List[Any]]]:
+    """Turns merged counters into output columns and rows."""
+    group_column, _ = REPORT_GROUP_BY[report_type]
+    columns = [group_column, "created", "completed", "transitions", "open_tasks", "avg_cycle_time_hours"]
+    rows = []
+    for key in sorted(totals, key=lambda k: (k is None, k)):
+        counters = totals[key]
+        avg_cycle = (
+            round(counters["cycle_time_hours_sum"] / counters["cycle_time_count"], 2)
+            if counters["cycle_time_count"] else None
+        )
+        rows.append([
+            key,
+            int(counters["created"]),
+            int(counters["completed"]),
+            int(counters["transitions"]),
+            int(counters["open_tasks"]),
+            avg_cycle,
+        ])
+    return columns, rows
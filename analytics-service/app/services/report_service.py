@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.pagination import paginate
+from app.db.models.report import Report
+from app.schemas.report import ReportCreate
+
+REPORT_TYPES = ("task_summary", "user_performance")
+REPORT_FORMATS = ("csv", "parquet")
+
+
+async def create_report(db: AsyncSession, report_in: ReportCreate) -> Report:
+    """Creates a pending report request; the report worker picks it up."""
+    db_report = Report(**report_in.model_dump(), status="pending")
+    db.add(db_report)
+    await db.commit()
+    await db.refresh(db_report)
+    return db_report
+
+async def get_report(db: AsyncSession, report_id: int) -> Optional[Report]:
+    """Gets a specific report by its ID."""
+    result = await db.execute(select(Report).filter(Report.id == report_id))
+    return result.scalars().first()
+
+async def get_reports_by_requester(
+    db: AsyncSession, user_id: int, cursor: Optional[str] = None, limit: int = 100
+) -> Tuple[List[Report], Optional[str]]:
+    """Gets a page of the reports requested by a user, newest first, and the next page cursor."""
+    return await paginate(
+        db,
+        select(Report).filter(Report.requested_by_user_id == user_id),
+        Report.requested_at,
+        Report.id,
+        cursor,
+        limit,
+    )
+
+async def release_stale_claims(db: AsyncSession, timeout: timedelta) -> int:
+    """Returns reports stuck in "processing" longer than `timeout` to "pending".
+
+    A worker that crashes or restarts mid-report leaves its claim behind;
+    this lets any worker pick the report up again.
+    """
+    result = await db.execute(
+        update(Report)
+        .where(Report.status == "processing", Report.claimed_at < datetime.now(timezone.utc) - timeout)
+        .values(status="pending", claimed_at=None)
+    )
+    await db.commit()
+    return result.rowcount
+
+async def claim_next_report(db: AsyncSession) -> Optional[Report]:
+    """Marks the oldest pending report as processing and returns it (None if there is none).
+
+    One report per transaction, with FOR UPDATE SKIP LOCKED, so several
+    workers never claim the same report and none holds reports it isn't
+    working on yet.
+    """
+    result = await db.execute(
+        select(Report)
+        .filter(Report.status == "pending")
+        .order_by(Report.requested_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    report = result.scalars().first()
+    if report is not None:
+        report.status = "processing"
+        report.claimed_at = datetime.now(timezone.utc)
+    await db.commit()
+    return report
+
+async def mark_report_completed(db: AsyncSession, report: Report, result_url: str) -> Report:
+    report.status = "completed"
+    report.result_url = result_url
+    report.error_message = None
+    report.completed_at = datetime.now(timezone.utc)
+    await db.commit()
+    return report
+
+async def mark_report_failed(db: AsyncSession, report: Report, error_message: str) -> Report:
+    report.status = "failed"
+    report.error_message = error_message
+    report.completed_at = datetime.now(timezone.utc)
+    await db.commit()
+    return report
@@ -0,0 +1,226 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import select, func, delete, literal, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.analytics_data import AnalyticsData
+from app.db.models.task_activity_rollup import TaskActivityRollup
+from app.schemas.events import TaskCreatedPayload, TaskStatusChangedPayload
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("hour", "day", "week")
+SCOPES = ("company", "department", "user")
+# Statuses that count as a completed task (see task-service TaskStatus)
+COMPLETED_STATUSES = ("done",)
+
+# (company_id, scope, scope_id, granularity, bucket_start)
+RollupKey = Tuple[int, str, int, str, datetime]
+# [created, completed, transitions]
+RollupDeltas = Dict[RollupKey, List[int]]
+
+_BUCKET_STEP = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    """Truncates a timestamp to the start of its UTC bucket (weeks start on Monday)."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    ts = ts.astimezone(timezone.utc)
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def collect_rollup_deltas(
+    payloads: Iterable[Union[TaskCreatedPayload, TaskStatusChangedPayload]],
+) -> RollupDeltas:
+    """Turns task events into counter increments for every affected bucket."""
+    deltas: RollupDeltas = defaultdict(lambda: [0, 0, 0])
+    for payload in payloads:
+        if payload.company_id is None:
+            continue
+        if isinstance(payload, TaskCreatedPayload):
+            ts, increment = payload.created_at, (1, 0, 0)
+        else:
+            completed = int(
+                payload.new_status in COMPLETED_STATUSES and payload.old_status not in COMPLETED_STATUSES
+            )
+            ts, increment = payload.changed_at, (0, completed, 1)
+
+        scope_ids = (
+            ("company", payload.company_id),
+            ("department", payload.department_id),
+            ("user", payload.assignee_user_id),
+        )
+        for granularity in GRANULARITIES:
+            bucket = bucket_start(ts, granularity)
+            for scope, scope_id in scope_ids:
+                if scope_id is None:
+                    continue
+                counters = deltas[(payload.company_id, scope, scope_id, granularity, bucket)]
+                for i, value in enumerate(increment):
+                    counters[i] += value
+    return deltas
+
+
+async def apply_rollup_deltas(db: AsyncSession, deltas: RollupDeltas) -> None:
+    """Adds the increments to the buckets with a single upsert. Does not commit."""
+    if not deltas:
+        return
+    values = [
+        {
+            "company_id": company_id,
+            "scope": scope,
+            "scope_id": scope_id,
+            "granularity": granularity,
+            "bucket_start": bucket,
+            "created_count": created,
+            "completed_count": completed,
+            "transition_count": transitions,
+        }
+        for (company_id, scope, scope_id, granularity, bucket), (created, completed, transitions)
+        in deltas.items()
+    ]
+    stmt = pg_insert(TaskActivityRollup).values(values)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_task_activity_rollups_bucket",
+        set_={
+            "created_count": TaskActivityRollup.created_count + stmt.excluded.created_count,
+            "completed_count": TaskActivityRollup.completed_count + stmt.excluded.completed_count,
+            "transition_count": TaskActivityRollup.transition_count + stmt.excluded.transition_count,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+async def get_activity_series(
+    db: AsyncSession,
+    *,
+    company_id: int,
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    department_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> List[Dict]:
+    """Reads the buckets of one scope in [start, end), filling gaps with zeros.
+
+    Only rollup rows are touched, so the cost is proportional to the number
+    of buckets in the range, not to the number of raw events.
+    """
+    if user_id is not None:
+        scope, scope_id = "user", user_id
+    elif department_id is not None:
+        scope, scope_id = "department", department_id
+    else:
+        scope, scope_id = "company", company_id
+
+    first_bucket = bucket_start(start, granularity)
+    query = (
+        select(
+            TaskActivityRollup.bucket_start,
+            TaskActivityRollup.created_count,
+            TaskActivityRollup.completed_count,
+            TaskActivityRollup.transition_count,
+        )
+        .where(
+            TaskActivityRollup.company_id == company_id,
+            TaskActivityRollup.scope == scope,
+            TaskActivityRollup.scope_id == scope_id,
+            TaskActivityRollup.granularity == granularity,
+            TaskActivityRollup.bucket_start >= first_bucket,
+            TaskActivityRollup.bucket_start < end,
+        )
+        .order_by(TaskActivityRollup.bucket_start)
+    )
+    result = await db.execute(query)
+    stored = {row.bucket_start: row for row in result.all()}
+
+    series = []
+    step = _BUCKET_STEP[granularity]
+    bucket = first_bucket
+    while bucket < end:
+        row = stored.get(bucket)
+        series.append({
+            "bucket_start": bucket,
+            "created": row.created_count if row else 0,
+            "completed": row.completed_count if row else 0,
+            "transitions": row.transition_count if row else 0,
+        })
+        bucket += step
+    return series
+
+
+async def rebuild_rollups(db: AsyncSession) -> int:
+    """Recomputes all buckets from the 'task_lifecycle' rows in one transaction.
+
+    Returns the number of bucket rows written.
+    """
+    status_expr = AnalyticsData.status
+    previous_status_expr = AnalyticsData.previous_status
+    is_created = status_expr == "created"
+    is_completed = and_(
+        status_expr.in_(COMPLETED_STATUSES),
+        func.coalesce(previous_status_expr, "").notin_(COMPLETED_STATUSES),
+    )
+    scope_columns = {
+        "company": AnalyticsData.company_id,
+        "department": AnalyticsData.department_id,
+        "user": AnalyticsData.user_id,
+    }
+    target_columns = [
+        "granularity", "bucket_start", "scope", "scope_id", "company_id",
+        "created_count", "completed_count", "transition_count",
+    ]
+
+    total = 0
+    try:
+        await db.execute(delete(TaskActivityRollup))
+        for granularity in GRANULARITIES:
+            # Truncate in UTC to match bucket_start() used by the consumer
+            bucket = func.timezone(
+                "UTC", func.date_trunc(granularity, func.timezone("UTC", AnalyticsData.timestamp))
+            )
+            for scope in SCOPES:
+                scope_column = scope_columns[scope]
+                source = (
+                    select(
+                        literal(granularity),
+                        bucket,
+                        literal(scope),
+                        scope_column,
+                        AnalyticsData.company_id,
+                        func.count().filter(is_created),
+                        func.count().filter(is_completed),
+                        func.count().filter(~is_created),
+                    )
+                    .where(AnalyticsData.metric_key == "task_lifecycle")
+                    .where(AnalyticsData.company_id.isnot(None))
+                    .where(scope_column.isnot(None))
+                    .group_by(bucket, scope_column, AnalyticsData.company_id)
+                )
+                result = await db.execute(
+                    pg_insert(TaskActivityRollup).from_select(target_columns, source)
+                )
+                total += result.rowcount
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    logger.info(f"Rebuilt task activity rollups: {total} buckets")
+    return total
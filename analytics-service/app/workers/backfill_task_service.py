@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.db import partitions
+from app.db.session import AsyncSessionLocal, engine
+from app.services import analytics_service, backfill_service, completion_time_service, rollup_service
+from app.workers.partition_maintenance import ensure_future_partitions
+
+logger = logging.getLogger(__name__)
+
+STAGING_TABLE = "analytics_data_backfill"
+
+# Keyset pagination over the shard's tasks
+TASKS_SQL = """
+    SELECT id, title, company_id, department_id, assignee_user_id, priority::text AS priority, created_at
+    FROM tasks
+    WHERE company_id % $1 = $2 AND id > $3
+    ORDER BY id
+    LIMIT $4
+"""
+STATUS_HISTORY_SQL = """
+    SELECT id, task_id, old_value, new_value, changed_at
+    FROM task_history
+    WHERE task_id = ANY($1::int[]) AND field_changed = 'status'
+    ORDER BY task_id, changed_at, id
+"""
+STAGING_DDL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE}
+    (LIKE analytics_data INCLUDING DEFAULTS) ON COMMIT DELETE ROWS
+"""
+_columns = ", ".join(backfill_service.COPY_COLUMNS)
+MERGE_SQL = f"""
+    INSERT INTO analytics_data ({_columns})
+    SELECT {_columns} FROM {STAGING_TABLE}
+    ON CONFLICT (event_id, timestamp) DO NOTHING
+"""
+
+
+def _asyncpg_dsn(url) -> str:
+    """asyncpg wants a plain postgresql:// URL without the SQLAlchemy driver suffix."""
+    return make_url(str(url)).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class Progress:
+    """Counters shared by all shards."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.tasks = 0
+        self.rows = 0
+        self.inserted = 0
+
+    def log(self, final: bool = False) -> None:
+        elapsed = time.monotonic() - self.started
+        rate = self.rows / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"{'Finished' if final else 'Progress'}: {self.tasks} tasks, {self.rows} rows "
+            f"({self.inserted} new) in {elapsed:.0f}s, {rate:.0f} rows/s"
+        )
+
+
+async def _report_progress(progress: Progress, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        progress.log()
+
+
+async def backfill_shard(
+    shard: int,
+    shards: int,
+    source_dsn: str,
+    target_dsn: str,
+    batch_size: int,
+    since: datetime,
+    replace: bool,
+    progress: Progress,
+) -> None:
+    """Copies the lifecycle of all tasks with company_id % shards == shard.
+
+    Each batch is COPYed into a temporary staging table and merged with
+    ON CONFLICT DO NOTHING in its own short transaction.
+    """
+    source = await asyncpg.connect(source_dsn)
+    target = await asyncpg.connect(target_dsn)
+    try:
+        await target.execute(STAGING_DDL)
+        last_id = 0
+        while True:
+            tasks = await source.fetch(TASKS_SQL, shards, shard, last_id, batch_size)
+            if not tasks:
+                break
+            last_id = tasks[-1]["id"]
+            task_ids = [task["id"] for task in tasks]
+            history = await source.fetch(STATUS_HISTORY_SQL, task_ids)
+            records = backfill_service.lifecycle_records(tasks, history, since)
+
+            async with target.transaction():
+                if replace:
+                    # Live events carry other event ids than the backfill, drop them first
+                    await target.execute(
+                        "DELETE FROM analytics_data WHERE metric_key = 'task_lifecycle' AND task_id = ANY($1::int[])",
+                        task_ids,
+                    )
+                if records:
+                    await target.copy_records_to_table(
+                        STAGING_TABLE, records=records, columns=list(backfill_service.COPY_COLUMNS)
+                    )
+                    status = await target.execute(MERGE_SQL)
+                    progress.inserted += int(status.split()[-1])
+
+            progress.tasks += len(tasks)
+            progress.rows += len(records)
+        logger.info(f"Shard {shard}/{shards} done")
+    finally:
+        await source.close()
+        await target.close()
+
+
+async def rebuild_derived() -> None:
+    """Recomputes the snapshot, rollups and completion time sketches from analytics_data."""
+    async with AsyncSessionLocal() as db:
+        await analytics_service.rebuild_task_current_state(db)
+    async with AsyncSessionLocal() as db:
+        await rollup_service.rebuild_rollups(db)
+    async with AsyncSessionLocal() as db:
+        await completion_time_service.rebuild_completion_sketches(db)
+
+
+async def run_backfill(shards: int, batch_size: int, replace: bool, rebuild: bool, progress_interval: float) -> None:
+    if settings.TASK_SERVICE_DATABASE_URL is None:
+        raise SystemExit("TASK_SERVICE_DATABASE_URL is not set")
+    source_dsn = _asyncpg_dsn(settings.TASK_SERVICE_DATABASE_URL)
+    target_dsn = _asyncpg_dsn(settings.DATABASE_URL)
+
+    # Rows older than the retention period would only be dropped again
+    current_month = partitions.month_start(datetime.now(timezone.utc))
+    if settings.ANALYTICS_RETENTION_MONTHS > 0:
+        first_month = partitions.add_months(current_month, -settings.ANALYTICS_RETENTION_MONTHS)
+    else:
+        source = await asyncpg.connect(source_dsn)
+        try:
+            oldest = await source.fetchval("SELECT min(created_at) FROM tasks")
+        finally:
+            await source.close()
+        first_month = partitions.month_start(oldest) if oldest else current_month
+    since = datetime(first_month.year, first_month.month, 1, tzinfo=timezone.utc)
+
+    # Historical months need their partitions, or the rows pile up in the default one
+    async with engine.begin() as conn:
+        await ensure_future_partitions(conn, settings.ANALYTICS_PARTITION_PREMAKE_MONTHS, since=first_month)
+
+    logger.info(f"Backfilling task lifecycle since {since:%Y-%m-%d} with {shards} shards, batch size {batch_size}")
+    progress = Progress()
+    reporter = asyncio.create_task(_report_progress(progress, progress_interval))
+    try:
+        await asyncio.gather(*(
+            backfill_shard(shard, shards, source_dsn, target_dsn, batch_size, since, replace, progress)
+            for shard in range(shards)
+        ))
+    finally:
+        reporter.cancel()
+    progress.log(final=True)
+
+    if rebuild:
+        logger.info("Rebuilding task_current_state, rollups and completion time sketches...")
+        await rebuild_derived()
+
+
+# Usage: python -m app.workers.backfill_task_service [--shards 4] [--batch-size 5000] [--replace] [--rebuild-derived]
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Rebuild task lifecycle analytics from the task-service database.")
+    parser.add_argument("--shards", type=int, default=settings.BACKFILL_SHARDS, help="Parallel company_id shards")
+    parser.add_argument("--batch-size", type=int, default=settings.BACKFILL_BATCH_SIZE, help="Tasks per batch")
+    parser.add_argument(
+        "--replace", action="store_true",
+        help="Delete existing lifecycle rows of the backfilled tasks (needed when live events were stored)",
+    )
+    parser.add_argument(
+        "--rebuild-derived", action="store_true",
+        help="Rebuild task_current_state, rollups and completion time sketches afterwards",
+    )
+    parser.add_argument("--progress-interval", type=float, default=10.0, help="Seconds between progress lines")
+    args = parser.parse_args()
+    asyncio.run(run_backfill(args.shards, args.batch_size, args.replace, args.rebuild_derived, args.progress_interval))
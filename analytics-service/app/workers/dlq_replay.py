@@ -0,0 +1,32 @@
+import argparse
+import asyncio
+import logging
+
+from app.core.messaging import close_rabbitmq_connection, connect_to_rabbitmq
+from app.core.retry import replay_dead_letters
+from app.workers.event_consumer import (
+    TASK_EVENTS_QUEUE, USER_EVENTS_QUEUE, COMPANY_EVENTS_QUEUE, CALENDAR_EVENTS_QUEUE
+)
+
+logger = logging.getLogger(__name__)
+
+QUEUES = (TASK_EVENTS_QUEUE, USER_EVENTS_QUEUE, COMPANY_EVENTS_QUEUE, CALENDAR_EVENTS_QUEUE)
+
+async def main(queue_names, limit: int, batch_size: int) -> None:
+    await connect_to_rabbitmq()
+    try:
+        for queue_name in queue_names:
+            replayed = await replay_dead_letters(queue_name, limit=limit, batch_size=batch_size)
+            logger.info(f"Moved {replayed} dead-lettered messages back to {queue_name}")
+    finally:
+        await close_rabbitmq_connection()
+
+# Usage: python -m app.workers.dlq_replay [--queue task_events_analytics] [--limit 1000]
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Move dead-lettered analytics events back into their queues.")
+    parser.add_argument("--queue", choices=QUEUES, action="append", help="Queue to replay (default: all)")
+    parser.add_argument("--limit", type=int, default=1_000_000, help="Maximum messages to replay per queue")
+    parser.add_argument("--batch-size", type=int, default=500, help="Messages republished per confirmed batch")
+    args = parser.parse_args()
+    asyncio.run(main(args.queue or QUEUES, args.limit, args.batch_size))
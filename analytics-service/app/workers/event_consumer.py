@@ -1,13 +1,25 @@
 import asyncio
 import logging
 import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 from aio_pika import IncomingMessage
+from aio_pika.abc import AbstractQueue
 from pydantic import ValidationError
 
+from app.core.cache import result_cache
+from app.core.config import settings
+from app.core.consumer_metrics import QueueMetrics, publish_snapshots
+from app.core.dedup import RecentEventFilter, derive_event_id
 from app.core.messaging import consume_messages, connect_to_rabbitmq
-from app.services import analytics_service # Import the analytics service
-from app.db.session import AsyncSessionLocal
-from app.schemas.events import TaskCreatedPayload, TaskStatusChangedPayload, Event
+from app.core import retry
+from app.core.retry import PermanentEventError
+from app.services import analytics_service, leaderboard_service # Import the analytics services
+from app.db import pool_metrics
+from app.db.session import AsyncSessionLocal, engine
+from app.schemas.events import (
+    EntityEventPayload, EventPayloadBase, TaskCreatedPayload, TaskStatusChangedPayload,
+    TaskCompletedPayload, TaskEvaluatedPayload, Event,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -17,85 +29,327 @@ USER_EVENTS_QUEUE = "user_events_analytics" # Example queue name
 COMPANY_EVENTS_QUEUE = "company_events_analytics" # Example queue name
 CALENDAR_EVENTS_QUEUE = "calendar_events_analytics" # Example queue name
 
+TaskEventPayload = Union[analytics_service.TaskLifecyclePayload, leaderboard_service.LeaderboardPayload]
+
+# Ids of recently stored events. A hit skips the event before it reaches the
+# database; anything older is still caught by the unique event_id index.
+recent_events = RecentEventFilter(settings.EVENT_DEDUP_FILTER_CAPACITY, settings.EVENT_DEDUP_FILTER_ERROR_RATE)
+
+def _decode_event(message: IncomingMessage) -> Tuple[str, Dict[str, Any]]:
+    """Returns the event type and payload dict, or raises PermanentEventError."""
+    try:
+        event_dict = json.loads(message.body.decode())
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise PermanentEventError(f"Failed to decode JSON from message body: {message.body[:200]!r}")
+
+    event_type = event_dict.get("event_type") if isinstance(event_dict, dict) else None
+    payload_dict = event_dict.get("payload") if isinstance(event_dict, dict) else None
+    if not event_type or not isinstance(payload_dict, dict) or not payload_dict:
+        raise PermanentEventError(f"Invalid event structure received: {event_dict}")
+    # Producers may put the event id on the envelope instead of the payload
+    if "event_id" not in payload_dict and event_dict.get("event_id"):
+        payload_dict = {**payload_dict, "event_id": event_dict["event_id"]}
+    return event_type, payload_dict
+
+def _with_event_id(payload: EventPayloadBase, event_type: str, payload_dict: Dict[str, Any]) -> EventPayloadBase:
+    if payload.event_id is None:
+        payload.event_id = derive_event_id(event_type, payload_dict)
+    return payload
+
+def _parse_task_event(message: IncomingMessage) -> Optional[TaskEventPayload]:
+    """Decodes and validates a task event message.
+
+    Raises PermanentEventError for messages that can never be stored (bad
+    JSON, invalid structure or payload). Returns None for event types this
+    service doesn't handle; those are logged and acked.
+    """
+    event_type, payload_dict = _decode_event(message)
+    try:
+        if event_type == "task_created":
+            return _with_event_id(TaskCreatedPayload(**payload_dict), event_type, payload_dict)
+        if event_type == "task_status_changed":
+            return _with_event_id(TaskStatusChangedPayload(**payload_dict), event_type, payload_dict)
+        if event_type == "task_completed":
+            return _with_event_id(TaskCompletedPayload(**payload_dict), event_type, payload_dict)
+        if event_type == "task_evaluated":
+            return _with_event_id(TaskEvaluatedPayload(**payload_dict), event_type, payload_dict)
+    except ValidationError as e:
+        logger.debug(f"Invalid payload: {payload_dict}")
+        raise PermanentEventError(f"Payload validation failed for event {event_type}: {e}")
+
+    logger.warning(f"Unhandled task event type: {event_type}")
+    return None
+
 async def process_task_event(message: IncomingMessage) -> None:
-    """Callback function to process messages from the task service queue."""
-    async with message.process(ignore_processed=True): # Ensure message is ack/nack
-        raw_body = message.body
+    """Processes one message from the task service queue.
+
+    Does not ack: errors are raised and `handle_message` decides between
+    retry and dead-lettering.
+    """
+    payload = _parse_task_event(message)
+    if payload is None:
+        return
+    if payload.event_id in recent_events:
+        logger.debug(f"Skipping recently seen task event {payload.event_id}")
+        return
+
+    logger.info(f"Received task event for task_id: {payload.task_id}")
+    async with AsyncSessionLocal() as db:
+        if isinstance(payload, TaskCreatedPayload):
+            await analytics_service.handle_task_creation(db, payload)
+        elif isinstance(payload, TaskStatusChangedPayload):
+            await analytics_service.handle_task_status_change(db, payload)
+        elif isinstance(payload, TaskCompletedPayload):
+            await leaderboard_service.record_leaderboard_event(db, "task_completed", payload, message.timestamp)
+        else:
+            await leaderboard_service.record_leaderboard_event(db, "task_evaluated", payload, message.timestamp)
+    recent_events.add(payload.event_id)
+    await result_cache.invalidate_companies([payload.company_id])
+
+async def process_entity_event(message: IncomingMessage) -> None:
+    """Processes one message from the user, company or calendar queue.
+
+    These events are stored as generic AnalyticsData rows.
+    """
+    event_type, payload_dict = _decode_event(message)
+    try:
+        payload = _with_event_id(EntityEventPayload(**payload_dict), event_type, payload_dict)
+    except ValidationError as e:
+        raise PermanentEventError(f"Payload validation failed for event {event_type}: {e}")
+    if payload.event_id in recent_events:
+        logger.debug(f"Skipping recently seen event {payload.event_id}")
+        return
+
+    logger.info(f"Received event: {event_type}")
+    async with AsyncSessionLocal() as db:
+        await analytics_service.record_entity_event(db, event_type, payload)
+    recent_events.add(payload.event_id)
+    await result_cache.invalidate_companies([payload.company_id])
+
+async def handle_message(
+    message: IncomingMessage,
+    queue_name: str,
+    handler: Callable[[IncomingMessage], Awaitable[None]],
+) -> bool:
+    """Runs the handler and settles the message. Returns True if it was processed.
+
+    Success acks the message. Permanent errors send it straight to the DLQ;
+    any other error (e.g. a database outage) schedules a delayed retry, and
+    the message is dead-lettered once it runs out of attempts.
+    """
+    try:
+        await handler(message)
+    except PermanentEventError as e:
+        await retry.dead_letter(message, queue_name, str(e))
+        return False
+    except Exception as e:
+        logger.error(f"Error handling message from {queue_name}: {e}", exc_info=True)
+        await retry.retry_later(message, queue_name, e)
+        return False
+    await message.ack()
+    return True
+
+async def process_task_batch(messages: List[IncomingMessage]) -> int:
+    """Validates a batch of task messages and stores them in one transaction.
+
+    Invalid messages are dead-lettered; unhandled event types and recently
+    seen events are acked right away. The rest are acked together, only after the commit succeeded. If
+    the batch write fails, the messages fall back to one-by-one processing
+    (with retries) so a single bad event doesn't block the others.
+    Returns the number of messages that were not stored.
+    """
+    failed = 0
+    valid_messages: List[IncomingMessage] = []
+    payloads: List[analytics_service.TaskLifecyclePayload] = []
+    for message in messages:
         try:
-            event_dict = json.loads(raw_body.decode())
-            # Basic validation of event structure
-            # validated_event = Event(**event_dict) # Might be too generic
-            event_type = event_dict.get("event_type")
-            payload_dict = event_dict.get("payload")
-
-            if not event_type or not payload_dict:
-                logger.error(f"Invalid event structure received: {event_dict}")
-                # Nack the message? Or just log and ack?
+            payload = _parse_task_event(message)
+        except PermanentEventError as e:
+            await retry.dead_letter(message, TASK_EVENTS_QUEUE, str(e))
+            failed += 1
+            continue
+        if payload is None or payload.event_id in recent_events:
+            await message.ack()
+            continue
+        if isinstance(payload, (TaskCompletedPayload, TaskEvaluatedPayload)):
+            # Leaderboard events are not part of the lifecycle batch write
+            if not await handle_message(message, TASK_EVENTS_QUEUE, process_task_event):
+                failed += 1
+            continue
+        valid_messages.append(message)
+        payloads.append(payload)
+
+    if not payloads:
+        return failed
+
+    try:
+        async with AsyncSessionLocal() as db:
+            await analytics_service.ingest_task_events(db, payloads)
+    except Exception as e:
+        logger.error(
+            f"Batch of {len(payloads)} task events failed, falling back to single processing: {e}",
+            exc_info=True
+        )
+        for message in valid_messages:
+            if not await handle_message(message, TASK_EVENTS_QUEUE, process_task_event):
+                failed += 1
+        return failed
+
+    # Batches are flushed strictly one after another on a single channel, so
+    # acking the last delivery tag with multiple=True acks exactly this batch.
+    await valid_messages[-1].ack(multiple=True)
+    for payload in payloads:
+        recent_events.add(payload.event_id)
+    await result_cache.invalidate_companies({payload.company_id for payload in payloads})
+    logger.debug(f"Acked batch of {len(valid_messages)} task events")
+    return failed
+
+class TaskEventBatcher:
+    """Collects task messages and flushes them by size or by time.
+
+    A batch is flushed once it reaches `max_size` messages or `max_wait_ms`
+    after its first message arrived, whichever comes first.
+    """
+
+    def __init__(self, max_size: int, max_wait_ms: int, metrics: Optional[QueueMetrics] = None):
+        self.max_size = max_size
+        self.max_wait = max_wait_ms / 1000
+        self.metrics = metrics
+        self._pending: List[IncomingMessage] = []
+        self._flush_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    async def add(self, message: IncomingMessage) -> None:
+        """Consumer callback: queues a message for the next batch."""
+        if self.metrics is not None:
+            self.metrics.received(message.timestamp)
+        self._pending.append(message)
+        if len(self._pending) >= self.max_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_wait)
+        await self.flush()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if self._timer is not None and self._timer is not asyncio.current_task():
+                self._timer.cancel()
+            self._timer = None
+            batch, self._pending = self._pending[:self.max_size], self._pending[self.max_size:]
+            if self._pending:
+                self._timer = asyncio.create_task(self._flush_later())
+            if not batch:
                 return
+            if self.metrics is not None:
+                self.metrics.started(len(batch))
+            failed = len(batch)
+            try:
+                failed = await process_task_batch(batch)
+            finally:
+                if self.metrics is not None:
+                    self.metrics.finished(True, len(batch) - failed)
+                    self.metrics.finished(False, failed)
 
-            logger.info(f"Received task event: {event_type}")
-            logger.debug(f"Payload: {payload_dict}")
-
-            # --- Processing Logic --- 
-            async with AsyncSessionLocal() as db:
-                try:
-                    if event_type == "task_created":
-                        validated_payload = TaskCreatedPayload(**payload_dict)
-                        await analytics_service.handle_task_creation(db, validated_payload)
-                    elif event_type == "task_status_changed":
-                        validated_payload = TaskStatusChangedPayload(**payload_dict)
-                        await analytics_service.handle_task_status_change(db, validated_payload)
-                    # ... handle other task event types
-                    else:
-                        logger.warning(f"Unhandled task event type: {event_type}")
-                        # Acknowledge the message even if unhandled for now
-
-                    logger.debug(f"Event {event_type} processed successfully.")
-                
-                except ValidationError as e:
-                    logger.error(f"Payload validation failed for event {event_type}: {e}")
-                    logger.debug(f"Invalid payload: {payload_dict}")
-                    # Decide how to handle validation errors (e.g., log, move to DLQ)
-                    # Message will be acknowledged by context manager unless specific action taken
-                
-                except Exception as e:
-                    # Specific database or service errors during handling
-                    logger.error(f"Error handling event {event_type} in service: {e}", exc_info=True)
-                    # Consider nack-ing the message for retry if appropriate
-                    # await message.nack(requeue=True) # Example: Requeue for retry
-                    # For now, let the context manager ack it after logging
-
-        except json.JSONDecodeError:
-            logger.error(f"Failed to decode JSON from message body: {raw_body}")
-            # Message will be acknowledged by context manager
-        except Exception as e:
-            # Catch-all for unexpected errors during initial processing
-            logger.error(f"Unexpected error processing message: {e}", exc_info=True)
-            # Message will be acknowledged by context manager
+def bounded_handler(
+    queue_name: str,
+    handler: Callable[[IncomingMessage], Awaitable[None]],
+    semaphore: asyncio.Semaphore,
+    metrics: QueueMetrics,
+) -> Callable[[IncomingMessage], Awaitable[None]]:
+    """Wraps a handler with the queue's concurrency limit, retry handling and metrics."""
+    async def callback(message: IncomingMessage) -> None:
+        metrics.received(message.timestamp)
+        async with semaphore:
+            metrics.started()
+            ok = False
+            try:
+                ok = await handle_message(message, queue_name, handler)
+            except Exception as e:
+                logger.error(f"Could not settle message from {queue_name}: {e}", exc_info=True)
+            finally:
+                metrics.finished(ok)
+    return callback
 
-# Similarly, define processing functions for other event types (user, company, calendar)
-# async def process_user_event(message: IncomingMessage) -> None: ...
-# async def process_company_event(message: IncomingMessage) -> None: ...
-# async def process_calendar_event(message: IncomingMessage) -> None: ...
+async def report_metrics(queues: Dict[str, AbstractQueue], metrics: Dict[str, QueueMetrics]) -> None:
+    """Periodically logs per-queue metrics and publishes them to Redis."""
+    interval = settings.CONSUMER_METRICS_INTERVAL_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        snapshots = []
+        for queue_name, queue in queues.items():
+            try:
+                # Re-declaring an existing queue returns its current message count
+                queue_depth = (await queue.declare()).message_count
+            except Exception as e:
+                logger.warning(f"Could not read depth of queue {queue_name}: {e}")
+                queue_depth = None
+            snapshot = metrics[queue_name].snapshot(queue_depth)
+            logger.info(
+                f"Queue {queue_name}: {snapshot['rate_per_second']} msg/s, depth={queue_depth}, "
+                f"in_flight={snapshot['in_flight']}, processed={snapshot['processed']}, failed={snapshot['failed']}"
+            )
+            snapshots.append(snapshot)
+        pool_snapshot = pool_metrics.snapshot(engine.pool, settings.DB_POOL_ROLE)
+        logger.info(
+            f"DB pool: saturation={pool_snapshot['saturation']}, checked_out={pool_snapshot['checked_out']}, "
+            f"wait_p95={pool_snapshot['wait_p95_ms']}ms, timeouts={pool_snapshot['timeouts']}"
+        )
+        try:
+            await publish_snapshots(snapshots, ttl_seconds=interval * 3)
+            await pool_metrics.publish_snapshot(pool_snapshot, ttl_seconds=interval * 3)
+        except Exception as e:
+            logger.warning(f"Failed to publish consumer metrics: {e}")
 
 async def start_consumers() -> None:
-    """Connects to RabbitMQ and starts all defined consumers."""
+    """Connects to RabbitMQ and starts all defined consumers.
+
+    All queues share one connection. Each queue is consumed on its own
+    channel with its own prefetch window and handler semaphore.
+    """
     try:
         await connect_to_rabbitmq()
-        # Start consumer for task events
-        await consume_messages(TASK_EVENTS_QUEUE, process_task_event)
-        logger.info(f"Consumer started for queue {TASK_EVENTS_QUEUE}")
-        
-        # Start consumers for other queues (uncomment when ready)
-        # await consume_messages(USER_EVENTS_QUEUE, process_user_event)
-        # logger.info(f"Consumer started for queue {USER_EVENTS_QUEUE}")
-        # await consume_messages(COMPANY_EVENTS_QUEUE, process_company_event)
-        # logger.info(f"Consumer started for queue {COMPANY_EVENTS_QUEUE}")
-        # await consume_messages(CALENDAR_EVENTS_QUEUE, process_calendar_event)
-        # logger.info(f"Consumer started for queue {CALENDAR_EVENTS_QUEUE}")
+        handlers = {
+            TASK_EVENTS_QUEUE: (process_task_event, settings.TASK_EVENTS_PREFETCH),
+            USER_EVENTS_QUEUE: (process_entity_event, settings.USER_EVENTS_PREFETCH),
+            COMPANY_EVENTS_QUEUE: (process_entity_event, settings.COMPANY_EVENTS_PREFETCH),
+            CALENDAR_EVENTS_QUEUE: (process_entity_event, settings.CALENDAR_EVENTS_PREFETCH),
+        }
+        metrics = {queue_name: QueueMetrics(queue_name) for queue_name in handlers}
+        queues: Dict[str, AbstractQueue] = {}
+
+        for queue_name, (handler, prefetch_count) in handlers.items():
+            await retry.declare_retry_topology(queue_name)
+            if queue_name == TASK_EVENTS_QUEUE and settings.EVENT_BATCH_ENABLED:
+                # Batches are written one at a time, the batcher itself bounds concurrency
+                batcher = TaskEventBatcher(
+                    settings.EVENT_BATCH_MAX_SIZE, settings.EVENT_BATCH_MAX_WAIT_MS, metrics[queue_name]
+                )
+                # Prefetch two batches so the next one fills up while the current one is written
+                queues[queue_name] = await consume_messages(
+                    queue_name, batcher.add, prefetch_count=settings.EVENT_BATCH_MAX_SIZE * 2
+                )
+                logger.info(
+                    f"Batching consumer started for queue {queue_name} "
+                    f"(max_size={settings.EVENT_BATCH_MAX_SIZE}, max_wait_ms={settings.EVENT_BATCH_MAX_WAIT_MS})"
+                )
+                continue
+
+            semaphore = asyncio.Semaphore(settings.CONSUMER_MAX_CONCURRENCY)
+            queues[queue_name] = await consume_messages(
+                queue_name,
+                bounded_handler(queue_name, handler, semaphore, metrics[queue_name]),
+                prefetch_count=prefetch_count,
+            )
+            logger.info(
+                f"Consumer started for queue {queue_name} "
+                f"(prefetch={prefetch_count}, concurrency={settings.CONSUMER_MAX_CONCURRENCY})"
+            )
 
         logger.info("All event consumers started. Waiting for messages...")
-        await asyncio.Event().wait() # Keeps the coroutine running indefinitely
+        await report_metrics(queues, metrics) # Runs indefinitely
 
     except ConnectionError as e:
         logger.error(f"Could not start consumers due to connection error: {e}")
@@ -107,4 +361,4 @@ if __name__ == "__main__":
     # Make sure logging is configured correctly, especially if running standalone
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     logger.info("Starting event consumer script...")
-    asyncio.run(start_consumers()) 
\ No newline at end of file
+    asyncio.run(start_consumers()) 
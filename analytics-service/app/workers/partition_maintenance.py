@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.db import partitions
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+async def _existing_partitions(conn: AsyncConnection) -> List[str]:
+    result = await conn.execute(text(partitions.LIST_PARTITIONS_SQL))
+    return [row[0] for row in result.all()]
+
+async def _create_partition(conn: AsyncConnection, month: date) -> None:
+    """Creates the partition for `month`.
+
+    Rows for that month that already landed in the DEFAULT partition would
+    make CREATE ... PARTITION OF fail, so they are moved into the new
+    partition while the default one is detached.
+    """
+    start = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    next_month = partitions.add_months(month, 1)
+    end = datetime(next_month.year, next_month.month, 1, tzinfo=timezone.utc)
+    range_filter = "timestamp >= :start AND timestamp < :end"
+
+    stray_rows = await conn.scalar(
+        text(f"SELECT count(*) FROM {partitions.DEFAULT_PARTITION} WHERE {range_filter}"),
+        {"start": start, "end": end},
+    )
+    if not stray_rows:
+        await conn.execute(text(partitions.create_partition_sql(month)))
+        return
+
+    logger.warning(
+        f"Moving {stray_rows} rows from {partitions.DEFAULT_PARTITION} "
+        f"into new partition {partitions.partition_name(month)}"
+    )
+    await conn.execute(text(
+        f"ALTER TABLE {partitions.PARENT_TABLE} DETACH PARTITION {partitions.DEFAULT_PARTITION}"
+    ))
+    await conn.execute(text(partitions.create_partition_sql(month)))
+    await conn.execute(
+        text(
+            f"INSERT INTO {partitions.PARENT_TABLE} "
+            f"SELECT * FROM {partitions.DEFAULT_PARTITION} WHERE {range_filter}"
+        ),
+        {"start": start, "end": end},
+    )
+    await conn.execute(
+        text(f"DELETE FROM {partitions.DEFAULT_PARTITION} WHERE {range_filter}"),
+        {"start": start, "end": end},
+    )
+    await conn.execute(text(
+        f"ALTER TABLE {partitions.PARENT_TABLE} ATTACH PARTITION {partitions.DEFAULT_PARTITION} DEFAULT"
+    ))
+
+async def ensure_future_partitions(
+    conn: AsyncConnection,
+    months_ahead: int,
+    today: Optional[date] = None,
+    since: Optional[date] = None,
+) -> List[str]:
+    """Makes sure partitions exist from the current month up to `months_ahead` months ahead.
+
+    With `since`, past months starting from that month are created as well
+    (used before loading historical data).
+    """
+    current_month = partitions.month_start(today or datetime.now(timezone.utc))
+    first_month = min(partitions.month_start(since), current_month) if since else current_month
+    existing = set(await _existing_partitions(conn))
+    created = []
+    months_before = (current_month.year - first_month.year) * 12 + current_month.month - first_month.month
+    for offset in range(-months_before, months_ahead + 1):
+        month = partitions.add_months(current_month, offset)
+        name = partitions.partition_name(month)
+        if name in existing:
+            continue
+        await _create_partition(conn, month)
+        created.append(name)
+        logger.info(f"Created partition {name}")
+    return created
+
+async def expire_partitions(
+    conn: AsyncConnection,
+    retention_months: int,
+    archive_schema: Optional[str] = None,
+    today: Optional[date] = None,
+) -> List[str]:
+    """Drops (or archives) monthly partitions that ended before the retention cut-off.
+
+    Derived tables (task_current_state, task_activity_rollups) are not
+    touched, so aggregates for expired months remain available.
+    """
+    cutoff = partitions.add_months(
+        partitions.month_start(today or datetime.now(timezone.utc)), -retention_months
+    )
+    expired = []
+    for name in sorted(await _existing_partitions(conn)):
+        month = partitions.parse_partition_name(name)
+        if month is None or partitions.add_months(month, 1) > cutoff:
+            continue
+        if archive_schema:
+            await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+            await conn.execute(text(f"ALTER TABLE {partitions.PARENT_TABLE} DETACH PARTITION {name}"))
+            await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+            logger.info(f"Archived partition {name} to schema {archive_schema}")
+        else:
+            await conn.execute(text(f"DROP TABLE {name}"))
+            logger.info(f"Dropped partition {name}")
+        expired.append(name)
+    return expired
+
+async def run_maintenance() -> None:
+    """Runs one maintenance pass; each step commits on its own."""
+    async with engine.begin() as conn:
+        await ensure_future_partitions(conn, settings.ANALYTICS_PARTITION_PREMAKE_MONTHS)
+    if settings.ANALYTICS_RETENTION_MONTHS > 0:
+        async with engine.begin() as conn:
+            await expire_partitions(
+                conn, settings.ANALYTICS_RETENTION_MONTHS, settings.ANALYTICS_ARCHIVE_SCHEMA
+            )
+
+async def run_forever() -> None:
+    while True:
+        try:
+            await run_maintenance()
+        except Exception as e:
+            logger.error(f"Partition maintenance failed: {e}", exc_info=True)
+        await asyncio.sleep(settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+
+# Usage: python -m app.workers.partition_maintenance [--once]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain analytics_data monthly partitions.")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit (e.g. from cron)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.info("Starting partition maintenance...")
+    asyncio.run(run_maintenance() if args.once else run_forever())
@@ -0,0 +1,19 @@
+import asyncio
+import logging
+
+from app.db.session import AsyncSessionLocal
+from app.services import completion_time_service
+
+logger = logging.getLogger(__name__)
+
+async def rebuild_completion_sketches() -> None:
+    """Recomputes the completion time sketches from 'task_lifecycle' rows."""
+    async with AsyncSessionLocal() as db:
+        completions = await completion_time_service.rebuild_completion_sketches(db)
+    logger.info(f"completion_time_sketches rebuilt from {completions} completions")
+
+# Usage: python -m app.workers.rebuild_completion_sketches (after rebuild_task_state)
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.info("Starting completion time sketch backfill...")
+    asyncio.run(rebuild_completion_sketches())
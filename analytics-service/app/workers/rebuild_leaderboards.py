@@ -0,0 +1,23 @@
+import asyncio
+import logging
+
+from app.core.redis import close_redis
+from app.db.session import AsyncSessionLocal
+from app.services import leaderboard_service
+
+logger = logging.getLogger(__name__)
+
+async def rebuild_leaderboards() -> None:
+    """Rewrites the current leaderboards in Redis from stored events."""
+    try:
+        async with AsyncSessionLocal() as db:
+            boards = await leaderboard_service.rebuild_leaderboards(db)
+        logger.info(f"Leaderboards rebuilt: {boards} boards")
+    finally:
+        await close_redis()
+
+# Usage: python -m app.workers.rebuild_leaderboards
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.info("Starting leaderboard rebuild...")
+    asyncio.run(rebuild_leaderboards())
@@ -0,0 +1,19 @@
+import asyncio
+import logging
+
+from app.db.session import AsyncSessionLocal
+from app.services import rollup_service
+
+logger = logging.getLogger(__name__)
+
+async def rebuild_rollups() -> None:
+    """Recomputes the task activity rollups from 'task_lifecycle' rows."""
+    async with AsyncSessionLocal() as db:
+        bucket_count = await rollup_service.rebuild_rollups(db)
+    logger.info(f"task_activity_rollups rebuilt: {bucket_count} buckets")
+
+# Usage: python -m app.workers.rebuild_rollups
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.info("Starting task activity rollup backfill...")
+    asyncio.run(rebuild_rollups())
@@ -0,0 +1,19 @@
+import asyncio
+import logging
+
+from app.db.session import AsyncSessionLocal
+from app.services import analytics_service
+
+logger = logging.getLogger(__name__)
+
+async def rebuild_task_state() -> None:
+    """Rebuilds the task_current_state snapshot from 'task_lifecycle' rows."""
+    async with AsyncSessionLocal() as db:
+        task_count = await analytics_service.rebuild_task_current_state(db)
+    logger.info(f"task_current_state rebuilt: {task_count} tasks")
+
+# Usage: python -m app.workers.rebuild_task_state
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.info("Starting task_current_state backfill...")
+    asyncio.run(rebuild_task_state())
@@ -0,0 +1,149 @@
+import asyncio
+import csv
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.models.analytics_data import AnalyticsData
+from app.db.models.report import Report
+from app.db.session import AsyncSessionLocal
+from app.services import report_aggregation, report_service
+
+logger = logging.getLogger(__name__)
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+async def _aggregate_report(report: Report, pool: Executor) -> Dict[Optional[int], Dict[str, float]]:
+    """Streams the report's lifecycle rows and aggregates them in the process pool.
+
+    Rows are read with a server-side cursor and cut into chunks on task
+    boundaries; at most two chunks per process are in flight, so memory use
+    does not depend on the size of the report.
+    """
+    parameters = report.parameters or {}
+    query = (
+        select(
+            AnalyticsData.task_id,
+            AnalyticsData.department_id,
+            AnalyticsData.user_id,
+            AnalyticsData.status,
+            AnalyticsData.previous_status,
+            AnalyticsData.timestamp,
+        )
+        .where(AnalyticsData.metric_key == "task_lifecycle")
+        .where(AnalyticsData.task_id.isnot(None))
+        .order_by(AnalyticsData.task_id, AnalyticsData.timestamp, AnalyticsData.id)
+    )
+    if report.company_id is not None:
+        query = query.where(AnalyticsData.company_id == report.company_id)
+    start = _parse_datetime(parameters.get("start"))
+    end = _parse_datetime(parameters.get("end"))
+    if start is not None:
+        query = query.where(AnalyticsData.timestamp >= start)
+    if end is not None:
+        query = query.where(AnalyticsData.timestamp < end)
+
+    loop = asyncio.get_running_loop()
+    totals: Dict[Optional[int], Dict[str, float]] = {}
+    in_flight: List[asyncio.Future] = []
+    max_in_flight = settings.REPORT_WORKER_PROCESSES * 2
+    chunk: List[tuple] = []
+
+    async def submit(rows: List[tuple]) -> None:
+        in_flight.append(loop.run_in_executor(pool, report_aggregation.aggregate_chunk, report.type, rows))
+        if len(in_flight) >= max_in_flight:
+            report_aggregation.merge_partials(totals, await in_flight.pop(0))
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=settings.REPORT_CHUNK_ROWS))
+        async for partition in result.partitions():
+            for row in partition:
+                if len(chunk) >= settings.REPORT_CHUNK_ROWS and row.task_id != chunk[-1][0]:
+                    await submit(chunk)
+                    chunk = []
+                chunk.append(tuple(row))
+    if chunk:
+        await submit(chunk)
+    for future in in_flight:
+        report_aggregation.merge_partials(totals, await future)
+    return totals
+
+def _write_csv(path: Path, columns: List[str], rows: List[List[Any]]) -> None:
+    with path.open("w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+def _write_parquet(path: Path, columns: List[str], rows: List[List[Any]]) -> None:
+    import pyarrow as pa  # Optional dependency, only needed for parquet reports
+    import pyarrow.parquet as pq
+
+    table = pa.table({name: [row[i] for row in rows] for i, name in enumerate(columns)})
+    pq.write_table(table, path)
+
+async def generate_report(report: Report, pool: Executor) -> str:
+    """Builds the report file and returns its path."""
+    if report.type not in report_aggregation.REPORT_GROUP_BY:
+        raise ValueError(f"Unknown report type: {report.type}")
+    output_format = (report.parameters or {}).get("format", "csv")
+    if output_format not in report_service.REPORT_FORMATS:
+        raise ValueError(f"Unknown report format: {output_format}")
+
+    totals = await _aggregate_report(report, pool)
+    columns, rows = await asyncio.get_running_loop().run_in_executor(
+        pool, report_aggregation.finalize, report.type, totals
+    )
+
+    reports_dir = Path(settings.REPORTS_DIR)
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    path = reports_dir / f"report_{report.id}.{output_format}"
+    writer = _write_parquet if output_format == "parquet" else _write_csv
+    # File I/O runs in a thread so the event loop stays responsive
+    await asyncio.to_thread(writer, path, columns, rows)
+    return str(path.resolve())
+
+async def process_next_report(pool: Executor) -> bool:
+    """Claims one pending report and generates it. Returns False if there was nothing to do."""
+    async with AsyncSessionLocal() as db:
+        released = await report_service.release_stale_claims(
+            db, timedelta(seconds=settings.REPORT_CLAIM_TIMEOUT_SECONDS)
+        )
+        if released:
+            logger.warning(f"Returned {released} abandoned reports to pending")
+        report = await report_service.claim_next_report(db)
+        if report is None:
+            return False
+        logger.info(f"Generating report {report.id} ({report.type})")
+        try:
+            path = await generate_report(report, pool)
+        except Exception as e:
+            logger.error(f"Report {report.id} failed: {e}", exc_info=True)
+            await report_service.mark_report_failed(db, report, str(e))
+            return True
+        await report_service.mark_report_completed(db, report, path)
+        logger.info(f"Report {report.id} completed: {path}")
+    return True
+
+async def run_report_worker() -> None:
+    """Polls for pending reports until cancelled."""
+    with ProcessPoolExecutor(max_workers=settings.REPORT_WORKER_PROCESSES) as pool:
+        while True:
+            try:
+                claimed = await process_next_report(pool)
+            except Exception as e:
+                logger.error(f"Report worker iteration failed: {e}", exc_info=True)
+                claimed = False
+            if not claimed:
+                await asyncio.sleep(settings.REPORT_POLL_INTERVAL_SECONDS)
+
+# Usage: python -m app.workers.report_worker
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.info("Starting report worker...")
+    asyncio.run(run_report_worker())
@@ -0,0 +1,343 @@
+"""Ingest and query benchmarks for analytics-service.
+
+Runs against the database in DATABASE_URL, which must be a dedicated
+local PostgreSQL: the benchmark refuses to touch a non-empty
+analytics_data unless --reset is given, and --reset truncates it.
+
+    python -m benchmarks.run --events 1000000 --reset --output results.json
+
+Steps:
+1. bulk-load `events - ingest_events` synthetic events with COPY and
+   rebuild the derived tables (timed, but not the main figure);
+2. ingest `ingest_events` more events through the consumer's batch write
+   path (analytics_service.ingest_task_events) and report events/s;
+3. time get_task_counts_by_status for random companies;
+4. time the dashboard endpoints in-process through the ASGI app, including
+   rendering a custom dashboard (created for the run and deleted afterwards).
+
+The synthetic history ends at --end-date (a fixed default), so a seed always
+produces the same dataset. Endpoints that read "the last N days" count from
+now; pass --end-date with today's date to make them see data.
+
+The JSON output has the same shape for every run, so results of two
+releases can be diffed directly.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import asyncpg
+import httpx
+from jose import jwt
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db import partitions
+from app.db.session import AsyncSessionLocal, engine
+from app.schemas.dashboard import DashboardCreate
+from app.services import analytics_service, backfill_service, dashboard_service
+from app.workers.backfill_task_service import _asyncpg_dsn, rebuild_derived
+from app.workers.partition_maintenance import ensure_future_partitions
+from benchmarks.synthetic import DEFAULT_END, SyntheticConfig, generate_events, to_copy_record, to_payload
+
+logger = logging.getLogger("benchmarks")
+
+DERIVED_TABLES = ("task_current_state", "task_activity_rollups", "completion_time_sketches")
+API_PREFIX = f"{settings.API_V1_STR}/v1/analytics"
+
+
+def _latency_stats(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+
+    def percentile(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {
+        "iterations": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+async def _timed(iterations: int, call: Callable[[], Awaitable[Any]], warmup: int = 3) -> Dict[str, float]:
+    for _ in range(warmup):
+        await call()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return _latency_stats(samples)
+
+
+async def prepare_database(reset: bool, config: SyntheticConfig) -> None:
+    async with engine.begin() as conn:
+        existing = await conn.scalar(text("SELECT EXISTS (SELECT 1 FROM analytics_data)"))
+        if existing and not reset:
+            raise SystemExit("analytics_data is not empty; run against a dedicated database with --reset")
+        if reset:
+            await conn.execute(text(f"TRUNCATE analytics_data, {', '.join(DERIVED_TABLES)}"))
+        first_month = partitions.month_start(config.end)
+        first_month = partitions.add_months(first_month, -(config.days // 28 + 1))
+        await ensure_future_partitions(conn, settings.ANALYTICS_PARTITION_PREMAKE_MONTHS, since=first_month)
+
+
+async def bulk_load(config: SyntheticConfig, event_count: int, chunk_size: int) -> Dict[str, Any]:
+    """Loads the base dataset with COPY; returns timing and the next free task id."""
+    conn = await asyncpg.connect(_asyncpg_dsn(settings.DATABASE_URL))
+    started = time.perf_counter()
+    loaded = 0
+    next_task_id = 1
+    chunk: List[tuple] = []
+    try:
+        for events in generate_events(config, event_count):
+            chunk.extend(to_copy_record(event) for event in events)
+            next_task_id = events[0][1] + 1
+            if len(chunk) >= chunk_size:
+                await conn.copy_records_to_table(
+                    "analytics_data", records=chunk, columns=list(backfill_service.COPY_COLUMNS)
+                )
+                loaded += len(chunk)
+                chunk = []
+                logger.info(f"Loaded {loaded}/{event_count} events")
+        if chunk:
+            await conn.copy_records_to_table("analytics_data", records=chunk, columns=list(backfill_service.COPY_COLUMNS))
+            loaded += len(chunk)
+    finally:
+        await conn.close()
+    copy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await rebuild_derived()
+    rebuild_seconds = time.perf_counter() - started
+    return {
+        "events": loaded,
+        "copy_seconds": round(copy_seconds, 3),
+        "copy_events_per_second": round(loaded / copy_seconds, 1) if copy_seconds else None,
+        "rebuild_derived_seconds": round(rebuild_seconds, 3),
+        "next_task_id": next_task_id,
+    }
+
+
+async def benchmark_ingest(
+    config: SyntheticConfig, event_count: int, first_task_id: int, batch_size: int, concurrency: int
+) -> Dict[str, Any]:
+    """Feeds events through the consumer's batch write path from `concurrency` writers."""
+    batches: List[list] = []
+    current: list = []
+    for events in generate_events(config, event_count, first_task_id=first_task_id):
+        current.extend(to_payload(event) for event in events)
+        if len(current) >= batch_size:
+            batches.append(current)
+            current = []
+    if current:
+        batches.append(current)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for batch in batches:
+        queue.put_nowait(batch)
+    batch_latencies: List[float] = []
+
+    async def writer() -> None:
+        while not queue.empty():
+            batch = queue.get_nowait()
+            started = time.perf_counter()
+            async with AsyncSessionLocal() as db:
+                await analytics_service.ingest_task_events(db, batch)
+            batch_latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+    total = sum(len(batch) for batch in batches)
+    return {
+        "events": total,
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "seconds": round(seconds, 3),
+        "events_per_second": round(total / seconds, 1) if seconds else None,
+        "batch_latency": _latency_stats(batch_latencies) if batch_latencies else None,
+    }
+
+
+async def benchmark_status_counts(config: SyntheticConfig, iterations: int) -> Dict[str, Any]:
+    rng = random.Random(config.seed)
+
+    async def call() -> None:
+        async with AsyncSessionLocal() as db:
+            await analytics_service.get_task_counts_by_status(db, rng.randint(1, config.companies))
+
+    async def call_all() -> None:
+        async with AsyncSessionLocal() as db:
+            await analytics_service.get_task_counts_by_status(db, None)
+
+    return {
+        "single_company": await _timed(iterations, call),
+        "all_companies": await _timed(max(1, iterations // 10), call_all),
+    }
+
+
+async def create_benchmark_dashboards(config: SyntheticConfig, owner_id: int) -> Dict[int, int]:
+    """Creates one dashboard per company with a widget of every metric; returns company_id -> dashboard_id."""
+    dashboards = {}
+    async with AsyncSessionLocal() as db:
+        for company_id in range(1, config.companies + 1):
+            widgets = [
+                {"id": "status", "metric": "tasks.by_status", "params": {"company_id": company_id}},
+                {"id": "completion", "metric": "tasks.completion_time", "params": {"company_id": company_id}},
+                {"id": "activity", "metric": "time.activity", "params": {"company_id": company_id, "days": 90}},
+                {"id": "departments", "metric": "departments.comparison", "params": {"company_id": company_id}},
+                {"id": "top", "metric": "users.top_performers", "params": {"company_id": company_id, "period": "all"}},
+                # Same request as "status": measures the collapsing of identical widgets too
+                {"id": "status_copy", "metric": "tasks.by_status", "params": {"company_id": company_id}},
+            ]
+            dashboard = await dashboard_service.create_dashboard(db, DashboardCreate(
+                name=f"Benchmark company {company_id}", configuration={"widgets": widgets}, owner_id=owner_id,
+            ))
+            dashboards[company_id] = dashboard.id
+    return dashboards
+
+
+async def delete_benchmark_dashboards(dashboard_ids: List[int]) -> None:
+    async with AsyncSessionLocal() as db:
+        for dashboard_id in dashboard_ids:
+            await dashboard_service.delete_dashboard(db, dashboard_id)
+
+
+async def benchmark_endpoints(config: SyntheticConfig, iterations: int) -> Dict[str, Any]:
+    """Times the endpoints the dashboards read, in-process (no network, no lifespan events)."""
+    from app.main import app  # Imported late: builds the whole application
+
+    owner_id = 1
+    token = jwt.encode({"user_id": owner_id}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    rng = random.Random(config.seed)
+    endpoints = {
+        "tasks.by_status": "/tasks/by-status?company_id={company_id}",
+        "tasks.completion_time": "/tasks/completion-time?company_id={company_id}",
+        "time.workload": "/time/workload?company_id={company_id}&granularity=day",
+        "time.trends": "/time/trends?company_id={company_id}&granularity=week",
+        "users.top_performers": "/users/top-performers?company_id={company_id}&period=all",
+    }
+    results = {}
+    dashboards = await create_benchmark_dashboards(config, owner_id)
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark", headers={"Authorization": f"Bearer {token}"}
+        ) as client:
+            for name, path in endpoints.items():
+                async def call(path: str = path) -> None:
+                    response = await client.get(API_PREFIX + path.format(company_id=rng.randint(1, config.companies)))
+                    response.raise_for_status()
+                results[name] = await _timed(iterations, call)
+
+            async def render() -> None:
+                dashboard_id = dashboards[rng.randint(1, config.companies)]
+                response = await client.get(f"{API_PREFIX}/dashboards/custom/{dashboard_id}/render")
+                response.raise_for_status()
+            results["dashboards.render"] = await _timed(iterations, render)
+    finally:
+        await delete_benchmark_dashboards(list(dashboards.values()))
+    return results
+
+
+def _parse_end_date(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    config = SyntheticConfig(
+        companies=args.companies,
+        departments_per_company=args.departments,
+        users_per_company=args.users,
+        days=args.days,
+        seed=args.seed,
+        end=args.end_date,
+    )
+    # Measure the queries themselves, not the result cache
+    settings.CACHE_ENABLED = args.with_cache
+
+    ingest_events = min(args.ingest_events, args.events)
+    await prepare_database(args.reset, config)
+    load = await bulk_load(config, args.events - ingest_events, args.copy_chunk)
+    ingest = await benchmark_ingest(config, ingest_events, load.pop("next_task_id"), args.batch_size, args.concurrency)
+    status_counts = await benchmark_status_counts(config, args.iterations)
+    endpoints = await benchmark_endpoints(config, args.iterations)
+    await engine.dispose()
+
+    return {
+        "service_version": settings.PROJECT_VERSION,
+        "git_revision": _git_revision(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "parameters": {
+            "events": args.events,
+            "ingest_events": ingest_events,
+            "companies": config.companies,
+            "departments_per_company": config.departments_per_company,
+            "users_per_company": config.users_per_company,
+            "days": config.days,
+            "seed": config.seed,
+            "end_date": config.end.isoformat(),
+            "cache_enabled": args.with_cache,
+        },
+        "results": {
+            "bulk_load": load,
+            "ingest": ingest,
+            "get_task_counts_by_status": status_counts,
+            "endpoints": endpoints,
+        },
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Benchmark analytics-service ingest and queries.")
+    parser.add_argument("--events", type=int, default=1_000_000, help="Total events, e.g. 1000000, 10000000, 100000000")
+    parser.add_argument("--ingest-events", type=int, default=100_000, help="Events written through the consumer path")
+    parser.add_argument("--batch-size", type=int, default=settings.EVENT_BATCH_MAX_SIZE)
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel ingest writers")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed calls per query / endpoint")
+    parser.add_argument("--companies", type=int, default=100)
+    parser.add_argument("--departments", type=int, default=10, help="Departments per company")
+    parser.add_argument("--users", type=int, default=50, help="Users per company")
+    parser.add_argument("--days", type=int, default=180, help="Time span of the synthetic history")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--end-date", type=_parse_end_date, default=DEFAULT_END,
+        help=f"Date the synthetic history ends on, YYYY-MM-DD (default {DEFAULT_END.date()})",
+    )
+    parser.add_argument("--copy-chunk", type=int, default=100_000, help="Rows per COPY call")
+    parser.add_argument("--with-cache", action="store_true", help="Keep the query result cache enabled")
+    parser.add_argument("--reset", action="store_true", help="Truncate analytics tables before loading")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        logger.info(f"Results written to {args.output}")
+    else:
+        print(output)
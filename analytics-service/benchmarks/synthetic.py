@@ -0,0 +1,100 @@
+"""Deterministic synthetic task lifecycles for the benchmarks.
+
+Events are produced as plain tuples so that datasets of 100M events can be
+streamed into COPY without building pydantic objects; the ingest benchmark
+converts a sample of them into consumer payloads.
+"""
+import json
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional, Tuple
+
+from app.schemas.events import TaskCreatedPayload, TaskStatusChangedPayload
+
+PRIORITIES = ("low", "medium", "high")
+# Status paths after creation; weights roughly follow a healthy backlog
+FLOWS = (
+    (("open", "in_progress"), ("in_progress", "review"), ("review", "done")),
+    (("open", "in_progress"), ("in_progress", "done")),
+    (("open", "in_progress"), ("in_progress", "review"), ("review", "in_progress"),
+     ("in_progress", "review"), ("review", "done")),
+    (("open", "in_progress"),),
+    (("open", "cancelled"),),
+    (),
+)
+FLOW_WEIGHTS = (40, 25, 10, 15, 5, 5)
+# Fixed anchor of the synthetic history so that the same seed yields the same dataset on every run
+DEFAULT_END = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass
+class SyntheticConfig:
+    companies: int = 100
+    departments_per_company: int = 10
+    users_per_company: int = 50
+    days: int = 180
+    seed: int = 42
+    end: datetime = DEFAULT_END  # Latest possible event timestamp
+
+
+# (event_id, task_id, company_id, department_id, user_id, status, previous_status, priority, timestamp, title)
+SyntheticEvent = Tuple[uuid.UUID, int, int, int, int, str, Optional[str], Optional[str], datetime, Optional[str]]
+
+
+def generate_events(config: SyntheticConfig, event_count: int, first_task_id: int = 1) -> Iterator[List[SyntheticEvent]]:
+    """Yields the events of one task at a time until `event_count` events were produced."""
+    rng = random.Random(config.seed + first_task_id)
+    end = config.end
+    span_seconds = config.days * 24 * 3600
+    produced = 0
+    task_id = first_task_id
+    while produced < event_count:
+        company_id = rng.randint(1, config.companies)
+        department_id = company_id * 1000 + rng.randint(1, config.departments_per_company)
+        user_id = company_id * 100000 + rng.randint(1, config.users_per_company)
+        priority = rng.choice(PRIORITIES)
+        ts = end - timedelta(seconds=rng.randint(0, span_seconds))
+
+        events = [(
+            uuid.UUID(int=rng.getrandbits(128), version=4), task_id, company_id, department_id, user_id,
+            "created", None, priority, ts, f"Task {task_id}",
+        )]
+        for previous_status, status in rng.choices(FLOWS, FLOW_WEIGHTS)[0]:
+            ts = ts + timedelta(seconds=rng.randint(600, 5 * 24 * 3600))
+            if ts > end:
+                break
+            events.append((
+                uuid.UUID(int=rng.getrandbits(128), version=4), task_id, company_id, department_id, user_id,
+                status, previous_status, None, ts, None,
+            ))
+        events = events[:event_count - produced]
+        produced += len(events)
+        task_id += 1
+        yield events
+
+
+def to_copy_record(event: SyntheticEvent) -> Tuple:
+    """Record in the column order of backfill_service.COPY_COLUMNS."""
+    event_id, task_id, company_id, department_id, user_id, status, previous_status, priority, ts, title = event
+    metric_value = {"title": title} if status == "created" else {}
+    return (
+        event_id, "task_lifecycle", json.dumps(metric_value), status, previous_status, priority,
+        ts, company_id, department_id, user_id, task_id,
+    )
+
+
+def to_payload(event: SyntheticEvent):
+    """Consumer payload for the event, as the task service would send it."""
+    event_id, task_id, company_id, department_id, user_id, status, previous_status, priority, ts, title = event
+    common = {
+        "event_id": event_id,
+        "task_id": task_id,
+        "company_id": company_id,
+        "department_id": department_id,
+        "assignee_user_id": user_id,
+    }
+    if status == "created":
+        return TaskCreatedPayload(**common, title=title, priority=priority, created_at=ts)
+    return TaskStatusChangedPayload(**common, old_status=previous_status, new_status=status, changed_at=ts)
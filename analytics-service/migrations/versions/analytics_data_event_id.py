@@ -0,0 +1,24 @@
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'analytics_data_event_id'
+down_revision = 'partition_analytics_data'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('analytics_data', sa.Column('event_id', postgresql.UUID(as_uuid=True), nullable=True))
+    # A unique index on a partitioned table must contain the partition key.
+    # Existing rows keep event_id NULL, which never conflicts.
+    op.create_index(
+        'uq_analytics_data_event_id_timestamp', 'analytics_data', ['event_id', 'timestamp'], unique=True
+    )
+
+
+def downgrade():
+    op.drop_index('uq_analytics_data_event_id_timestamp', table_name='analytics_data')
+    op.drop_column('analytics_data', 'event_id')
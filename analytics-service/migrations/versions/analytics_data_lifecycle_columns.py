@@ -0,0 +1,54 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'analytics_data_lifecycle_columns'
+down_revision = 'task_activity_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('analytics_data', sa.Column('status', sa.String(length=32), nullable=True))
+    op.add_column('analytics_data', sa.Column('previous_status', sa.String(length=32), nullable=True))
+    op.add_column('analytics_data', sa.Column('priority', sa.String(length=32), nullable=True))
+
+    # Move the hot keys out of the JSON value of existing lifecycle rows
+    op.execute(
+        """
+        UPDATE analytics_data
+        SET status = metric_value->>'status',
+            previous_status = metric_value->>'previous_status',
+            priority = metric_value->>'priority',
+            metric_value = (metric_value::jsonb - 'status' - 'previous_status' - 'priority')::json
+        WHERE metric_key = 'task_lifecycle'
+        """
+    )
+
+    # Build the indexes after the backfill, it is much cheaper than maintaining them row by row
+    op.create_index('ix_analytics_data_status', 'analytics_data', ['status'])
+    op.create_index('ix_analytics_data_previous_status', 'analytics_data', ['previous_status'])
+    op.create_index('ix_analytics_data_priority', 'analytics_data', ['priority'])
+
+
+def downgrade():
+    op.execute(
+        """
+        UPDATE analytics_data
+        SET metric_value = (
+            metric_value::jsonb || jsonb_strip_nulls(jsonb_build_object(
+                'status', status,
+                'previous_status', previous_status,
+                'priority', priority
+            ))
+        )::json
+        WHERE metric_key = 'task_lifecycle'
+        """
+    )
+    op.drop_index('ix_analytics_data_priority', table_name='analytics_data')
+    op.drop_index('ix_analytics_data_previous_status', table_name='analytics_data')
+    op.drop_index('ix_analytics_data_status', table_name='analytics_data')
+    op.drop_column('analytics_data', 'priority')
+    op.drop_column('analytics_data', 'previous_status')
+    op.drop_column('analytics_data', 'status')
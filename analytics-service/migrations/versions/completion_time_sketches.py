@@ -0,0 +1,30 @@
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'completion_time_sketches'
+down_revision = 'analytics_data_event_id'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'completion_time_sketches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('department_id', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('priority', sa.String(length=32), server_default='', nullable=False),
+        sa.Column('sketch', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('count', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('company_id', 'department_id', 'priority', name='uq_completion_time_sketches_key')
+    )
+    # Fill the sketches from existing history with: python -m app.workers.rebuild_completion_sketches
+
+
+def downgrade():
+    op.drop_table('completion_time_sketches')
@@ -0,0 +1,21 @@
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'keyset_pagination_indexes'
+down_revision = 'task_current_state_department_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serve "WHERE owner = ? AND (sort, id) < (?, ?) ORDER BY sort DESC, id DESC LIMIT n" from the index
+    op.create_index('ix_dashboards_owner_updated_at_id', 'dashboards', ['owner_id', 'updated_at', 'id'])
+    op.create_index(
+        'ix_reports_requester_requested_at_id', 'reports', ['requested_by_user_id', 'requested_at', 'id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_reports_requester_requested_at_id', table_name='reports')
+    op.drop_index('ix_dashboards_owner_updated_at_id', table_name='dashboards')
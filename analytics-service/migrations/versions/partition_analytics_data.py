@@ -0,0 +1,117 @@
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db import partitions
+
+
+# revision identifiers, used by Alembic.
+revision = 'partition_analytics_data'
+down_revision = 'analytics_data_lifecycle_columns'
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    "id, metric_key, metric_value, status, previous_status, priority, timestamp, "
+    "company_id, department_id, user_id, task_id, created_at, updated_at"
+)
+PREMAKE_MONTHS = 3
+
+INDEXES = [
+    ('ix_analytics_data_timestamp', ['timestamp']),
+    ('ix_analytics_data_status', ['status']),
+    ('ix_analytics_data_previous_status', ['previous_status']),
+    ('ix_analytics_data_priority', ['priority']),
+    ('ix_analytics_data_metric_key_timestamp', ['metric_key', 'timestamp']),
+    ('ix_analytics_data_company_id_timestamp', ['company_id', 'timestamp']),
+    ('ix_analytics_data_department_id_timestamp', ['department_id', 'timestamp']),
+    ('ix_analytics_data_user_id_timestamp', ['user_id', 'timestamp']),
+    ('ix_analytics_data_task_id_timestamp', ['task_id', 'timestamp']),
+]
+
+
+def _create_table(partition_by=None):
+    kwargs = {"postgresql_partition_by": partition_by} if partition_by else {}
+    op.create_table(
+        'analytics_data',
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('analytics_data_id_seq')"), nullable=False),
+        sa.Column('metric_key', sa.String(), nullable=False),
+        sa.Column('metric_value', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(length=32), nullable=True),
+        sa.Column('previous_status', sa.String(length=32), nullable=True),
+        sa.Column('priority', sa.String(length=32), nullable=True),
+        sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.Column('department_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('task_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id', 'timestamp') if partition_by else sa.PrimaryKeyConstraint('id'),
+        **kwargs
+    )
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # Keep the id sequence alive when the old table is dropped
+    op.rename_table('analytics_data', 'analytics_data_unpartitioned')
+    op.execute(
+        "ALTER TABLE analytics_data_unpartitioned "
+        "RENAME CONSTRAINT analytics_data_pkey TO analytics_data_unpartitioned_pkey"
+    )
+    op.execute("ALTER SEQUENCE analytics_data_id_seq OWNED BY NONE")
+    op.execute("UPDATE analytics_data_unpartitioned SET timestamp = created_at WHERE timestamp IS NULL")
+
+    _create_table(partition_by='RANGE (timestamp)')
+
+    # One partition per month from the oldest row up to a few months ahead
+    oldest = bind.execute(sa.text("SELECT min(timestamp) FROM analytics_data_unpartitioned")).scalar()
+    now = datetime.now(timezone.utc)
+    month = partitions.month_start(oldest or now)
+    last_month = partitions.add_months(partitions.month_start(now), PREMAKE_MONTHS)
+    newest = bind.execute(sa.text("SELECT max(timestamp) FROM analytics_data_unpartitioned")).scalar()
+    if newest is not None:
+        last_month = max(last_month, partitions.month_start(newest))
+    while month <= last_month:
+        op.execute(partitions.create_partition_sql(month))
+        month = partitions.add_months(month, 1)
+    op.execute(partitions.create_default_partition_sql())
+
+    op.execute(
+        f"INSERT INTO analytics_data ({COLUMNS}) SELECT {COLUMNS} FROM analytics_data_unpartitioned"
+    )
+    op.drop_table('analytics_data_unpartitioned')
+    op.execute("ALTER SEQUENCE analytics_data_id_seq OWNED BY analytics_data.id")
+
+    # Indexes on the parent are created on every partition
+    for name, columns in INDEXES:
+        op.create_index(name, 'analytics_data', columns)
+
+
+def downgrade():
+    op.rename_table('analytics_data', 'analytics_data_partitioned')
+    op.execute(
+        "ALTER TABLE analytics_data_partitioned "
+        "RENAME CONSTRAINT analytics_data_pkey TO analytics_data_partitioned_pkey"
+    )
+    op.execute("ALTER SEQUENCE analytics_data_id_seq OWNED BY NONE")
+    _create_table()
+    op.execute(
+        f"INSERT INTO analytics_data ({COLUMNS}) SELECT {COLUMNS} FROM analytics_data_partitioned"
+    )
+    op.drop_table('analytics_data_partitioned')  # Drops all partitions as well
+    op.execute("ALTER SEQUENCE analytics_data_id_seq OWNED BY analytics_data.id")
+
+    op.create_index('ix_analytics_data_id', 'analytics_data', ['id'])
+    op.create_index('ix_analytics_data_metric_key', 'analytics_data', ['metric_key'])
+    op.create_index('ix_analytics_data_timestamp', 'analytics_data', ['timestamp'])
+    op.create_index('ix_analytics_data_company_id', 'analytics_data', ['company_id'])
+    op.create_index('ix_analytics_data_department_id', 'analytics_data', ['department_id'])
+    op.create_index('ix_analytics_data_user_id', 'analytics_data', ['user_id'])
+    op.create_index('ix_analytics_data_task_id', 'analytics_data', ['task_id'])
+    op.create_index('ix_analytics_data_status', 'analytics_data', ['status'])
+    op.create_index('ix_analytics_data_previous_status', 'analytics_data', ['previous_status'])
+    op.create_index('ix_analytics_data_priority', 'analytics_data', ['priority'])
@@ -0,0 +1,19 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'reports_claimed_at'
+down_revision = 'keyset_pagination_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('reports', sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+    # Reports left in "processing" by a crashed worker have no claim time; release them
+    op.execute("UPDATE reports SET status = 'pending' WHERE status = 'processing'")
+
+
+def downgrade():
+    op.drop_column('reports', 'claimed_at')
@@ -0,0 +1,35 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'task_activity_rollups'
+down_revision = 'task_current_state'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'task_activity_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('scope', sa.String(length=16), nullable=False),
+        sa.Column('scope_id', sa.Integer(), nullable=False),
+        sa.Column('granularity', sa.String(length=8), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('completed_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('transition_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'company_id', 'scope', 'scope_id', 'granularity', 'bucket_start',
+            name='uq_task_activity_rollups_bucket'
+        )
+    )
+    # Fill the buckets afterwards with: python -m app.workers.rebuild_rollups
+
+
+def downgrade():
+    op.drop_table('task_activity_rollups')
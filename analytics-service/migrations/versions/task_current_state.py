@@ -0,0 +1,34 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'task_current_state'
+down_revision = 'initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'task_current_state',
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.Column('department_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('priority', sa.String(), nullable=True),
+        sa.Column('task_created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('status_changed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('task_id')
+    )
+    op.create_index('ix_task_current_state_company_status', 'task_current_state', ['company_id', 'status'])
+    op.create_index('ix_task_current_state_status', 'task_current_state', ['status'])
+    # Fill the snapshot afterwards with: python -m app.workers.rebuild_task_state
+
+
+def downgrade():
+    op.drop_index('ix_task_current_state_status', table_name='task_current_state')
+    op.drop_index('ix_task_current_state_company_status', table_name='task_current_state')
+    op.drop_table('task_current_state')
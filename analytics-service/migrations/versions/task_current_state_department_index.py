@@ -0,0 +1,22 @@
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'task_current_state_department_index'
+down_revision = 'completion_time_sketches'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Covering index for the department comparison (index-only scan per company)
+    op.create_index(
+        'ix_task_current_state_company_department_status',
+        'task_current_state',
+        ['company_id', 'department_id', 'status'],
+        postgresql_include=['task_created_at', 'status_changed_at'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_task_current_state_company_department_status', table_name='task_current_state')
@@ -0,0 +1,68 @@
+import json
+from datetime import datetime, timezone
+
+from app.services import backfill_service
+
+
+def _task(task_id=1, **overrides):
+    task = {
+        "id": task_id,
+        "title": "Write report",
+        "priority": "HIGH",
+        "created_at": datetime(2024, 5, 1, 9),  # task-service stores naive UTC
+        "company_id": 10,
+        "department_id": 20,
+        "assignee_user_id": 30,
+    }
+    task.update(overrides)
+    return task
+
+
+def _change(change_id, task_id, old, new, changed_at):
+    return {"id": change_id, "task_id": task_id, "old_value": old, "new_value": new, "changed_at": changed_at}
+
+
+def _by_column(record):
+    return dict(zip(backfill_service.COPY_COLUMNS, record))
+
+
+def test_enum_names_and_reprs_map_to_event_values():
+    assert backfill_service.normalize_enum("IN_PROGRESS") == "in_progress"
+    assert backfill_service.normalize_enum("TaskStatus.DONE") == "done"
+    assert backfill_service.normalize_enum("open") == "open"
+    assert backfill_service.normalize_enum(None) is None
+
+
+def test_event_ids_are_stable_per_source_row():
+    first = backfill_service.backfill_event_id("tasks", 1, "created")
+
+    assert backfill_service.backfill_event_id("tasks", 1, "created") == first
+    assert backfill_service.backfill_event_id("tasks", 2, "created") != first
+    assert backfill_service.backfill_event_id("task_history", 1) != first
+
+
+def test_task_and_history_become_created_and_transition_rows():
+    history = [_change(5, 1, "TaskStatus.OPEN", "TaskStatus.IN_PROGRESS", datetime(2024, 5, 2, 10))]
+
+    created, transition = [_by_column(r) for r in backfill_service.lifecycle_records([_task()], history)]
+
+    assert (created["status"], created["previous_status"], created["priority"]) == ("created", None, "high")
+    assert json.loads(created["metric_value"]) == {"title": "Write report"}
+    assert created["timestamp"] == datetime(2024, 5, 1, 9, tzinfo=timezone.utc)
+    assert (transition["status"], transition["previous_status"], transition["priority"]) == ("in_progress", "open", None)
+    assert (transition["company_id"], transition["department_id"], transition["user_id"]) == (10, 20, 30)
+    assert transition["event_id"] == backfill_service.backfill_event_id("task_history", 5)
+
+
+def test_rows_before_since_and_orphan_history_are_skipped():
+    history = [
+        _change(1, 1, "OPEN", "IN_PROGRESS", datetime(2024, 4, 1)),
+        _change(2, 1, "IN_PROGRESS", "DONE", datetime(2024, 6, 1)),
+        _change(3, 99, "OPEN", "DONE", datetime(2024, 6, 1)),  # task not in this batch
+    ]
+
+    records = backfill_service.lifecycle_records(
+        [_task()], history, since=datetime(2024, 5, 15, tzinfo=timezone.utc)
+    )
+
+    assert [(_by_column(r)["status"], _by_column(r)["task_id"]) for r in records] == [("done", 1)]
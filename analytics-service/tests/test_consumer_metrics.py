@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.core.consumer_metrics import QueueMetrics
+from app.workers import event_consumer
+
+
+def test_counters_track_in_flight_processed_and_failed():
+    metrics = QueueMetrics("task_events_analytics")
+
+    metrics.started(3)
+    metrics.finished(True, 2)
+    metrics.finished(False)
+
+    snapshot = metrics.snapshot(queue_depth=7)
+    assert (snapshot["in_flight"], snapshot["processed"], snapshot["failed"]) == (0, 2, 1)
+    assert snapshot["queue"] == "task_events_analytics"
+    assert snapshot["queue_depth"] == 7
+
+
+def test_rate_counts_only_messages_since_the_previous_snapshot():
+    metrics = QueueMetrics("q")
+    metrics.started(5)
+    metrics.finished(True, 5)
+    metrics.snapshot(None)
+
+    metrics._last_snapshot_at -= 2  # pretend two seconds passed
+    metrics.started(4)
+    metrics.finished(True, 4)
+
+    assert metrics.snapshot(None)["rate_per_second"] == 2.0
+
+
+def test_message_age_uses_the_amqp_timestamp():
+    metrics = QueueMetrics("q")
+
+    # aio_pika returns naive UTC datetimes
+    metrics.received((datetime.now(timezone.utc) - timedelta(seconds=30)).replace(tzinfo=None))
+
+    assert 29 <= metrics.last_message_age_seconds < 35
+
+
+def test_bounded_handler_limits_concurrency(monkeypatch):
+    running = 0
+    peak = 0
+
+    async def handle_message(message, queue_name, handler):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return True
+
+    monkeypatch.setattr(event_consumer, "handle_message", handle_message)
+    metrics = QueueMetrics("q")
+
+    async def scenario():
+        callback = event_consumer.bounded_handler("q", None, asyncio.Semaphore(2), metrics)
+        message = type("Message", (), {"timestamp": None})()
+        await asyncio.gather(*(callback(message) for _ in range(6)))
+
+    asyncio.run(scenario())
+
+    assert peak == 2
+    assert (metrics.processed, metrics.failed, metrics.in_flight) == (6, 0, 0)
@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.services import department_service
+
+
+class CountingSession:
+    """Stands in for AsyncSession and records every statement it is asked to run."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(statement)
+        return SimpleNamespace(all=lambda: self.rows)
+
+
+def _row(department_id, completed, backlog, rank):
+    return SimpleNamespace(
+        company_id=1,
+        department_id=department_id,
+        created=completed + backlog,
+        completed=completed,
+        backlog=backlog,
+        avg_cycle_hours=12.5,
+        throughput_rank=rank,
+        throughput_share=completed / 30,
+        backlog_share=backlog / 10,
+    )
+
+
+def test_department_stats_use_a_single_query():
+    start, end = department_service.period_bounds(30, now=datetime(2024, 5, 31, 15, tzinfo=timezone.utc))
+    rows = [_row(department_id, 10, 2, 1) for department_id in range(1, 4)] + [_row(4, 0, 4, 4)]
+    db = CountingSession(rows)
+
+    stats = asyncio.run(department_service.get_department_stats(db, 1, start, end))
+
+    assert len(db.statements) == 1
+    assert [item["department_id"] for item in stats] == [1, 2, 3, 4]
+    assert stats[0]["throughput_per_day"] == round(10 / 30, 3)
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert "OVER (PARTITION BY" in sql
+    assert "FULL OUTER JOIN" in sql
+
+
+def test_period_bounds_cover_whole_days():
+    start, end = department_service.period_bounds(7, now=datetime(2024, 5, 31, 15, tzinfo=timezone.utc))
+    assert start == datetime(2024, 5, 25, tzinfo=timezone.utc)
+    assert end == datetime(2024, 6, 1, tzinfo=timezone.utc)
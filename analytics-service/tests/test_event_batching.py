@@ -0,0 +1,121 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from app.core.dedup import RecentEventFilter
+from app.workers import event_consumer
+
+
+class FakeMessage:
+    """Stands in for aio_pika's IncomingMessage and records how it was settled."""
+
+    def __init__(self, event_type, payload):
+        self.body = json.dumps({"event_type": event_type, "payload": payload}).encode()
+        self.timestamp = None
+        self.headers = {}
+        self.acks = []
+
+    async def ack(self, multiple=False):
+        self.acks.append(multiple)
+
+
+def _status_changed(task_id):
+    return FakeMessage("task_status_changed", {
+        "task_id": task_id,
+        "company_id": 1,
+        "old_status": "open",
+        "new_status": "in_progress",
+        "changed_at": "2024-05-01T10:00:00+00:00",
+    })
+
+
+@asynccontextmanager
+async def _fake_session():
+    yield object()
+
+
+def _patch_storage(monkeypatch, ingest):
+    async def invalidate(company_ids):
+        pass
+
+    monkeypatch.setattr(event_consumer, "recent_events", RecentEventFilter(100, 0.01))
+    monkeypatch.setattr(event_consumer, "AsyncSessionLocal", _fake_session)
+    monkeypatch.setattr(event_consumer.analytics_service, "ingest_task_events", ingest)
+    monkeypatch.setattr(event_consumer.result_cache, "invalidate_companies", invalidate)
+
+
+def test_batch_is_stored_in_one_write_and_acked_once(monkeypatch):
+    batches = []
+
+    async def ingest(db, payloads):
+        batches.append([p.task_id for p in payloads])
+        return len(payloads)
+
+    _patch_storage(monkeypatch, ingest)
+    messages = [_status_changed(task_id) for task_id in (1, 2, 3)]
+
+    failed = asyncio.run(event_consumer.process_task_batch(messages))
+
+    assert failed == 0
+    assert batches == [[1, 2, 3]]
+    # Only the last delivery tag is acked, with multiple=True
+    assert [m.acks for m in messages] == [[], [], [True]]
+
+
+def test_redelivered_events_are_acked_without_a_write(monkeypatch):
+    batches = []
+
+    async def ingest(db, payloads):
+        batches.append([p.task_id for p in payloads])
+        return len(payloads)
+
+    _patch_storage(monkeypatch, ingest)
+    asyncio.run(event_consumer.process_task_batch([_status_changed(1)]))
+    redelivered = _status_changed(1)
+
+    asyncio.run(event_consumer.process_task_batch([redelivered]))
+
+    assert batches == [[1]]
+    assert redelivered.acks == [False]
+
+
+def test_failed_batch_falls_back_to_single_messages(monkeypatch):
+    async def ingest(db, payloads):
+        raise RuntimeError("database is down")
+
+    handled = []
+
+    async def handle_message(message, queue_name, handler):
+        handled.append(message)
+        return False
+
+    _patch_storage(monkeypatch, ingest)
+    monkeypatch.setattr(event_consumer, "handle_message", handle_message)
+    messages = [_status_changed(task_id) for task_id in (1, 2)]
+
+    failed = asyncio.run(event_consumer.process_task_batch(messages))
+
+    assert failed == 2
+    assert handled == messages
+    assert all(not m.acks for m in messages)
+
+
+def test_batcher_flushes_by_size_and_by_time(monkeypatch):
+    flushed = []
+
+    async def process_task_batch(messages):
+        flushed.append(len(messages))
+        return 0
+
+    monkeypatch.setattr(event_consumer, "process_task_batch", process_task_batch)
+
+    async def scenario():
+        batcher = event_consumer.TaskEventBatcher(max_size=2, max_wait_ms=20)
+        for task_id in (1, 2, 3):
+            await batcher.add(_status_changed(task_id))
+        assert flushed == [2]
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+
+    assert flushed == [2, 1]
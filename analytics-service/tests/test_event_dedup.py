@@ -0,0 +1,98 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.core.dedup import BloomFilter, RecentEventFilter, derive_event_id
+from app.schemas.events import TaskStatusChangedPayload
+from app.services import analytics_service
+
+
+class InsertSession:
+    """Stands in for AsyncSession; the first statement (the INSERT) returns `inserted_ids`."""
+
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+        self.statements = []
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(statement)
+        ids = self.inserted_ids if len(self.statements) == 1 else []
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: list(ids)))
+
+
+def _payload(event_id, task_id=1):
+    return TaskStatusChangedPayload(
+        event_id=event_id, task_id=task_id, company_id=1,
+        old_status="open", new_status="done", changed_at=datetime(2024, 5, 1, tzinfo=timezone.utc),
+    )
+
+
+def _patch_derived_updates(monkeypatch):
+    applied = []
+
+    async def apply_rollup_deltas(db, deltas):
+        pass
+
+    async def apply_completion_times(db, payloads):
+        applied.extend(p.event_id for p in payloads)
+
+    monkeypatch.setattr(analytics_service.rollup_service, "apply_rollup_deltas", apply_rollup_deltas)
+    monkeypatch.setattr(analytics_service.completion_time_service, "apply_completion_times", apply_completion_times)
+    return applied
+
+
+def test_derived_event_id_is_stable_and_ignores_the_id_field():
+    payload = {"task_id": 1, "new_status": "done"}
+
+    first = derive_event_id("task_status_changed", payload)
+
+    assert derive_event_id("task_status_changed", dict(reversed(list(payload.items())))) == first
+    assert derive_event_id("task_status_changed", {**payload, "event_id": "x"}) == first
+    assert derive_event_id("task_created", payload) != first
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    added = [str(uuid.uuid4()) for _ in range(1000)]
+    for key in added:
+        bloom.add(key)
+
+    assert all(key in bloom for key in added)
+    false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(10000))
+    assert false_positives < 300
+
+
+def test_recent_filter_forgets_ids_two_generations_old():
+    recent = RecentEventFilter(capacity=10, error_rate=0.001)
+    old = uuid.uuid4()
+    recent.add(old)
+    for _ in range(9):
+        recent.add(uuid.uuid4())
+    assert old in recent  # in the previous generation after the first rotation
+
+    for _ in range(20):
+        recent.add(uuid.uuid4())
+    assert old not in recent
+
+
+def test_only_inserted_events_update_the_derived_tables(monkeypatch):
+    applied = _patch_derived_updates(monkeypatch)
+    new_id, stored_id = uuid.uuid4(), uuid.uuid4()
+    db = InsertSession(inserted_ids=[new_id])
+
+    stored = asyncio.run(analytics_service._store_task_events(db, [_payload(new_id), _payload(stored_id, 2)]))
+
+    assert [p.event_id for p in stored] == [new_id]
+    assert applied == [new_id]
+
+
+def test_duplicate_event_within_one_batch_is_counted_once(monkeypatch):
+    applied = _patch_derived_updates(monkeypatch)
+    event_id = uuid.uuid4()
+    db = InsertSession(inserted_ids=[event_id])
+
+    stored = asyncio.run(analytics_service._store_task_events(db, [_payload(event_id), _payload(event_id)]))
+
+    assert len(stored) == 1
+    assert applied == [event_id]
@@ -0,0 +1,123 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.core.leaderboard import LocalLeaderboard
+from app.schemas.events import TaskCompletedPayload
+from app.services import leaderboard_service
+
+
+class LeaderboardSession:
+    """Stands in for AsyncSession: `stored` event ids already exist, everything else is inserted."""
+
+    def __init__(self, stored=()):
+        self.stored = set(stored)
+        self.calls = []
+
+    async def scalar(self, statement):
+        self.calls.append("select")
+        params = statement.compile(dialect=postgresql.dialect()).params
+        return 1 if self.stored & set(params.values()) else None
+
+    async def execute(self, statement):
+        self.calls.append("insert")
+        event_id = statement.compile(dialect=postgresql.dialect()).params["event_id"]
+        inserted = event_id not in self.stored
+        self.stored.add(event_id)
+        return SimpleNamespace(first=lambda: (1,) if inserted else None)
+
+    async def commit(self):
+        self.calls.append("commit")
+
+    async def rollback(self):
+        self.calls.append("rollback")
+
+
+def _completed(event_id, completed_at=None):
+    return TaskCompletedPayload(
+        event_id=event_id, task_id=1, company_id=1, department_id=2, assignee_user_id=3, completed_at=completed_at
+    )
+
+
+def _record_increments(monkeypatch, db):
+    increments = []
+
+    async def increment_boards(metric, company_id, department_id, user_id, amount, ts):
+        increments.append((metric, user_id, amount, ts, list(db.calls)))
+
+    monkeypatch.setattr(settings, "LEADERBOARD_REDIS_ENABLED", True)
+    monkeypatch.setattr(leaderboard_service, "_increment_boards", increment_boards)
+    return increments
+
+
+def test_local_leaderboard_orders_by_score():
+    board = LocalLeaderboard()
+    board.increment(1, 3)
+    board.increment(2, 5)
+    board.increment(1, 4)
+
+    assert board.top(2) == [(1, 7), (2, 5)]
+    assert len(board) == 2
+
+
+def test_period_start_and_board_keys():
+    ts = datetime(2024, 5, 16, 13, 30, tzinfo=timezone.utc)  # a Thursday
+
+    assert leaderboard_service.period_start(ts, "week") == datetime(2024, 5, 13, tzinfo=timezone.utc)
+    assert leaderboard_service.period_start(ts, "month") == datetime(2024, 5, 1, tzinfo=timezone.utc)
+    assert leaderboard_service.period_start(ts, "all") is None
+    assert leaderboard_service.board_key("completed", 1, None, "all", None).endswith(":1:company:all:all")
+    assert leaderboard_service.board_key(
+        "completed", 1, 2, "week", datetime(2024, 5, 13, tzinfo=timezone.utc)
+    ).endswith(":1:department:2:week:2024-05-13")
+
+
+def test_boards_are_incremented_after_the_commit(monkeypatch):
+    db = LeaderboardSession()
+    increments = _record_increments(monkeypatch, db)
+    completed_at = datetime(2024, 5, 16, tzinfo=timezone.utc)
+
+    stored = asyncio.run(leaderboard_service.record_leaderboard_event(
+        db, "task_completed", _completed(uuid.uuid4(), completed_at)
+    ))
+
+    assert stored is True
+    [(metric, user_id, amount, ts, calls_before)] = increments
+    assert (metric, user_id, amount, ts) == ("completed", 3, 1.0, completed_at)
+    assert calls_before[-1] == "commit"
+
+
+def test_redelivered_event_without_timestamp_is_not_counted_again(monkeypatch):
+    db = LeaderboardSession()
+    increments = _record_increments(monkeypatch, db)
+    event_id = uuid.uuid4()
+    received_at = datetime(2024, 5, 16, 12, tzinfo=timezone.utc)
+
+    first = asyncio.run(leaderboard_service.record_leaderboard_event(db, "task_completed", _completed(event_id), received_at))
+    # Redelivered later: the AMQP timestamp is the same, the processing time is not
+    second = asyncio.run(leaderboard_service.record_leaderboard_event(db, "task_completed", _completed(event_id), None))
+
+    assert (first, second) == (True, False)
+    assert len(increments) == 1
+    assert increments[0][3] == received_at
+
+
+def test_redis_failure_after_commit_does_not_fail_the_event(monkeypatch):
+    db = LeaderboardSession()
+
+    async def increment_boards(*args):
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(settings, "LEADERBOARD_REDIS_ENABLED", True)
+    monkeypatch.setattr(leaderboard_service, "_increment_boards", increment_boards)
+
+    stored = asyncio.run(leaderboard_service.record_leaderboard_event(
+        db, "task_completed", _completed(uuid.uuid4(), datetime(2024, 5, 16, tzinfo=timezone.utc))
+    ))
+
+    assert stored is True
+    assert "rollback" not in db.calls
@@ -0,0 +1,78 @@
+import asyncio
+
+from app.core import retry
+from app.core.config import settings
+
+
+class FakeMessage:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+        self.settled = []
+
+    async def ack(self):
+        self.settled.append("ack")
+
+    async def nack(self, requeue=False):
+        self.settled.append(("nack", requeue))
+
+
+def _capture_republish(monkeypatch):
+    published = []
+
+    async def republish(message, routing_key, headers):
+        published.append((routing_key, headers))
+
+    monkeypatch.setattr(retry, "_republish", republish)
+    return published
+
+
+def test_backoff_doubles_per_attempt(monkeypatch):
+    monkeypatch.setattr(settings, "EVENT_RETRY_BASE_DELAY_MS", 1000)
+
+    assert [retry.retry_delay_ms(attempt) for attempt in (1, 2, 3)] == [1000, 2000, 4000]
+    assert retry.retry_queue_name("q", 2) == "q.retry.2000ms"
+
+
+def test_attempts_are_read_from_headers():
+    assert retry.attempts_of(FakeMessage()) == 0
+    assert retry.attempts_of(FakeMessage({retry.ATTEMPT_HEADER: 2})) == 2
+    assert retry.attempts_of(FakeMessage({retry.ATTEMPT_HEADER: "garbage"})) == 0
+
+
+def test_failed_message_goes_to_the_next_retry_queue(monkeypatch):
+    monkeypatch.setattr(settings, "EVENT_MAX_ATTEMPTS", 5)
+    monkeypatch.setattr(settings, "EVENT_RETRY_BASE_DELAY_MS", 1000)
+    published = _capture_republish(monkeypatch)
+    message = FakeMessage({retry.ATTEMPT_HEADER: 1})
+
+    asyncio.run(retry.retry_later(message, "q", RuntimeError("db down")))
+
+    [(routing_key, headers)] = published
+    assert routing_key == "q.retry.2000ms"
+    assert headers[retry.ATTEMPT_HEADER] == 2
+    assert headers[retry.ORIGINAL_QUEUE_HEADER] == "q"
+    assert headers[retry.LAST_ERROR_HEADER] == "db down"
+    assert message.settled == ["ack"]
+
+
+def test_message_is_dead_lettered_after_the_last_attempt(monkeypatch):
+    monkeypatch.setattr(settings, "EVENT_MAX_ATTEMPTS", 3)
+    published = _capture_republish(monkeypatch)
+    message = FakeMessage({retry.ATTEMPT_HEADER: 2})
+
+    asyncio.run(retry.retry_later(message, "q", RuntimeError("still down")))
+
+    assert published[0][0] == "q.dlq"
+    assert message.settled == ["ack"]
+
+
+def test_original_is_requeued_when_the_copy_cannot_be_published(monkeypatch):
+    async def republish(message, routing_key, headers):
+        raise ConnectionError("broker gone")
+
+    monkeypatch.setattr(retry, "_republish", republish)
+    message = FakeMessage()
+
+    asyncio.run(retry.dead_letter(message, "q", "bad payload"))
+
+    assert message.settled == [("nack", True)]
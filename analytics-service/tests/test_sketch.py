@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from app.core.sketch import DDSketch
+
+
+def _exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_quantiles_are_within_relative_accuracy():
+    rng = random.Random(42)
+    values = [rng.lognormvariate(3, 1.5) for _ in range(20000)]
+    sketch = DDSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.9, 0.95, 0.99):
+        exact = _exact_quantile(values, q)
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+
+
+def test_merge_equals_one_sketch_over_all_values():
+    rng = random.Random(7)
+    left_values = [rng.uniform(1, 100) for _ in range(1000)]
+    right_values = [rng.uniform(50, 500) for _ in range(1000)]
+    left, right, combined = DDSketch(), DDSketch(), DDSketch()
+    for value in left_values:
+        left.add(value)
+        combined.add(value)
+    for value in right_values:
+        right.add(value)
+        combined.add(value)
+
+    left.merge(right)
+
+    assert left.bins == combined.bins
+    assert (left.count, left.min, left.max) == (combined.count, combined.min, combined.max)
+    assert left.quantile(0.9) == combined.quantile(0.9)
+
+
+def test_merge_rejects_a_different_accuracy():
+    with pytest.raises(ValueError):
+        DDSketch(0.01).merge(DDSketch(0.02))
+
+
+def test_zeros_empty_sketch_and_serialisation():
+    assert DDSketch().quantile(0.5) is None
+
+    sketch = DDSketch()
+    for value in (0, 0, 0, 10, 20):
+        sketch.add(value)
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == pytest.approx(20, rel=0.01)
+
+    restored = DDSketch.from_dict(sketch.to_dict())
+    assert restored.to_dict() == sketch.to_dict()
+
+
+def test_collapsing_keeps_the_high_quantiles():
+    sketch = DDSketch(relative_accuracy=0.01, max_bins=64)
+    values = [1.05 ** i for i in range(500)]
+    for value in values:
+        sketch.add(value)
+
+    assert len(sketch.bins) <= 64
+    assert sketch.count == len(values)
+    assert sketch.quantile(0.99) == pytest.approx(_exact_quantile(values, 0.99), rel=0.02)
@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+from app.schemas.events import TaskCreatedPayload, TaskStatusChangedPayload
+from app.db.models.analytics_data import AnalyticsData
+from app.services import analytics_service
+
+CREATED_AT = datetime(2024, 5, 1, 9, tzinfo=timezone.utc)
+CHANGED_AT = datetime(2024, 5, 2, 17, tzinfo=timezone.utc)
+
+
+def _created(task_id=1):
+    return TaskCreatedPayload(
+        task_id=task_id, company_id=1, department_id=2, assignee_user_id=3,
+        title="Write report", priority="high", created_at=CREATED_AT,
+    )
+
+
+def _status_changed(task_id=1, old="open", new="done"):
+    return TaskStatusChangedPayload(
+        task_id=task_id, company_id=1, department_id=2, assignee_user_id=3,
+        old_status=old, new_status=new, changed_at=CHANGED_AT,
+    )
+
+
+def test_created_event_fills_the_lifecycle_columns():
+    row = analytics_service._lifecycle_row(_created())
+
+    assert (row["status"], row["previous_status"], row["priority"]) == ("created", None, "high")
+    assert row["metric_value"] == {"title": "Write report"}
+    assert row["timestamp"] == CREATED_AT
+
+
+def test_status_change_keeps_only_extra_attributes_in_json():
+    row = analytics_service._lifecycle_row(_status_changed())
+
+    assert (row["status"], row["previous_status"], row["priority"]) == ("done", "open", None)
+    assert row["metric_value"] == {}
+    assert row["timestamp"] == CHANGED_AT
+
+
+def test_snapshot_rows_of_one_task_are_collapsed_in_event_order():
+    states = [
+        analytics_service._task_state(_status_changed(new="done")),
+        analytics_service._task_state(_created()),
+    ]
+
+    [state] = analytics_service._collapse_task_states(states)
+
+    assert state["status"] == "done"
+    assert state["priority"] == "high"
+    assert state["task_created_at"] == CREATED_AT
+    assert state["status_changed_at"] == CHANGED_AT
+
+
+def test_lifecycle_row_keys_match_the_analytics_data_columns():
+    row = analytics_service._lifecycle_row(_created())
+
+    assert set(row) <= set(AnalyticsData.__table__.columns.keys())
+    for column in ("status", "previous_status", "priority"):
+        assert AnalyticsData.__table__.columns[column].index
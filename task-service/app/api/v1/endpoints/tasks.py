@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from app import schemas, models
 from app.api import deps
 from app.crud import crud_task
+from app.core.config import settings
 from app.db.session import get_db
 
 router = APIRouter()
@@ -139,4 +140,47 @@ def restore_task(
     restored_task = crud_task.restore(db=db, task_id=task_id)
     if not restored_task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Задача не найдена в архиве или произошла ошибка")
-    return restored_task 
\ No newline at end of file
+    return restored_task
+
+@router.post("/bulk", response_model=schemas.TaskBulkResult)
+def bulk_tasks(
+    *,
+    db: Session = Depends(get_db),
+    bulk_in: schemas.TaskBulkRequest,
+    current_user_id: int = Depends(deps.get_current_user_id),
+    company_id: int = Depends(deps.get_current_company_id),
+    current_role: str = Depends(deps.get_current_user_role),
+) -> Any:
+    """Массово обновляет, архивирует или восстанавливает задачи компании.
+
+    Все изменения применяются в одной транзакции. Задачи, которые не найдены
+    или недоступны пользователю, не прерывают операцию и возвращаются в ответе.
+    """
+    task_ids = list(dict.fromkeys(bulk_in.task_ids)) # Убираем дубли, сохраняя порядок
+    if len(task_ids) > settings.TASK_BULK_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Не больше {settings.TASK_BULK_MAX_IDS} задач за один запрос",
+        )
+
+    changes = None
+    if bulk_in.action == schemas.TaskBulkAction.UPDATE:
+        changes = bulk_in.changes.model_dump(exclude_unset=True, exclude_none=True) if bulk_in.changes else {}
+        if not changes:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Не указаны изменения для задач")
+    elif bulk_in.changes is not None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Изменения допустимы только для action=update")
+
+    # Права как в PUT /tasks/{id}: менеджер/админ - любые задачи компании, остальные - свои
+    is_manager_or_admin = current_role in [deps.MembershipRole.MANAGER, deps.MembershipRole.ADMIN]
+    result = crud_task.bulk_apply(
+        db=db,
+        company_id=company_id,
+        task_ids=task_ids,
+        action=bulk_in.action,
+        modifier_user_id=current_user_id,
+        changes=changes,
+        restrict_to_user_id=None if is_manager_or_admin else current_user_id,
+    )
+    return schemas.TaskBulkResult(action=bulk_in.action, **result)
+
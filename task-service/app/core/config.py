@@ -51,6 +51,9 @@ class Settings(BaseSettings):
             return v
         return [] # Возвращаем пустой список по умолчанию
 
+    # Максимум задач в одном запросе POST /tasks/bulk
+    TASK_BULK_MAX_IDS: int = 500
+
     # Локальное хранилище файлов
     UPLOAD_DIRECTORY: str = "./uploads" # Путь относительно корня проекта
 
@@ -63,6 +66,29 @@ class Settings(BaseSettings):
     # URI для информации, pika обычно использует отдельные параметры
     RABBITMQ_URI: Optional[str] = None
     RABBITMQ_EXCHANGE_NAME: str = "task_events" # Имя обменника для событий задач
+    # Издатель (app.core.publisher): очередь сообщений до I/O-потока и ожидание подтверждения
+    RABBITMQ_PUBLISHER_QUEUE_SIZE: int = 10000
+    RABBITMQ_PUBLISH_TIMEOUT_SECONDS: float = 10.0
+    RABBITMQ_RECONNECT_DELAY_SECONDS: float = 5.0
+
+    # Потребитель task_service_queue (python -m app.workers.consumer):
+    # число потоков-воркеров и окно неподтвержденных сообщений на всех.
+    # Каждый воркер держит свою сессию и соединение из пула SQLAlchemy (5 + 10 overflow по умолчанию)
+    CONSUMER_WORKERS: int = 4
+    CONSUMER_PREFETCH_COUNT: int = 16
+
+    # Outbox: события пишутся в таблицу outbox вместе с изменениями,
+    # релей (python -m app.workers.outbox_relay) публикует их пачками
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_RETENTION_HOURS: int = 24 # Сколько хранить опубликованные события
+    OUTBOX_ERROR_DELAY_SECONDS: float = 5.0 # Пауза после ошибки итерации релея
+
+    # Удаление задач компании по company.deleted (app.workers.company_deletion):
+    # размер порции задач на транзакцию, пауза между порциями и период повтора незавершенных заданий
+    COMPANY_DELETION_CHUNK_SIZE: int = 500
+    COMPANY_DELETION_THROTTLE_SECONDS: float = 0.2
+    COMPANY_DELETION_RETRY_INTERVAL_SECONDS: float = 60.0
 
     @field_validator("RABBITMQ_URI", mode="before")
     def assemble_rabbitmq_connection(
@@ -0,0 +1,176 @@
+# task-service/app/core/consumer.py
+"""Многопоточный потребитель очереди task_service_queue.
+
+Соединение с RabbitMQ живет в главном потоке (pika не потокобезопасна),
+обработка - в N потоках-воркерах, у каждого своя сессия БД. Сообщение
+направляется воркеру по хэшу ключа сущности (company:<id>, user:<id>),
+поэтому сообщения одной сущности обрабатываются по порядку. Воркеры
+подтверждают сообщения через add_callback_threadsafe.
+
+Долгие операции в воркерах не выполняются: company.deleted только
+записывает задание, удаляет задачи отдельный поток CompanyDeletionRunner.
+Иначе сообщения, попавшие к занятому воркеру, держали бы окно prefetch
+и останавливали доставку всем воркерам.
+
+Остановка (SIGINT/SIGTERM): новые сообщения больше не принимаются,
+воркеры дообрабатывают уже полученные, после чего соединение закрывается.
+"""
+import functools
+import json
+import logging
+import queue
+import signal
+import threading
+import zlib
+from typing import List, Optional
+
+import pika
+from pika.adapters.blocking_connection import BlockingChannel
+
+from app.core.messaging import (
+    PermanentMessageError,
+    TASK_SERVICE_QUEUE,
+    declare_and_bind_queue,
+    get_connection_parameters,
+    handle_message,
+    message_entity_key,
+)
+from app.db.session import SessionLocal
+from app.workers.company_deletion import CompanyDeletionRunner
+
+logger = logging.getLogger(__name__)
+
+# Сигнал воркеру завершиться (после всех сообщений в его очереди)
+_STOP = object()
+
+
+class ConsumerWorker(threading.Thread):
+    def __init__(self, index: int, connection: pika.BlockingConnection, channel: BlockingChannel):
+        super().__init__(name=f"consumer-worker-{index}", daemon=True)
+        self.connection = connection
+        self.channel = channel
+        self.inbox: "queue.Queue" = queue.Queue()
+
+    def _settle(self, delivery_tag: int, ok: bool) -> None:
+        # Вызов методов канала разрешен только из потока соединения
+        if ok:
+            callback = functools.partial(self.channel.basic_ack, delivery_tag=delivery_tag)
+        else:
+            callback = functools.partial(self.channel.basic_nack, delivery_tag=delivery_tag, requeue=False)
+        self.connection.add_callback_threadsafe(callback)
+
+    def run(self) -> None:
+        db = SessionLocal()
+        try:
+            while True:
+                item = self.inbox.get()
+                if item is _STOP:
+                    return
+                delivery_tag, routing_key, message = item
+                try:
+                    handle_message(db, routing_key, message)
+                    self._settle(delivery_tag, ok=True)
+                except PermanentMessageError as e:
+                    logger.warning(f"Rejecting message with routing key '{routing_key}': {e}")
+                    db.rollback()
+                    self._settle(delivery_tag, ok=False)
+                except Exception as e:
+                    logger.error(f"Error processing message with routing key '{routing_key}': {e}", exc_info=True)
+                    db.rollback() # Откатываем транзакцию БД
+                    # Отклоняем без повторной постановки в очередь, т.к. ошибка скорее всего системная
+                    self._settle(delivery_tag, ok=False)
+        finally:
+            db.close()
+
+
+class ConsumerRunner:
+    def __init__(self, workers: int, prefetch_count: int):
+        self.worker_count = max(1, workers)
+        self.prefetch_count = prefetch_count
+        self.connection: Optional[pika.BlockingConnection] = None
+        self.channel: Optional[BlockingChannel] = None
+        self.workers: List[ConsumerWorker] = []
+        self.deletion_runner: Optional[CompanyDeletionRunner] = None
+        self._consumer_tag: Optional[str] = None
+
+    def _on_message(self, ch, method, properties, body) -> None:
+        try:
+            message = json.loads(body.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            logger.error(f"Failed to decode JSON message body: {e}. Body: {body[:100]}...")
+            # Отклоняем сообщение без повторной постановки в очередь
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+            return
+        if not isinstance(message, dict):
+            logger.error(f"Unexpected message body with routing key '{method.routing_key}': {body[:100]}...")
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+            return
+        key = message_entity_key(method.routing_key, message)
+        worker = self.workers[zlib.crc32(key.encode()) % self.worker_count]
+        worker.inbox.put((method.delivery_tag, method.routing_key, message))
+
+    def request_stop(self, *_args) -> None:
+        """Перестать принимать сообщения; можно вызывать из обработчика сигнала."""
+        logger.info("Stopping consumer: draining in-flight messages...")
+        if self.connection is not None and self.connection.is_open:
+            self.connection.add_callback_threadsafe(self._cancel_consumer)
+
+    def _cancel_consumer(self) -> None:
+        if self.channel is not None and self.channel.is_open:
+            self.channel.stop_consuming(self._consumer_tag)
+
+    def _drain_workers(self) -> None:
+        for worker in self.workers:
+            worker.inbox.put(_STOP)
+        # Пока воркеры дообрабатывают, соединение должно обслуживать их ack
+        while any(worker.is_alive() for worker in self.workers):
+            self.connection.process_data_events(time_limit=0.2)
+        self.connection.process_data_events(time_limit=0)
+
+    def run(self) -> None:
+        logger.info("Starting RabbitMQ consumer...")
+        try:
+            self.connection = pika.BlockingConnection(get_connection_parameters())
+        except pika.exceptions.AMQPConnectionError as e:
+            logger.error(f"Cannot start consumer: failed to connect to RabbitMQ: {e}")
+            return
+        self.channel = self.connection.channel()
+        if not declare_and_bind_queue(self.channel):
+            logger.error("Cannot start consumer: Failed to declare/bind queue.")
+            self.connection.close()
+            return
+
+        # Не больше prefetch_count неподтвержденных сообщений на все воркеры
+        self.channel.basic_qos(prefetch_count=self.prefetch_count)
+        self.workers = [ConsumerWorker(i, self.connection, self.channel) for i in range(self.worker_count)]
+        for worker in self.workers:
+            worker.start()
+        self.deletion_runner = CompanyDeletionRunner()
+        self.deletion_runner.start()
+
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.request_stop)
+            signal.signal(signal.SIGINT, self.request_stop)
+
+        self._consumer_tag = self.channel.basic_consume(
+            queue=TASK_SERVICE_QUEUE, on_message_callback=self._on_message, auto_ack=False
+        )
+        logger.info(
+            f"Consumer started with {self.worker_count} workers, prefetch={self.prefetch_count}. Waiting for messages..."
+        )
+        try:
+            # Возвращается после stop_consuming
+            self.channel.start_consuming()
+            self._drain_workers()
+        except Exception as e:
+            logger.error(f"Consumer stopped due to an error: {e}", exc_info=True)
+            # Неподтвержденные сообщения вернутся в очередь после закрытия соединения
+        finally:
+            for worker in self.workers:
+                if worker.is_alive():
+                    worker.inbox.put(_STOP)
+            # Прерванное задание продолжится при следующем запуске
+            self.deletion_runner.stop()
+            if self.connection.is_open:
+                self.connection.close()
+            logger.info("RabbitMQ consumer stopped.")
@@ -1,33 +1,32 @@
 # task-service/app/core/messaging.py
 import pika
-import json
 import logging
-from typing import Any, Dict
+import threading
+from typing import Any, Dict, Optional
 
 from sqlalchemy.orm import Session # Импортируем Session
 
 from app.core.config import settings
-from app.db.session import SessionLocal # Для доступа к БД
+from app.core.publisher import ThreadedPublisher
 from app.crud import crud_task # Импортируем CRUD операции для задач
 
 logger = logging.getLogger(__name__)
 
+# Соединение и канал потребителя (start_consuming); публикация идет через publisher
 connection = None
 channel = None
+publisher: Optional[ThreadedPublisher] = None
+_publisher_lock = threading.Lock()
 
 # Имена обменников, которые мы слушаем (предполагаемые)
 USER_EVENTS_EXCHANGE = "user_events"
 TEAM_EVENTS_EXCHANGE = "team_events"
 TASK_SERVICE_QUEUE = "task_service_queue"  # Имя нашей очереди
 
-def get_rabbitmq_connection():
-    """Устанавливает (или переиспользует) соединение с RabbitMQ."""
-    global connection
-    if connection and connection.is_open:
-        return connection
-    
+def get_connection_parameters() -> pika.ConnectionParameters:
+    """Параметры подключения к RabbitMQ из настроек."""
     credentials = pika.PlainCredentials(settings.RABBITMQ_USER, settings.RABBITMQ_PASSWORD)
-    parameters = pika.ConnectionParameters(
+    return pika.ConnectionParameters(
         host=settings.RABBITMQ_HOST,
         port=settings.RABBITMQ_PORT,
         virtual_host=settings.RABBITMQ_VHOST,
@@ -36,8 +35,15 @@ def get_rabbitmq_connection():
         heartbeat=600, # 10 минут
         blocked_connection_timeout=300 # 5 минут
     )
+
+def get_rabbitmq_connection():
+    """Устанавливает (или переиспользует) соединение с RabbitMQ."""
+    global connection
+    if connection and connection.is_open:
+        return connection
+    
     try:
-        connection = pika.BlockingConnection(parameters)
+        connection = pika.BlockingConnection(get_connection_parameters())
         logger.info("Successfully connected to RabbitMQ.")
         return connection
     except pika.exceptions.AMQPConnectionError as e:
@@ -72,45 +78,40 @@ def get_rabbitmq_channel():
         connection = None # Закрываем и соединение при ошибке канала
         return None
 
+def get_publisher() -> ThreadedPublisher:
+    """Возвращает общий для процесса издатель (создает и запускает его при первом вызове)."""
+    global publisher
+    with _publisher_lock:
+        if publisher is None:
+            publisher = ThreadedPublisher(get_connection_parameters(), settings.RABBITMQ_EXCHANGE_NAME)
+            publisher.start()
+        return publisher
+
 def publish_message(routing_key: str, message_body: Dict[str, Any]):
     """
-    Публикует сообщение в настроенный обменник RabbitMQ.
+    Публикует сообщение в настроенный обменник RabbitMQ и ждет подтверждения брокера.
+    Потокобезопасна: сообщения из разных потоков уходят через I/O-поток издателя.
     
     Args:
         routing_key: Ключ маршрутизации (для fanout не используется, но может понадобиться для других типов).
         message_body: Тело сообщения (словарь Python).
     """
-    ch = get_rabbitmq_channel()
-    if not ch:
-        logger.error("Cannot publish message: RabbitMQ channel is not available.")
-        return False
-
     try:
-        # Сериализуем сообщение в JSON строку
-        message_json = json.dumps(message_body, default=str) # default=str для обработки datetime и др.
-        
-        ch.basic_publish(
-            exchange=settings.RABBITMQ_EXCHANGE_NAME,
-            routing_key=routing_key, # Для fanout можно оставить пустым
-            body=message_json,
-            properties=pika.BasicProperties(
-                content_type="application/json",
-                delivery_mode=2,  # Делает сообщение персистентным (если очередь durable)
-            )
-        )
+        future = get_publisher().publish(routing_key, message_body)
+        future.result(timeout=settings.RABBITMQ_PUBLISH_TIMEOUT_SECONDS)
         logger.info(f"Message published to exchange '{settings.RABBITMQ_EXCHANGE_NAME}' with routing key '{routing_key}'")
         return True
     except Exception as e:
         logger.error(f"Failed to publish message to RabbitMQ: {e}")
-        # Можно попытаться переподключиться или просто вернуть False
-        global channel, connection
-        channel = None
-        connection = None
         return False
 
 def close_rabbitmq_connection():
-    """Закрывает соединение с RabbitMQ."""
-    global connection, channel
+    """Закрывает соединение с RabbitMQ и останавливает издателя."""
+    global connection, channel, publisher
+    with _publisher_lock:
+        if publisher is not None:
+            publisher.stop()
+            publisher = None
     if channel and channel.is_open:
         try:
             channel.close()
@@ -166,95 +167,66 @@ def declare_and_bind_queue(ch):
         logger.error(f"Error declaring/binding queue '{TASK_SERVICE_QUEUE}': {e}")
         return False
 
-def message_callback(ch, method, properties, body):
-    """Обработчик входящих сообщений RabbitMQ."""
-    routing_key = method.routing_key
-    db: Session = SessionLocal() # Получаем сессию БД
-    try:
-        message = json.loads(body.decode('utf-8'))
-        logger.info(f"Received message with routing key '{routing_key}': {message}")
+class PermanentMessageError(Exception):
+    """Сообщение невозможно обработать (повтор не поможет)."""
 
-        # --- Логика обработки сообщений --- #
-        if routing_key == "company.deleted":
-            company_id = message.get("id")
-            if company_id:
-                logger.info(f"Processing company.deleted for company_id: {company_id}")
-                try:
-                    deleted_count = crud_task.task.delete_by_company_id(db=db, company_id=company_id) # Используем crud_task.task
-                    db.commit() # Фиксируем удаление
-                    logger.info(f"Successfully deleted {deleted_count} tasks for deleted company {company_id}.")
-                except Exception as e_crud:
-                    logger.error(f"Error deleting tasks for company {company_id}: {e_crud}")
-                    db.rollback() # Откатываем транзакцию при ошибке
-            else:
-                logger.warning("Received company.deleted event without 'id'.")
 
-        elif routing_key == "user.deleted":
-            user_id = message.get("id")
-            if user_id:
-                logger.info(f"Processing user.deleted for user_id: {user_id}")
-                try:
-                    unassigned_count = crud_task.task.unassign_by_user_id(db=db, user_id=user_id) # Используем crud_task.task
-                    db.commit() # Фиксируем снятие назначений
-                    logger.info(f"Successfully unassigned {unassigned_count} tasks from deleted user {user_id}.")
-                except Exception as e_crud:
-                    logger.error(f"Error unassigning tasks for user {user_id}: {e_crud}")
-                    db.rollback() # Откатываем транзакцию
-            else:
-                logger.warning("Received user.deleted event without 'id'.")
+def message_entity_key(routing_key: str, message: Dict[str, Any]) -> str:
+    """Ключ сущности, к которой относится сообщение.
 
-        # TODO: Добавить обработку других событий (user.updated, team.*, etc.)
-        # elif routing_key == "user.updated": ...
-        # elif routing_key.startswith("team."): ...
-        else:
-            logger.warning(f"Received message with unhandled routing key: {routing_key}")
+    Сообщения с одним ключом обрабатываются одним воркером по очереди,
+    поэтому их порядок сохраняется.
+    """
+    if routing_key.startswith("company."):
+        return f"company:{message.get('id')}"
+    if routing_key.startswith("user."):
+        return f"user:{message.get('id')}"
+    return routing_key
 
-        # Подтверждаем успешную обработку сообщения RabbitMQ
-        # Делаем это только если вся обработка внутри try прошла успешно
-        ch.basic_ack(delivery_tag=method.delivery_tag)
-        logger.debug(f"Message acknowledged for routing key: {routing_key}")
 
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to decode JSON message body: {e}. Body: {body[:100]}...")
-        # Отклоняем сообщение без повторной постановки в очередь
-        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
-    except Exception as e:
-        logger.error(f"Generic error processing message with routing key '{routing_key}': {e}", exc_info=True)
-        db.rollback() # Откатываем транзакцию БД на всякий случай
-        # Отклоняем сообщение без повторной постановки в очередь, т.к. ошибка скорее всего системная
-        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
-    finally:
-        db.close() # Всегда закрываем сессию
+def handle_message(db: Session, routing_key: str, message: Dict[str, Any]) -> None:
+    """Обрабатывает одно входящее сообщение и коммитит результат.
 
-def start_consuming():
-    """Запускает процесс потребления сообщений из очереди."""
-    logger.info("Starting RabbitMQ consumer...")
-    ch = get_rabbitmq_channel()
-    if not ch:
-        logger.error("Cannot start consumer: RabbitMQ channel is not available.")
-        return
+    Ошибки пробрасываются: решение ack/nack принимает вызывающий код.
+    """
+    logger.info(f"Received message with routing key '{routing_key}': {message}")
+
+    # --- Логика обработки сообщений --- #
+    if routing_key == "company.deleted":
+        company_id = message.get("id")
+        if not company_id:
+            raise PermanentMessageError("Received company.deleted event without 'id'.")
+        logger.info(f"Processing company.deleted for company_id: {company_id}")
+        # Локальный импорт: модуль воркера импортирует SessionLocal и CRUD
+        from app.workers.company_deletion import schedule_company_deletion
+        # Только записываем задание: удаление порциями выполняет отдельный поток
+        # (CompanyDeletionRunner), воркер и окно prefetch не блокируются
+        schedule_company_deletion(db, company_id)
+
+    elif routing_key == "user.deleted":
+        user_id = message.get("id")
+        if not user_id:
+            raise PermanentMessageError("Received user.deleted event without 'id'.")
+        logger.info(f"Processing user.deleted for user_id: {user_id}")
+        unassigned_count = crud_task.unassign_by_user_id(db=db, user_id=user_id)
+        db.commit() # Фиксируем снятие назначений
+        logger.info(f"Successfully unassigned {unassigned_count} tasks from deleted user {user_id}.")
+
+    # TODO: Добавить обработку других событий (user.updated, team.*, etc.)
+    # elif routing_key == "user.updated": ...
+    # elif routing_key.startswith("team."): ...
+    else:
+        logger.warning(f"Received message with unhandled routing key: {routing_key}")
 
-    if not declare_and_bind_queue(ch):
-        logger.error("Cannot start consumer: Failed to declare/bind queue.")
-        return
 
-    # Указываем, что будем потреблять сообщения из нашей очереди
-    # auto_ack=False - подтверждение обработки вручную (через basic_ack/basic_nack)
-    ch.basic_consume(queue=TASK_SERVICE_QUEUE, on_message_callback=message_callback, auto_ack=False)
+def start_consuming():
+    """Запускает процесс потребления сообщений из очереди (несколько воркеров, см. app.core.consumer)."""
+    from app.core.consumer import ConsumerRunner # Локальный импорт: consumer импортирует этот модуль
 
-    logger.info("Consumer started. Waiting for messages...")
-    try:
-        # Запуск бесконечного цикла ожидания сообщений
-        # Этот вызов блокирующий
-        ch.start_consuming()
-    except KeyboardInterrupt:
-        logger.info("Consumer stopped by user.")
-    except Exception as e:
-        logger.error(f"Consumer stopped due to an error: {e}")
-    finally:
-        # Закрываем соединение при остановке потребителя
-        logger.info("Closing RabbitMQ connection...")
-        close_rabbitmq_connection()
+    ConsumerRunner(
+        workers=settings.CONSUMER_WORKERS,
+        prefetch_count=settings.CONSUMER_PREFETCH_COUNT,
+    ).run()
 
 # Пример использования:
 # def some_function():
@@ -264,4 +236,4 @@ def start_consuming():
 # Соединение можно инициализировать при старте и закрывать при остановке приложения
 # в lifespan (main.py)
 
-# Потребителя (start_consuming) обычно запускают как отдельный процесс/скрипт. 
\ No newline at end of file
+# Потребителя (start_consuming) запускают как отдельный процесс: python -m app.workers.consumer 
\ No newline at end of file
@@ -0,0 +1,208 @@
+# task-service/app/core/publisher.py
+"""Потокобезопасный издатель RabbitMQ с подтверждениями (publisher confirms).
+
+pika не потокобезопасна, поэтому соединение и канал живут в отдельном
+I/O-потоке (SelectConnection). Другие потоки только кладут сообщения в
+очередь и будят I/O-поток через add_callback_threadsafe; публикации из
+разных потоков не блокируют друг друга и не портят канал.
+
+Подтверждения конвейерные: сообщения отправляются подряд, не дожидаясь
+ответа на каждое, а брокер подтверждает их пачками (Basic.Ack с
+multiple=True). Каждому сообщению соответствует Future, который
+завершается True при ack и исключением при nack или потере соединения
+(тогда сообщение нужно отправить повторно - доставка at-least-once).
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+
+import pika
+from pika.spec import Basic
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PublishNackError(Exception):
+    """Брокер не принял сообщение (Basic.Nack)."""
+
+
+class PublisherConnectionError(ConnectionError):
+    """Соединение закрылось до подтверждения сообщения."""
+
+
+# (routing_key, body, properties, future)
+_Outgoing = Tuple[str, bytes, pika.BasicProperties, Future]
+
+
+class ThreadedPublisher:
+    def __init__(self, parameters: pika.ConnectionParameters, exchange: str, exchange_type: str = "fanout"):
+        self.parameters = parameters
+        self.exchange = exchange
+        self.exchange_type = exchange_type
+        self._outgoing: "queue.Queue[_Outgoing]" = queue.Queue(maxsize=settings.RABBITMQ_PUBLISHER_QUEUE_SIZE)
+        # delivery_tag -> Future, в порядке отправки
+        self._unconfirmed: "OrderedDict[int, Future]" = OrderedDict()
+        self._delivery_tag = 0
+        self._connection: Optional[pika.SelectConnection] = None
+        self._channel = None
+        self._ready = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # --- Вызывается из любых потоков ---
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="rabbitmq-publisher", daemon=True)
+                self._thread.start()
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Запускает I/O-поток и ждет готовности канала. False - брокер пока недоступен."""
+        self.start()
+        return self._ready.wait(timeout)
+
+    def publish(self, routing_key: str, message_body: Any, properties: Optional[pika.BasicProperties] = None) -> Future:
+        """Ставит сообщение в очередь на публикацию и возвращает Future его подтверждения."""
+        self.start()
+        future: Future = Future()
+        body = message_body if isinstance(message_body, bytes) else json.dumps(message_body, default=str).encode()
+        properties = properties or pika.BasicProperties(content_type="application/json", delivery_mode=2)
+        # Блокируется при переполнении очереди (брокер недоступен долго) - естественный backpressure
+        self._outgoing.put((routing_key, body, properties, future), timeout=settings.RABBITMQ_PUBLISH_TIMEOUT_SECONDS)
+        connection = self._connection
+        if connection is not None and self._ready.is_set():
+            try:
+                connection.ioloop.add_callback_threadsafe(self._drain)
+            except Exception:
+                pass # Соединение закрывается; сообщение уйдет после переподключения
+        return future
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Останавливает I/O-поток; неподтвержденные сообщения завершаются ошибкой."""
+        self._stopping = True
+        connection = self._connection
+        if connection is not None:
+            try:
+                connection.ioloop.add_callback_threadsafe(self._close)
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # --- Работает только в I/O-потоке ---
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._connection = pika.SelectConnection(
+                self.parameters,
+                on_open_callback=self._on_connection_open,
+                on_open_error_callback=self._on_connection_error,
+                on_close_callback=self._on_connection_closed,
+            )
+            self._connection.ioloop.start()
+            # ioloop остановлен - соединение закрыто
+            self._ready.clear()
+            self._fail_unconfirmed(PublisherConnectionError("RabbitMQ connection closed before confirm"))
+            if not self._stopping:
+                time.sleep(settings.RABBITMQ_RECONNECT_DELAY_SECONDS)
+        self._fail_pending(PublisherConnectionError("Publisher stopped"))
+
+    def _on_connection_open(self, connection) -> None:
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_error(self, connection, error) -> None:
+        logger.error(f"Failed to connect to RabbitMQ: {error}")
+        connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason) -> None:
+        self._channel = None
+        if not self._stopping:
+            logger.warning(f"RabbitMQ publisher connection closed: {reason}")
+        connection.ioloop.stop()
+
+    def _on_channel_open(self, channel) -> None:
+        self._channel = channel
+        channel.add_on_close_callback(self._on_channel_closed)
+        channel.exchange_declare(
+            exchange=self.exchange,
+            exchange_type=self.exchange_type,
+            durable=True,
+            callback=self._on_exchange_declared,
+        )
+
+    def _on_exchange_declared(self, _frame) -> None:
+        self._delivery_tag = 0
+        self._channel.confirm_delivery(ack_nack_callback=self._on_confirm, callback=self._on_confirm_mode)
+
+    def _on_confirm_mode(self, _frame) -> None:
+        self._ready.set()
+        logger.info(f"RabbitMQ publisher ready (exchange '{self.exchange}').")
+        self._drain()
+
+    def _on_channel_closed(self, channel, reason) -> None:
+        # Канал закрывается брокером при ошибке; переоткрываем вместе с соединением
+        logger.warning(f"RabbitMQ publisher channel closed: {reason}")
+        self._channel = None
+        self._ready.clear()
+        if self._connection is not None and self._connection.is_open:
+            self._connection.close()
+
+    def _drain(self) -> None:
+        """Отправляет все накопившиеся сообщения, не дожидаясь подтверждений."""
+        while self._ready.is_set() and self._channel is not None:
+            try:
+                routing_key, body, properties, future = self._outgoing.get_nowait()
+            except queue.Empty:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                self._channel.basic_publish(self.exchange, routing_key, body, properties)
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            self._delivery_tag += 1
+            self._unconfirmed[self._delivery_tag] = future
+
+    def _on_confirm(self, frame) -> None:
+        method = frame.method
+        acked = isinstance(method, Basic.Ack)
+        # multiple=True подтверждает все сообщения до delivery_tag включительно
+        tags = [tag for tag in self._unconfirmed if tag <= method.delivery_tag] if method.multiple else [method.delivery_tag]
+        for tag in tags:
+            future = self._unconfirmed.pop(tag, None)
+            if future is None:
+                continue
+            if acked:
+                future.set_result(True)
+            else:
+                future.set_exception(PublishNackError(f"Message {tag} was nacked by the broker"))
+
+    def _fail_unconfirmed(self, error: Exception) -> None:
+        while self._unconfirmed:
+            _, future = self._unconfirmed.popitem(last=False)
+            future.set_exception(error)
+
+    def _fail_pending(self, error: Exception) -> None:
+        while True:
+            try:
+                _, _, _, future = self._outgoing.get_nowait()
+            except queue.Empty:
+                return
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+    def _close(self) -> None:
+        if self._connection is not None and self._connection.is_open:
+            self._connection.close()
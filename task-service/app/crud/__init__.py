@@ -5,6 +5,8 @@ from .crud_comment import crud_comment
 from .crud_attachment import crud_attachment
 from .crud_evaluation import crud_evaluation
 from .crud_history import crud_history
+from .crud_outbox import crud_outbox
+from .crud_company_deletion import crud_company_deletion
 # Добавить другие CRUD по мере создания
 # from .crud_history import crud_history
 # ...
@@ -12,8 +12,8 @@ from sqlalchemy import select
 from app.db.base_class import Base
 # Импортируем Task и TaskStatus для проверки типа и статуса
 from app.models.task import Task, TaskStatus
-# Импортируем публикатор сообщений
-from app.core.messaging import publish_message
+# События пишутся в outbox в той же транзакции, публикует их app.workers.outbox_relay
+from app.crud.crud_outbox import crud_outbox
 
 logger = logging.getLogger(__name__)
 
@@ -91,58 +91,50 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
              return db_obj # Ничего не делаем, не коммитим, не публикуем
 
         db.add(db_obj) # Добавляем в сессию, даже если нет tracked changes (могли быть другие)
-        db.commit()
-        db.refresh(db_obj)
 
-        # Публикация событий после успешного обновления (только для Task и если были изменения)
+        # События пишутся в outbox до коммита, чтобы попасть в ту же транзакцию
+        # (только для Task и если были изменения)
         if is_task_model and changed_fields:
+            db.flush()
             task_id = db_obj.id
             company_id = db_obj.company_id
             user_id = db.info.get('user_id') # Получаем ID пользователя из сессии
 
             # 1. Общее событие task.updated
-            try:
-                update_event_body = {
-                    "task_id": task_id,
-                    "company_id": company_id,
-                    "user_id": user_id, # ID пользователя, внесшего изменения
-                    "changes": jsonable_encoder(changed_fields, custom_encoder={datetime: str})
-                }
-                publish_message(routing_key="task.updated", message_body=update_event_body)
-            except Exception as e:
-                logger.error(f"Failed to publish task.updated event for task {task_id}: {e}")
+            update_event_body = {
+                "task_id": task_id,
+                "company_id": company_id,
+                "user_id": user_id, # ID пользователя, внесшего изменения
+                "changes": jsonable_encoder(changed_fields, custom_encoder={datetime: str})
+            }
+            crud_outbox.add(db, routing_key="task.updated", message_body=update_event_body)
 
             # 2. Событие task.status_changed
             if "status" in changed_fields:
                 old_status = changed_fields["status"]["old"]
                 new_status = changed_fields["status"]["new"]
-                try:
-                    status_event_body = {
+                status_event_body = {
+                    "task_id": task_id,
+                    "company_id": company_id,
+                    "user_id": user_id,
+                    "old_status": old_status,
+                    "new_status": new_status
+                }
+                crud_outbox.add(db, routing_key="task.status_changed", message_body=status_event_body)
+
+                # 3. Событие task.completed (если статус стал DONE)
+                if new_status == TaskStatus.DONE and old_status != TaskStatus.DONE:
+                    completion_event_body = {
                         "task_id": task_id,
                         "company_id": company_id,
                         "user_id": user_id,
-                        "old_status": old_status,
-                        "new_status": new_status
+                        "assignee_user_id": db_obj.assignee_user_id,
+                        "completion_date": db_obj.completion_date
                     }
-                    publish_message(routing_key="task.status_changed", message_body=status_event_body)
-                    
-                    # 3. Событие task.completed (если статус стал DONE)
-                    if new_status == TaskStatus.DONE and old_status != TaskStatus.DONE:
-                         try:
-                              completion_event_body = {
-                                   "task_id": task_id,
-                                   "company_id": company_id,
-                                   "user_id": user_id,
-                                   "assignee_user_id": db_obj.assignee_user_id,
-                                   "completion_date": db_obj.completion_date 
-                              }
-                              # Используем jsonable_encoder для дат
-                              publish_message(routing_key="task.completed", message_body=jsonable_encoder(completion_event_body))
-                         except Exception as e:
-                              logger.error(f"Failed to publish task.completed event for task {task_id}: {e}")
-                              
-                except Exception as e:
-                     logger.error(f"Failed to publish task.status_changed event for task {task_id}: {e}")
+                    crud_outbox.add(db, routing_key="task.completed", message_body=completion_event_body)
+
+        db.commit()
+        db.refresh(db_obj)
 
         return db_obj
 
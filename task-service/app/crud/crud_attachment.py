@@ -1 +1,48 @@
- 
\ No newline at end of file
+# task-service/app/crud/crud_attachment.py
+import logging
+import os
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+from sqlalchemy import select, or_
+
+from app.crud.base import CRUDBase
+from app.models.attachment import Attachment
+from app.models.comment import Comment
+from app.schemas.attachment import AttachmentCreateInternal
+
+logger = logging.getLogger(__name__)
+
+class CRUDAttachment(CRUDBase[Attachment, AttachmentCreateInternal, AttachmentCreateInternal]):
+
+    def get_multi_by_task(self, db: Session, *, task_id: int) -> List[Attachment]:
+        statement = select(self.model).where(self.model.task_id == task_id).order_by(self.model.created_at)
+        return db.scalars(statement).all()
+
+    def get_multi_by_comment(self, db: Session, *, comment_id: int) -> List[Attachment]:
+        statement = select(self.model).where(self.model.comment_id == comment_id).order_by(self.model.created_at)
+        return db.scalars(statement).all()
+
+    def get_file_paths_by_tasks(self, db: Session, *, task_ids: List[int]) -> List[str]:
+        """Пути файлов вложений задач и их комментариев."""
+        if not task_ids:
+            return []
+        comment_ids = select(Comment.id).where(Comment.task_id.in_(task_ids))
+        statement = select(self.model.file_path).where(
+            or_(self.model.task_id.in_(task_ids), self.model.comment_id.in_(comment_ids))
+        )
+        return list(db.scalars(statement).all())
+
+    def remove(self, db: Session, *, id: int) -> Optional[Attachment]:
+        """Удаляет запись вложения и его файл на диске."""
+        obj = super().remove(db=db, id=id)
+        if obj:
+            try:
+                os.remove(obj.file_path)
+            except FileNotFoundError:
+                logger.warning(f"Attachment file {obj.file_path} was already missing.")
+            except OSError as e:
+                logger.error(f"Failed to remove attachment file {obj.file_path}: {e}")
+        return obj
+
+crud_attachment = CRUDAttachment(Attachment)
@@ -8,7 +8,7 @@ from sqlalchemy import select
 from app.crud.base import CRUDBase
 from app.models.comment import Comment
 from app.schemas.comment import CommentCreate, CommentUpdate
-from app.core.messaging import publish_message
+from app.crud.crud_outbox import crud_outbox
 from fastapi.encoders import jsonable_encoder
 
 logger = logging.getLogger(__name__)
@@ -30,24 +30,21 @@ class CRUDComment(CRUDBase[Comment, CommentCreate, CommentUpdate]):
             task_id=task_id
         )
         db.add(db_obj)
+        db.flush() # Нужен ID комментария для события
+
+        # Событие task.comment_added коммитится вместе с комментарием
+        message_body = {
+            "comment_id": db_obj.id,
+            "task_id": task_id,
+            "author_user_id": author_user_id,
+            # Получаем company_id из задачи
+            "company_id": db_obj.task.company_id if db_obj.task else None, 
+            "content": db_obj.content,
+            # Можно добавить детали задачи/автора, если нужно подписчикам
+        }
+        crud_outbox.add(db, routing_key="task.comment_added", message_body=message_body)
         db.commit()
         db.refresh(db_obj)
-        
-        # Публикуем событие task.comment_added
-        try:
-            message_body = {
-                "comment_id": db_obj.id,
-                "task_id": task_id,
-                "author_user_id": author_user_id,
-                # Получаем company_id из задачи
-                "company_id": db_obj.task.company_id if db_obj.task else None, 
-                "content": db_obj.content,
-                # Можно добавить детали задачи/автора, если нужно подписчикам
-            }
-            publish_message(routing_key="task.comment_added", message_body=message_body)
-        except Exception as e:
-            logger.error(f"Failed to publish task.comment_added event for task {task_id}, comment {db_obj.id}: {e}")
-            
         return db_obj
 
     def get_multi_by_task(
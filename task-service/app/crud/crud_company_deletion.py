@@ -0,0 +1,41 @@
+# task-service/app/crud/crud_company_deletion.py
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.company_deletion_job import CompanyDeletionJob
+
+
+class CRUDCompanyDeletionJob:
+    def get_or_create(self, db: Session, *, company_id: int) -> CompanyDeletionJob:
+        """Возвращает задание удаления компании, создавая его при первом событии company.deleted.
+
+        Повторное событие (или повторная доставка) возвращает существующее
+        задание с его прогрессом.
+        """
+        db.execute(
+            pg_insert(CompanyDeletionJob)
+            .values(company_id=company_id, status="pending", last_task_id=0,
+                    deleted_tasks=0, deleted_files=0, pending_files=[])
+            .on_conflict_do_nothing(index_elements=[CompanyDeletionJob.company_id])
+        )
+        return db.scalars(select(CompanyDeletionJob).where(CompanyDeletionJob.company_id == company_id)).one()
+
+    def lock(self, db: Session, *, job_id: int) -> Optional[CompanyDeletionJob]:
+        """Блокирует строку задания до конца транзакции (один исполнитель на задание)."""
+        return db.scalars(
+            select(CompanyDeletionJob)
+            .where(CompanyDeletionJob.id == job_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).first()
+
+    def get_unfinished(self, db: Session) -> List[CompanyDeletionJob]:
+        return list(db.scalars(
+            select(CompanyDeletionJob).where(CompanyDeletionJob.status != "done").order_by(CompanyDeletionJob.id)
+        ).all())
+
+
+crud_company_deletion = CRUDCompanyDeletionJob()
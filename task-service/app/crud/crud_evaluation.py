@@ -10,7 +10,7 @@ from app.models.evaluation import Evaluation
 from app.models.task import Task # Нужна модель Task для join
 from app.schemas.evaluation import EvaluationCreate, EvaluationUpdate
 from app.schemas.analytics import AverageScores # Импортируем схему
-from app.core.messaging import publish_message # Импортируем паблишер
+from app.crud.crud_outbox import crud_outbox # События публикуются через outbox
 from fastapi.encoders import jsonable_encoder # Для сериализации
 
 logger = logging.getLogger(__name__)
@@ -44,31 +44,27 @@ class CRUDEvaluation(CRUDBase[Evaluation, EvaluationCreate, EvaluationUpdate]):
             task_id=task_id
         )
         db.add(db_obj)
+        db.flush() # Нужен ID оценки для события
+
+        # Событие task.evaluated коммитится вместе с оценкой
+        task = db_obj.task # Получаем Task через relationship
+        message_body = {
+            "evaluation_id": db_obj.id,
+            "task_id": task_id,
+            "evaluator_user_id": evaluator_user_id,
+            "assignee_user_id": task.assignee_user_id if task else None,
+            "company_id": task.company_id if task else None,
+            "scores": {
+                "timeliness": db_obj.timeliness_score,
+                "quality": db_obj.quality_score,
+                "completeness": db_obj.completeness_score
+            }
+            # Добавляем оценку, если нужно
+            # "evaluation_details": jsonable_encoder(db_obj)
+        }
+        crud_outbox.add(db, routing_key="task.evaluated", message_body=message_body)
         db.commit()
         db.refresh(db_obj)
-        
-        # Публикуем событие task.evaluated
-        try:
-            # Получаем данные связанной задачи для сообщения
-            task = db_obj.task # Получаем Task через relationship
-            message_body = {
-                "evaluation_id": db_obj.id,
-                "task_id": task_id,
-                "evaluator_user_id": evaluator_user_id,
-                "assignee_user_id": task.assignee_user_id if task else None,
-                "company_id": task.company_id if task else None,
-                "scores": {
-                    "timeliness": db_obj.timeliness_score,
-                    "quality": db_obj.quality_score,
-                    "completeness": db_obj.completeness_score
-                }
-                # Добавляем оценку, если нужно
-                # "evaluation_details": jsonable_encoder(db_obj)
-            }
-            publish_message(routing_key="task.evaluated", message_body=message_body)
-        except Exception as e:
-            logger.error(f"Failed to publish task.evaluated event for task {task_id}: {e}")
-            
         return db_obj
 
     # Методы для получения списков оценок (для аналитики/отчетов)
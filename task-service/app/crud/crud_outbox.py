@@ -0,0 +1,68 @@
+# task-service/app/crud/crud_outbox.py
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.orm import Session
+
+from app.models.outbox import OutboxEvent
+
+
+class CRUDOutbox:
+    def add(self, db: Session, *, routing_key: str, message_body: Dict[str, Any]) -> OutboxEvent:
+        """Добавляет событие в outbox текущей транзакции. Коммит выполняет вызывающий код."""
+        # default=str, как и раньше при публикации: даты и enum уходят строками
+        event = OutboxEvent(
+            routing_key=routing_key,
+            payload=jsonable_encoder(message_body, custom_encoder={datetime: str}),
+        )
+        db.add(event)
+        return event
+
+    def claim_batch(self, db: Session, *, limit: int) -> List[OutboxEvent]:
+        """Блокирует до `limit` неопубликованных событий в порядке записи.
+
+        SKIP LOCKED позволяет запускать несколько релеев: каждый берет свою
+        пачку. Блокировки держатся до коммита вызывающего кода.
+        """
+        statement = (
+            select(OutboxEvent)
+            .where(OutboxEvent.published_at.is_(None))
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(db.scalars(statement).all())
+
+    def mark_published(self, db: Session, *, ids: Sequence[int]) -> None:
+        if ids:
+            db.execute(
+                update(OutboxEvent).where(OutboxEvent.id.in_(ids)).values(published_at=func.now())
+            )
+
+    def mark_failed(self, db: Session, *, ids: Sequence[int], error: str) -> None:
+        if ids:
+            db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(ids))
+                .values(attempts=OutboxEvent.attempts + 1, last_error=error[:1000])
+            )
+
+    def delete_published(self, db: Session, *, older_than: timedelta, limit: int = 10000) -> int:
+        """Удаляет опубликованные события старше `older_than` (порциями, чтобы не держать долгих блокировок)."""
+        cutoff = datetime.now(timezone.utc) - older_than
+        ids = (
+            select(OutboxEvent.id)
+            .where(OutboxEvent.published_at < cutoff)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        result = db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(ids)))
+        return result.rowcount
+
+    def pending_count(self, db: Session) -> Optional[int]:
+        return db.scalar(select(func.count()).select_from(OutboxEvent).where(OutboxEvent.published_at.is_(None)))
+
+
+crud_outbox = CRUDOutbox()
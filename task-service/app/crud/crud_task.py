@@ -4,14 +4,16 @@ from typing import Any, Dict, List, Optional, Union
 from datetime import datetime, timezone
 
 from sqlalchemy.orm import Session
-from sqlalchemy import select, update, func, case
+from sqlalchemy import select, update, delete, insert, func, case
 from sqlalchemy.sql import and_, or_
 from fastapi.encoders import jsonable_encoder # Для сериализации
 
 from app.crud.base import CRUDBase # Импортируем CRUDBase из base.py
 from app.models.task import Task, TaskStatus, TaskPriority
-from app.schemas.task import TaskCreate, TaskUpdate
-from app.core.messaging import publish_message # Импортируем паблишер
+from app.models.history import TaskHistory
+from app.schemas.task import TaskCreate, TaskUpdate, TaskBulkAction
+from app.db.listeners import TRACKED_TASK_FIELDS
+from app.crud.crud_outbox import crud_outbox # События публикуются через outbox
 
 logger = logging.getLogger(__name__) # Инициализируем логгер
 
@@ -24,7 +26,7 @@ class CRUDTask(CRUDBase[Task, TaskCreate, TaskUpdate]):
         creator_user_id: int,
         company_id: int
     ) -> Task:
-        """Создает задачу, добавляя ID создателя и компании и публикуя событие."""
+        """Создает задачу, добавляя ID создателя и компании, и записывает событие task.created в outbox."""
         # Используем словарь для подготовки данных
         task_data = obj_in.model_dump()
         task_data['creator_user_id'] = creator_user_id
@@ -32,19 +34,15 @@ class CRUDTask(CRUDBase[Task, TaskCreate, TaskUpdate]):
         
         db_obj = self.model(**task_data)
         db.add(db_obj)
+        # flush выдает ID задачи, refresh подгружает серверные значения (created_at и т.д.);
+        # событие task.created коммитится вместе с задачей
+        db.flush()
+        db.refresh(db_obj)
+        # Передаем только необходимые данные, а не весь объект с potentially lazy-loaded relationships
+        message_body = jsonable_encoder(db_obj, exclude={'comments', 'attachments', 'evaluation', 'history'}) # Явно исключаем связи
+        crud_outbox.add(db, routing_key="task.created", message_body=message_body)
         db.commit()
         db.refresh(db_obj)
-        
-        # Публикуем событие task.created
-        try:
-            # Используем jsonable_encoder для корректной сериализации объекта SQLAlchemy
-            # Передаем только необходимые данные, а не весь объект с potentially lazy-loaded relationships
-            message_body = jsonable_encoder(db_obj, exclude={'comments', 'attachments', 'evaluation', 'history'}) # Явно исключаем связи
-            publish_message(routing_key="task.created", message_body=message_body)
-        except Exception as e:
-            # Логируем ошибку публикации, но не прерываем основной процесс
-            logger.error(f"Failed to publish task.created event for task {db_obj.id}: {e}")
-            
         return db_obj
     
     def archive(self, db: Session, *, task_id: int) -> Optional[Task]:
@@ -173,18 +171,165 @@ class CRUDTask(CRUDBase[Task, TaskCreate, TaskUpdate]):
         obj_in: Union[TaskUpdate, Dict[str, Any]],
         modifier_user_id: Optional[int] = None, # Track who modified
     ) -> Task:
-        # ... (existing update method with event publishing) ...
-        pass # Placeholder if update method was fully collapsed
+        """Обновляет задачу; история изменений и события пишутся в той же транзакции."""
+        if modifier_user_id is not None:
+            # Нужен слушателю before_task_update (история) и для событий
+            db.info['user_id'] = modifier_user_id
+        return super().update(db, db_obj=db_obj, obj_in=obj_in)
+
+    def bulk_apply(
+        self,
+        db: Session,
+        *,
+        company_id: int,
+        task_ids: List[int],
+        action: TaskBulkAction,
+        modifier_user_id: int,
+        changes: Optional[Dict[str, Any]] = None,
+        restrict_to_user_id: Optional[int] = None,
+    ) -> Dict[str, List[int]]:
+        """Применяет update/archive/restore к набору задач за фиксированное число запросов.
+
+        Один SELECT ... FOR UPDATE читает текущие значения, один UPDATE меняет
+        все задачи, история пишется одним многострочным INSERT. UPDATE на уровне
+        Core не вызывает слушатель before_task_update, поэтому история не
+        дублируется. В outbox по каждой измененной задаче пишутся те же события,
+        что и в CRUDBase.update (task.updated, task.status_changed,
+        task.completed); архивация и восстановление, как и одиночные, событий
+        не пишут.
+
+        restrict_to_user_id: если задан, менять можно только задачи, где этот
+        пользователь создатель или исполнитель (как в PUT /tasks/{id}).
+        """
+        if action == TaskBulkAction.UPDATE:
+            fields = [field for field in TRACKED_TASK_FIELDS if field in (changes or {})]
+            values = {field: changes[field] for field in fields}
+        else:
+            fields = ["is_deleted"]
+            values = {"is_deleted": action == TaskBulkAction.ARCHIVE}
+
+        columns = [self.model.id, self.model.creator_user_id, self.model.assignee_user_id, self.model.is_deleted]
+        columns += [getattr(self.model, field) for field in fields if field not in ("assignee_user_id", "is_deleted")]
+        if "status" in fields and "completion_date" not in fields:
+            columns.append(self.model.completion_date) # Для события task.completed
+        statement = (
+            select(*columns)
+            .where(self.model.id.in_(task_ids), self.model.company_id == company_id)
+            .order_by(self.model.id) # Блокировки в одном порядке: встречные bulk-запросы не взаимоблокируются
+            .with_for_update()
+        )
+        rows = {row.id: row for row in db.execute(statement).all()}
+
+        result: Dict[str, List[int]] = {"updated_ids": [], "unchanged_ids": [], "not_found_ids": [], "forbidden_ids": []}
+        task_changes: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        for task_id in task_ids:
+            row = rows.get(task_id)
+            # update и archive работают с активными задачами, restore - с архивными
+            if row is None or row.is_deleted != (action == TaskBulkAction.RESTORE):
+                result["not_found_ids"].append(task_id)
+                continue
+            if restrict_to_user_id is not None and restrict_to_user_id not in (row.creator_user_id, row.assignee_user_id):
+                result["forbidden_ids"].append(task_id)
+                continue
+            changed = {
+                field: {"old": getattr(row, field), "new": new_value}
+                for field, new_value in values.items()
+                if getattr(row, field) != new_value
+            }
+            if not changed:
+                result["unchanged_ids"].append(task_id)
+                continue
+            task_changes[task_id] = changed
+            result["updated_ids"].append(task_id)
+
+        if not task_changes:
+            db.commit() # Снимаем блокировки
+            return result
+
+        db.execute(
+            update(self.model)
+            .where(self.model.id.in_(list(task_changes)))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+        # Архивация и восстановление историю не пишут (как и одиночные archive/restore)
+        if action == TaskBulkAction.UPDATE:
+            history_rows = [
+                {
+                    "task_id": task_id,
+                    "user_id": modifier_user_id,
+                    "field_changed": field,
+                    "old_value": str(change["old"]) if change["old"] is not None else None,
+                    "new_value": str(change["new"]) if change["new"] is not None else None,
+                }
+                for task_id, changed in task_changes.items()
+                for field, change in changed.items()
+            ]
+            db.execute(insert(TaskHistory).values(history_rows))
+            self._add_update_events(db, company_id, modifier_user_id, rows, values, task_changes)
+
+        db.commit()
+        return result
+
+    def _add_update_events(
+        self,
+        db: Session,
+        company_id: int,
+        user_id: int,
+        rows: Dict[int, Any],
+        values: Dict[str, Any],
+        task_changes: Dict[int, Dict[str, Dict[str, Any]]],
+    ) -> None:
+        """Пишет в outbox события изменения задач с теми же ключами и телами, что CRUDBase.update."""
+        for task_id, changed in task_changes.items():
+            crud_outbox.add(db, routing_key="task.updated", message_body={
+                "task_id": task_id,
+                "company_id": company_id,
+                "user_id": user_id,
+                "changes": changed,
+            })
+            if "status" not in changed:
+                continue
+            old_status, new_status = changed["status"]["old"], changed["status"]["new"]
+            crud_outbox.add(db, routing_key="task.status_changed", message_body={
+                "task_id": task_id,
+                "company_id": company_id,
+                "user_id": user_id,
+                "old_status": old_status,
+                "new_status": new_status,
+            })
+            if new_status == TaskStatus.DONE and old_status != TaskStatus.DONE:
+                row = rows[task_id]
+                crud_outbox.add(db, routing_key="task.completed", message_body={
+                    "task_id": task_id,
+                    "company_id": company_id,
+                    "user_id": user_id,
+                    "assignee_user_id": values.get("assignee_user_id", row.assignee_user_id),
+                    "completion_date": values.get("completion_date", row.completion_date),
+                })
 
     # --- New methods for handling events --- #
 
-    def delete_by_company_id(self, db: Session, *, company_id: int) -> int:
-        """Удаляет все задачи, принадлежащие указанной компании."""
-        num_deleted = db.query(self.model).filter(Task.company_id == company_id).delete(synchronize_session=False)
-        # Коммит должен управляться извне (например, в message_callback)
-        # db.commit() # No commit here
-        logger.info(f"Attempted deletion of tasks for company_id={company_id}. Result count: {num_deleted}")
-        return num_deleted
+    def get_ids_by_company_after(self, db: Session, *, company_id: int, after_id: int, limit: int) -> List[int]:
+        """ID задач компании больше after_id по возрастанию (порция для удаления)."""
+        statement = (
+            select(self.model.id)
+            .where(self.model.company_id == company_id, self.model.id > after_id)
+            .order_by(self.model.id)
+            .limit(limit)
+        )
+        return list(db.scalars(statement).all())
+
+    def delete_by_ids(self, db: Session, *, ids: List[int]) -> int:
+        """Удаляет задачи по списку ID; комментарии, вложения, оценки и историю удаляет каскад в БД."""
+        if not ids:
+            return 0
+        result = db.execute(
+            delete(self.model).where(self.model.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        # Коммит должен управляться извне
+        return result.rowcount
 
     def unassign_by_user_id(self, db: Session, *, user_id: int) -> int:
         """Снимает назначение задач с указанного пользователя."""
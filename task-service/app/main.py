@@ -8,8 +8,6 @@ from app.core.config import settings
 from app.db.session import engine
 # Импортируем Base, чтобы создать таблицы
 from app.db.base_class import Base
-# Импортируем функции для RabbitMQ
-from app.core.messaging import get_rabbitmq_connection, close_rabbitmq_connection
 
 # Импортируем и подключаем api_router
 from app.api.v1.api import api_router
@@ -28,21 +26,13 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error creating database tables: {e}")
 
-    # 2. Подключение к RabbitMQ
-    logger.info("Connecting to RabbitMQ...")
-    if get_rabbitmq_connection(): # Попытка установить соединение
-        logger.info("RabbitMQ connection established.")
-    else:
-        logger.error("Failed to establish RabbitMQ connection on startup.")
-        # Решить: останавливать приложение или работать без RabbitMQ?
-        # Пока просто логируем ошибку.
+    # API не подключается к RabbitMQ: события пишутся в таблицу outbox,
+    # публикует их отдельный процесс python -m app.workers.outbox_relay
 
     yield
     
     # Код после остановки (shutdown)
     logger.info(f"Shutting down {settings.PROJECT_NAME}...")
-    # 1. Закрытие соединения с RabbitMQ
-    close_rabbitmq_connection()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -5,4 +5,6 @@ from .comment import Comment # Раскомментируем импорт Comme
 from .attachment import Attachment # Раскомментируем импорт Attachment
 from .evaluation import Evaluation # Раскомментируем импорт Evaluation
 from .history import TaskHistory # Раскомментируем импорт History
+from .outbox import OutboxEvent
+from .company_deletion_job import CompanyDeletionJob
 # from .history import History # Раскомментировать при добавлении 
\ No newline at end of file
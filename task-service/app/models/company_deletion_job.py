@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import BigInteger, Integer, String, Text, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+
+
+class CompanyDeletionJob(Base):
+    """Прогресс удаления задач удаленной компании.
+
+    Задачи удаляются порциями по возрастанию id; last_task_id - граница
+    уже удаленного диапазона, поэтому после падения удаление продолжается
+    с того же места. pending_files - файлы вложений последней порции,
+    строки которых уже удалены, а файлы на диске еще нет.
+    """
+    __tablename__ = "company_deletion_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    company_id: Mapped[int] = mapped_column(Integer, nullable=False, unique=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending", index=True) # pending, running, done
+
+    last_task_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    deleted_tasks: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    deleted_files: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    pending_files: Mapped[List[str]] = mapped_column(JSONB, nullable=False, default=list)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<CompanyDeletionJob(company_id={self.company_id}, status='{self.status}', last_task_id={self.last_task_id})>"
@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import BigInteger, Integer, String, Text, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+
+
+class OutboxEvent(Base):
+    """Событие для RabbitMQ, записанное в той же транзакции, что и изменение данных.
+
+    Отдельный процесс (app.workers.outbox_relay) публикует такие записи
+    с подтверждениями брокера и проставляет published_at, поэтому событие
+    не теряется при недоступности RabbitMQ (доставка at-least-once).
+    """
+    __tablename__ = "outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    routing_key: Mapped[str] = mapped_column(String(255), nullable=False)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    published_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Неудачные попытки публикации (для мониторинга)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        # Частичный индекс: релей читает только неопубликованные записи по порядку
+        Index("ix_outbox_unpublished", "id", postgresql_where=published_at.is_(None)),
+        Index("ix_outbox_published_at", "published_at"),
+    )
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.id}, routing_key='{self.routing_key}')>"
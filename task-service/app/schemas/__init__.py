@@ -1,6 +1,7 @@
 # task-service/app/schemas/__init__.py
 # Импортируем схемы для удобного доступа
 from .task import Task, TaskCreate, TaskUpdate, TaskStatus, TaskPriority
+from .task import TaskBulkAction, TaskBulkRequest, TaskBulkResult
 from .comment import Comment, CommentCreate, CommentUpdate # Добавляем импорт Comment
 from .attachment import Attachment # Добавляем Attachment
 from .evaluation import Evaluation, EvaluationCreate, EvaluationUpdate # Добавляем Evaluation
@@ -1,5 +1,6 @@
 # task-service/app/schemas/task.py
-from typing import Optional
+import enum
+from typing import List, Optional
 from datetime import datetime
 
 from pydantic import BaseModel, Field
@@ -59,4 +60,23 @@ class Task(TaskInDBBase):
 
 # Схема для внутреннего использования (если нужно отделить от API)
 class TaskInDB(TaskInDBBase):
-    pass 
\ No newline at end of file
+    pass
+
+# --- Массовые операции (POST /tasks/bulk) ---
+
+class TaskBulkAction(str, enum.Enum):
+    UPDATE = "update"
+    ARCHIVE = "archive"
+    RESTORE = "restore"
+
+class TaskBulkRequest(BaseModel):
+    action: TaskBulkAction = Field(..., description="Операция над задачами")
+    task_ids: List[int] = Field(..., min_length=1, description="ID задач (не больше TASK_BULK_MAX_IDS)")
+    changes: Optional[TaskUpdate] = Field(None, description="Изменения для action=update")
+
+class TaskBulkResult(BaseModel):
+    action: TaskBulkAction
+    updated_ids: List[int] = Field(default_factory=list, description="Измененные задачи")
+    unchanged_ids: List[int] = Field(default_factory=list, description="Задачи, в которых нечего менять")
+    not_found_ids: List[int] = Field(default_factory=list, description="Не найдены в компании (или уже в архиве / не в архиве)")
+    forbidden_ids: List[int] = Field(default_factory=list, description="Нет прав на изменение")
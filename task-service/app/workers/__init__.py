@@ -0,0 +1,2 @@
+# task-service/app/workers/__init__.py
+# Фоновые процессы сервиса, запускаются как python -m app.workers.<name>
@@ -0,0 +1,201 @@
+# task-service/app/workers/company_deletion.py
+"""Удаление задач удаленной компании (событие company.deleted).
+
+Обработчик события только записывает задание в company_deletion_jobs,
+удаление выполняет CompanyDeletionRunner - отдельный поток потребителя.
+Задачи удаляются порциями по возрастанию id (COMPANY_DELETION_CHUNK_SIZE),
+каждая порция - короткая транзакция: строка задания блокируется FOR UPDATE,
+вместе с задачами (каскадом - их комментарии, вложения, оценки и история)
+в ней же сохраняются новая граница last_task_id и пути файлов вложений
+порции в pending_files. Файлы удаляются с диска после коммита, затем
+pending_files очищается. Между порциями - пауза COMPANY_DELETION_THROTTLE_SECONDS,
+чтобы не забирать базу и диск у основного трафика.
+
+Незавершенные задания (падение процесса, ошибка БД) продолжаются с
+last_task_id: исполнитель берет их при старте потребителя и повторяет
+каждые COMPANY_DELETION_RETRY_INTERVAL_SECONDS, текст ошибки хранится в
+last_error. Вручную: python -m app.workers.company_deletion.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.crud_attachment import crud_attachment
+from app.crud.crud_company_deletion import crud_company_deletion
+from app.crud.crud_task import crud_task
+from app.db.session import SessionLocal
+from app.models.company_deletion_job import CompanyDeletionJob
+
+logger = logging.getLogger(__name__)
+
+# Сколько файлов удалять с диска между коммитами прогресса
+FILE_BATCH_SIZE = 200
+
+
+def remove_files(paths: List[str]) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass # Уже удален (повтор после падения)
+        except OSError as e:
+            logger.error(f"Failed to remove attachment file {path}: {e}")
+
+
+def flush_pending_files(db: Session, job_id: int) -> int:
+    """Удаляет с диска файлы, записанные в pending_files, пачками. Возвращает их число."""
+    removed = 0
+    while True:
+        job = crud_company_deletion.lock(db, job_id=job_id)
+        paths = list(job.pending_files or [])
+        if not paths:
+            db.commit()
+            return removed
+        batch = paths[:FILE_BATCH_SIZE]
+        remove_files(batch)
+        job.pending_files = paths[len(batch):]
+        job.deleted_files += len(batch)
+        db.commit()
+        removed += len(batch)
+
+
+def delete_chunk(db: Session, job_id: int) -> int:
+    """Удаляет одну порцию задач. Возвращает число удаленных (0 - задач не осталось)."""
+    job = crud_company_deletion.lock(db, job_id=job_id)
+    task_ids = crud_task.get_ids_by_company_after(
+        db,
+        company_id=job.company_id,
+        after_id=job.last_task_id,
+        limit=settings.COMPANY_DELETION_CHUNK_SIZE,
+    )
+    if not task_ids:
+        job.status = "done"
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        return 0
+
+    # Пути нужно прочитать до удаления: строки вложений уйдут каскадом
+    job.pending_files = crud_attachment.get_file_paths_by_tasks(db, task_ids=task_ids)
+    deleted = crud_task.delete_by_ids(db, ids=task_ids)
+    job.last_task_id = task_ids[-1]
+    job.deleted_tasks += deleted
+    job.status = "running"
+    db.commit()
+    return deleted
+
+
+def run_job(db: Session, job: CompanyDeletionJob, stopping: Optional[threading.Event] = None) -> None:
+    """Выполняет задание, начиная с сохраненного прогресса.
+
+    Если задан stopping, останавливается между порциями после его установки.
+    """
+    job_id, company_id = job.id, job.company_id
+    if job.status == "done":
+        logger.info(f"Deletion of company {company_id} tasks is already done.")
+        return
+    logger.info(f"Deleting tasks of company {company_id} from task id > {job.last_task_id}")
+    try:
+        # Файлы порции, на которой процесс остановился в прошлый раз
+        flush_pending_files(db, job_id)
+        while not (stopping is not None and stopping.is_set()):
+            deleted = delete_chunk(db, job_id)
+            flush_pending_files(db, job_id)
+            if not deleted:
+                break
+            time.sleep(settings.COMPANY_DELETION_THROTTLE_SECONDS)
+        else:
+            logger.info(f"Deletion of company {company_id} tasks interrupted, it will resume on restart.")
+            return
+    except Exception as e:
+        db.rollback()
+        job = crud_company_deletion.lock(db, job_id=job_id)
+        if job is not None:
+            job.last_error = str(e)
+            db.commit()
+        raise
+
+    job = crud_company_deletion.lock(db, job_id=job_id)
+    job.last_error = None
+    db.commit()
+    logger.info(
+        f"Deleted {job.deleted_tasks} tasks and {job.deleted_files} attachment files of company {company_id}."
+    )
+
+
+# Будит CompanyDeletionRunner, когда появилось новое задание
+_new_job = threading.Event()
+
+
+def schedule_company_deletion(db: Session, company_id: int) -> CompanyDeletionJob:
+    """Обработчик company.deleted: создает (или находит) задание и будит исполнителя.
+
+    Само удаление выполняет CompanyDeletionRunner в отдельном потоке: сообщение
+    подтверждается сразу после коммита задания и не держит воркер потребителя.
+    """
+    job = crud_company_deletion.get_or_create(db, company_id=company_id)
+    db.commit()
+    _new_job.set()
+    return job
+
+
+def resume_unfinished(stopping: Optional[threading.Event] = None) -> int:
+    """Выполняет все незавершенные задания. Возвращает число завершенных.
+
+    Ошибка одного задания не мешает остальным: она записана в last_error,
+    задание останется незавершенным и будет повторено.
+    """
+    db = SessionLocal()
+    finished = 0
+    try:
+        jobs = crud_company_deletion.get_unfinished(db)
+        db.commit()
+        for job in jobs:
+            if stopping is not None and stopping.is_set():
+                break
+            try:
+                run_job(db, job, stopping)
+            except Exception as e:
+                logger.error(f"Deletion of company {job.company_id} tasks failed, will retry: {e}", exc_info=True)
+                continue
+            if job.status == "done":
+                finished += 1
+        return finished
+    finally:
+        db.close()
+
+
+class CompanyDeletionRunner(threading.Thread):
+    """Поток, выполняющий задания удаления вне воркеров потребителя.
+
+    Берет незавершенные задания при старте, по сигналу о новом задании
+    и каждые COMPANY_DELETION_RETRY_INTERVAL_SECONDS.
+    """
+
+    def __init__(self):
+        super().__init__(name="company-deletion", daemon=True)
+        self._stopping = threading.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        _new_job.set()
+
+    def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                resume_unfinished(self._stopping)
+            except Exception as e:
+                logger.error(f"Company deletion runner iteration failed: {e}", exc_info=True)
+            _new_job.wait(settings.COMPANY_DELETION_RETRY_INTERVAL_SECONDS)
+            _new_job.clear()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    finished = resume_unfinished()
+    logger.info(f"Finished {finished} unfinished company deletion jobs.")
@@ -0,0 +1,12 @@
+# task-service/app/workers/consumer.py
+"""Потребитель событий других сервисов (company.deleted, user.deleted, ...).
+
+Запуск: python -m app.workers.consumer
+"""
+import logging
+
+from app.core.messaging import start_consuming
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    start_consuming()
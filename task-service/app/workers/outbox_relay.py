@@ -0,0 +1,137 @@
+# task-service/app/workers/outbox_relay.py
+"""Релей outbox: публикует события из таблицы outbox в RabbitMQ.
+
+Цикл: в транзакции заблокировать пачку неопубликованных событий
+(FOR UPDATE SKIP LOCKED), отправить их все через издатель без ожидания
+ответа на каждое, дождаться подтверждений брокера для всей пачки,
+проставить published_at подтвержденным и закоммитить. Если процесс упадет после
+публикации, но до коммита, пачка будет опубликована повторно, поэтому
+доставка at-least-once: message_id сообщения равен ID записи outbox,
+по нему подписчики могут отбрасывать дубликаты.
+
+Запуск: python -m app.workers.outbox_relay
+"""
+import logging
+import time
+from concurrent.futures import Future, wait
+from datetime import timedelta
+from typing import List, Tuple
+
+import pika
+
+from app.core.config import settings
+from app.core.messaging import get_publisher, close_rabbitmq_connection
+from app.crud.crud_outbox import crud_outbox
+from app.db.session import SessionLocal
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# Как часто удалять старые опубликованные события
+CLEANUP_INTERVAL_SECONDS = 600
+
+
+def publish_event(event: OutboxEvent) -> Future:
+    return get_publisher().publish(
+        event.routing_key,
+        event.payload,
+        pika.BasicProperties(
+            content_type="application/json",
+            delivery_mode=2, # Персистентное сообщение
+            message_id=str(event.id),
+            # Время записи события: подписчики считают по нему задержку доставки
+            timestamp=int(event.created_at.timestamp()),
+        ),
+    )
+
+
+def relay_batch() -> int:
+    """Публикует одну пачку событий. Возвращает количество подтвержденных.
+
+    Неподтвержденные (nack, обрыв соединения, таймаут) остаются в outbox
+    и уходят повторно в следующей итерации.
+    """
+    # Пока брокер недоступен, события не забираются: иначе каждая итерация
+    # добавляла бы в очередь издателя копии тех же событий
+    if not get_publisher().wait_ready(settings.RABBITMQ_PUBLISH_TIMEOUT_SECONDS):
+        logger.warning("RabbitMQ publisher is not connected, outbox events are not relayed")
+        return 0
+
+    db = SessionLocal()
+    try:
+        events = crud_outbox.claim_batch(db, limit=settings.OUTBOX_BATCH_SIZE)
+        if not events:
+            db.commit()
+            return 0
+        pending: List[Tuple[OutboxEvent, Future]] = [(event, publish_event(event)) for event in events]
+        wait([future for _, future in pending], timeout=settings.RABBITMQ_PUBLISH_TIMEOUT_SECONDS)
+        # Еще не отправленные сообщения отменяем: события остаются в outbox и будут
+        # взяты следующей итерацией, а издатель пропустит отмененные при отправке
+        for _, future in pending:
+            future.cancel()
+
+        published: List[int] = []
+        failed: List[int] = []
+        error = None
+        for event, future in pending:
+            if future.done() and future.exception() is None:
+                published.append(event.id)
+            else:
+                failed.append(event.id)
+                if error is None:
+                    error = future.exception() if future.done() else TimeoutError("confirm timeout")
+        crud_outbox.mark_published(db, ids=published)
+        if failed:
+            crud_outbox.mark_failed(db, ids=failed, error=str(error) or type(error).__name__)
+            logger.warning(f"{len(failed)} outbox events were not confirmed: {error}")
+        db.commit()
+        return len(published)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def cleanup_published() -> int:
+    db = SessionLocal()
+    try:
+        deleted = crud_outbox.delete_published(db, older_than=timedelta(hours=settings.OUTBOX_RETENTION_HOURS))
+        db.commit()
+        return deleted
+    finally:
+        db.close()
+
+
+def run_relay() -> None:
+    """Публикует события, пока процесс не будет остановлен."""
+    last_cleanup = 0.0
+    while True:
+        try:
+            published = relay_batch()
+            if published:
+                logger.debug(f"Published {published} outbox events")
+
+            if time.monotonic() - last_cleanup >= CLEANUP_INTERVAL_SECONDS:
+                deleted = cleanup_published()
+                if deleted:
+                    logger.info(f"Deleted {deleted} published outbox events")
+                last_cleanup = time.monotonic()
+
+            # Неполная пачка - очередь пуста (или брокер недоступен), ждем
+            if published < settings.OUTBOX_BATCH_SIZE:
+                time.sleep(settings.OUTBOX_POLL_INTERVAL_SECONDS)
+        except Exception as e:
+            logger.error(f"Outbox relay iteration failed: {e}", exc_info=True)
+            time.sleep(settings.OUTBOX_ERROR_DELAY_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.info("Starting outbox relay...")
+    try:
+        run_relay()
+    except KeyboardInterrupt:
+        logger.info("Outbox relay stopped by user.")
+    finally:
+        close_rabbitmq_connection()
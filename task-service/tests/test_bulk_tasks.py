@@ -0,0 +1,173 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.crud import crud_task as crud_task_module
+from app.crud.crud_task import crud_task
+from app.models.task import TaskPriority, TaskStatus
+from app.schemas.task import TaskBulkAction
+
+COMPLETED_AT = datetime(2024, 3, 1, 12, tzinfo=timezone.utc)
+
+
+class FakeSession:
+    """Заменяет Session: первый execute (SELECT ... FOR UPDATE) возвращает строки задач."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+        self.commits = 0
+
+    def execute(self, statement, *args, **kwargs):
+        self.statements.append(statement)
+        return SimpleNamespace(all=lambda: self.rows)
+
+    def commit(self):
+        self.commits += 1
+
+
+class RecordingInsert:
+    """Вместо insert(TaskHistory): запоминает строки истории."""
+
+    def __init__(self, model):
+        self.model = model
+        self.rows = None
+
+    def values(self, rows):
+        self.rows = rows
+        return self
+
+
+def _row(task_id, creator=1, assignee=None, is_deleted=False, status=TaskStatus.OPEN, priority=TaskPriority.LOW):
+    return SimpleNamespace(
+        id=task_id, creator_user_id=creator, assignee_user_id=assignee, is_deleted=is_deleted,
+        status=status, priority=priority, completion_date=COMPLETED_AT,
+    )
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    events = []
+    monkeypatch.setattr(
+        crud_task_module.crud_outbox, "add",
+        lambda db, *, routing_key, message_body: events.append((routing_key, message_body)),
+    )
+    monkeypatch.setattr(crud_task_module, "insert", RecordingInsert)
+    return events
+
+
+def _apply(db, action, task_ids, changes=None, restrict_to_user_id=None):
+    return crud_task.bulk_apply(
+        db, company_id=10, task_ids=task_ids, action=action, modifier_user_id=5,
+        changes=changes, restrict_to_user_id=restrict_to_user_id,
+    )
+
+
+def test_bulk_update_splits_tasks_by_outcome(outbox):
+    db = FakeSession([
+        _row(1, creator=5),
+        _row(2, creator=7, assignee=5, priority=TaskPriority.HIGH),
+        _row(3, creator=7, assignee=8),
+        _row(4, creator=5, is_deleted=True),
+    ])
+
+    result = _apply(db, TaskBulkAction.UPDATE, [1, 2, 3, 4, 99], {"priority": TaskPriority.HIGH}, restrict_to_user_id=5)
+
+    assert result == {
+        "updated_ids": [1],
+        "unchanged_ids": [2],
+        "not_found_ids": [4, 99],
+        "forbidden_ids": [3],
+    }
+    assert db.commits == 1
+
+
+def test_managers_are_not_restricted_to_own_tasks(outbox):
+    db = FakeSession([_row(3, creator=7, assignee=8)])
+
+    result = _apply(db, TaskBulkAction.UPDATE, [3], {"priority": TaskPriority.HIGH})
+
+    assert result["updated_ids"] == [3] and result["forbidden_ids"] == []
+
+
+def test_select_locks_rows_in_id_order(outbox):
+    db = FakeSession([])
+
+    _apply(db, TaskBulkAction.UPDATE, [3, 1, 2], {"priority": TaskPriority.HIGH})
+
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert "ORDER BY tasks.id" in sql and sql.rstrip().endswith("FOR UPDATE")
+
+
+def test_nothing_to_change_runs_only_the_select(outbox):
+    db = FakeSession([_row(1, priority=TaskPriority.HIGH)])
+
+    result = _apply(db, TaskBulkAction.UPDATE, [1], {"priority": TaskPriority.HIGH})
+
+    assert result["unchanged_ids"] == [1]
+    assert len(db.statements) == 1 and db.commits == 1
+    assert outbox == []
+
+
+def test_bulk_update_writes_history_and_per_task_events(outbox):
+    db = FakeSession([
+        _row(1, assignee=8, status=TaskStatus.IN_PROGRESS),
+        _row(2, assignee=9, status=TaskStatus.DONE),
+        _row(3, assignee=9, status=TaskStatus.OPEN, priority=TaskPriority.HIGH),
+    ])
+
+    result = _apply(db, TaskBulkAction.UPDATE, [1, 2, 3], {"status": TaskStatus.DONE, "priority": TaskPriority.HIGH})
+
+    assert result["updated_ids"] == [1, 2, 3]
+    # SELECT, UPDATE и один INSERT истории независимо от числа задач
+    assert len(db.statements) == 3
+    history = db.statements[2].rows
+    assert {(row["task_id"], row["field_changed"]) for row in history} == {(1, "status"), (1, "priority"), (2, "priority"), (3, "status")}
+    assert {"task_id": 1, "user_id": 5, "field_changed": "status", "old_value": str(TaskStatus.IN_PROGRESS),
+            "new_value": str(TaskStatus.DONE)} in history
+
+    assert [(key, body["task_id"]) for key, body in outbox] == [
+        ("task.updated", 1), ("task.status_changed", 1), ("task.completed", 1),
+        ("task.updated", 2),
+        ("task.updated", 3), ("task.status_changed", 3), ("task.completed", 3),
+    ]
+    bodies = dict(((key, body["task_id"]), body) for key, body in outbox)
+    assert bodies[("task.updated", 2)] == {
+        "task_id": 2, "company_id": 10, "user_id": 5,
+        "changes": {"priority": {"old": TaskPriority.LOW, "new": TaskPriority.HIGH}},
+    }
+    assert bodies[("task.status_changed", 1)] == {
+        "task_id": 1, "company_id": 10, "user_id": 5,
+        "old_status": TaskStatus.IN_PROGRESS, "new_status": TaskStatus.DONE,
+    }
+    assert bodies[("task.completed", 3)] == {
+        "task_id": 3, "company_id": 10, "user_id": 5, "assignee_user_id": 9, "completion_date": COMPLETED_AT,
+    }
+
+
+def test_task_completed_uses_new_assignee_and_completion_date(outbox):
+    completed_at = datetime(2024, 4, 2, tzinfo=timezone.utc)
+    db = FakeSession([_row(1, assignee=8, status=TaskStatus.REVIEW)])
+
+    _apply(db, TaskBulkAction.UPDATE, [1], {"status": TaskStatus.DONE, "assignee_user_id": 6, "completion_date": completed_at})
+
+    completed = [body for key, body in outbox if key == "task.completed"]
+    assert completed == [{
+        "task_id": 1, "company_id": 10, "user_id": 5, "assignee_user_id": 6, "completion_date": completed_at,
+    }]
+
+
+@pytest.mark.parametrize("action, archived_before", [(TaskBulkAction.ARCHIVE, False), (TaskBulkAction.RESTORE, True)])
+def test_archive_and_restore_only_touch_tasks_in_the_opposite_state(outbox, action, archived_before):
+    db = FakeSession([_row(1, is_deleted=archived_before), _row(2, is_deleted=not archived_before)])
+
+    result = _apply(db, action, [1, 2])
+
+    assert result["updated_ids"] == [1] and result["not_found_ids"] == [2]
+    update_params = db.statements[1].compile(dialect=postgresql.dialect()).params
+    assert update_params["is_deleted"] is (action == TaskBulkAction.ARCHIVE)
+    # Как одиночные archive/restore: без истории и событий
+    assert len(db.statements) == 2
+    assert outbox == []
@@ -0,0 +1,188 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.workers import company_deletion
+
+JOB_FIELDS = ("status", "last_task_id", "deleted_tasks", "deleted_files", "pending_files", "last_error", "finished_at")
+
+
+class FakeSession:
+    """Заменяет Session: rollback возвращает задание к состоянию последнего коммита."""
+
+    def __init__(self, job):
+        self.job = job
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+        self._saved = self._snapshot()
+
+    def _snapshot(self):
+        return {field: getattr(self.job, field) for field in JOB_FIELDS}
+
+    def commit(self):
+        self.commits += 1
+        self._saved = self._snapshot()
+
+    def rollback(self):
+        self.rollbacks += 1
+        for field, value in self._saved.items():
+            setattr(self.job, field, value)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeStore:
+    """Задачи компании (id -> пути файлов вложений) и вызовы crud."""
+
+    def __init__(self, task_files, fail_on_delete_call=None):
+        self.task_files = dict(task_files)
+        self.requested_after = []
+        self.delete_calls = 0
+        self.fail_on_delete_call = fail_on_delete_call
+
+    def get_ids_by_company_after(self, db, *, company_id, after_id, limit):
+        self.requested_after.append(after_id)
+        return sorted(task_id for task_id in self.task_files if task_id > after_id)[:limit]
+
+    def get_file_paths_by_tasks(self, db, *, task_ids):
+        return [path for task_id in task_ids for path in self.task_files[task_id]]
+
+    def delete_by_ids(self, db, *, ids):
+        self.delete_calls += 1
+        if self.delete_calls == self.fail_on_delete_call:
+            raise RuntimeError("connection lost")
+        for task_id in ids:
+            del self.task_files[task_id]
+        return len(ids)
+
+
+def _job(**fields):
+    values = dict(id=7, company_id=3, status="pending", last_task_id=0, deleted_tasks=0,
+                  deleted_files=0, pending_files=[], last_error=None, finished_at=None)
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+@pytest.fixture
+def patched(monkeypatch):
+    def install(job, store):
+        monkeypatch.setattr(company_deletion.crud_company_deletion, "lock", lambda db, *, job_id: job)
+        monkeypatch.setattr(company_deletion.crud_task, "get_ids_by_company_after", store.get_ids_by_company_after)
+        monkeypatch.setattr(company_deletion.crud_task, "delete_by_ids", store.delete_by_ids)
+        monkeypatch.setattr(company_deletion.crud_attachment, "get_file_paths_by_tasks", store.get_file_paths_by_tasks)
+        monkeypatch.setattr(company_deletion.settings, "COMPANY_DELETION_CHUNK_SIZE", 2)
+        monkeypatch.setattr(company_deletion.settings, "COMPANY_DELETION_THROTTLE_SECONDS", 0)
+        return FakeSession(job)
+    return install
+
+
+def _files(tmp_path, *names):
+    paths = []
+    for name in names:
+        path = tmp_path / name
+        path.write_text("x")
+        paths.append(str(path))
+    return paths
+
+
+def test_run_job_deletes_all_tasks_in_chunks_and_their_files(tmp_path, patched):
+    files = _files(tmp_path, "a", "b", "c")
+    store = FakeStore({1: [files[0]], 2: [], 3: [files[1], files[2]]})
+    job = _job()
+    db = patched(job, store)
+
+    company_deletion.run_job(db, job)
+
+    assert store.task_files == {}
+    assert store.requested_after == [0, 2, 3]
+    assert job.status == "done" and job.finished_at is not None
+    assert job.deleted_tasks == 3 and job.deleted_files == 3
+    assert job.pending_files == [] and job.last_error is None
+    assert not any((tmp_path / name).exists() for name in ("a", "b", "c"))
+
+
+def test_run_job_resumes_after_last_task_id(patched):
+    # Задачи 1 и 2 удалены до падения; строки 1 и 2 здесь только для проверки, что их не трогают
+    store = FakeStore({1: [], 2: [], 3: [], 4: [], 5: []})
+    job = _job(status="running", last_task_id=2, deleted_tasks=2)
+    db = patched(job, store)
+
+    company_deletion.run_job(db, job)
+
+    assert store.requested_after[0] == 2
+    assert sorted(store.task_files) == [1, 2]
+    assert job.deleted_tasks == 5 and job.last_task_id == 5
+    assert job.status == "done"
+
+
+def test_run_job_removes_pending_files_left_by_a_crash_first(tmp_path, patched):
+    left_over = _files(tmp_path, "old1", "old2")
+    left_over.append(str(tmp_path / "already_removed"))
+    store = FakeStore({})
+    job = _job(status="running", last_task_id=4, deleted_tasks=4, pending_files=left_over)
+    db = patched(job, store)
+
+    company_deletion.run_job(db, job)
+
+    assert not (tmp_path / "old1").exists() and not (tmp_path / "old2").exists()
+    assert job.pending_files == []
+    assert job.deleted_files == 3
+    assert job.status == "done"
+
+
+def test_flush_pending_files_commits_progress_per_batch(tmp_path, monkeypatch, patched):
+    paths = _files(tmp_path, "f1", "f2", "f3", "f4", "f5")
+    job = _job(pending_files=paths)
+    db = patched(job, FakeStore({}))
+    monkeypatch.setattr(company_deletion, "FILE_BATCH_SIZE", 2)
+
+    assert company_deletion.flush_pending_files(db, job.id) == 5
+    # Три пачки (2 + 2 + 1) и финальная проверка пустого списка
+    assert db.commits == 4
+    assert job.deleted_files == 5 and job.pending_files == []
+
+
+def test_run_job_records_last_error_and_keeps_progress(tmp_path, patched):
+    files = _files(tmp_path, "a", "b")
+    store = FakeStore({1: [files[0]], 2: [], 3: [files[1]], 4: []}, fail_on_delete_call=2)
+    job = _job()
+    db = patched(job, store)
+
+    with pytest.raises(RuntimeError):
+        company_deletion.run_job(db, job)
+
+    assert db.rollbacks == 1
+    assert job.last_error == "connection lost"
+    # Первая порция сохранена, вторая откатилась вместе со своими путями файлов
+    assert job.last_task_id == 2 and job.deleted_tasks == 2
+    assert job.pending_files == []
+    assert job.status == "running"
+    assert (tmp_path / "b").exists()
+
+    company_deletion.run_job(db, job)
+
+    assert job.status == "done" and job.last_error is None
+    assert job.deleted_tasks == 4
+    assert not (tmp_path / "b").exists()
+
+
+def test_resume_unfinished_continues_after_a_failed_job(monkeypatch):
+    failing, healthy = _job(id=1, company_id=1), _job(id=2, company_id=2)
+    db = FakeSession(failing)
+    monkeypatch.setattr(company_deletion, "SessionLocal", lambda: db)
+    monkeypatch.setattr(company_deletion.crud_company_deletion, "get_unfinished", lambda db: [failing, healthy])
+    attempted = []
+
+    def run_job(db, job, stopping=None):
+        attempted.append(job.id)
+        if job is failing:
+            raise RuntimeError("boom")
+        job.status = "done"
+
+    monkeypatch.setattr(company_deletion, "run_job", run_job)
+
+    assert company_deletion.resume_unfinished() == 1
+    assert attempted == [1, 2]
+    assert db.closed